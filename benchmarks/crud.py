@@ -0,0 +1,558 @@
+#!/usr/bin/env python3
+# throughput & latency of every generated endpoint, for an api built from a
+# sample specification & served from a sqlite database; through an in-process
+# asgi client, and through a real uvicorn server on a local socket.
+#
+# results are written as json, so that runs on different commits can be
+# compared. the database is rebuilt (from the same seed) for every transport.
+# a run in which any request failed exits non-zero; its numbers are those of
+# an endpoint which doesn't work, & can't be compared with anything.
+#
+# usage: python -m benchmarks.crud [--transports asgi,uvicorn] [--requests 500]
+#                                  [--concurrency 10] [--page-sizes 10,100]
+#                                  [--rows 1000] [--output benchmark.json]
+#                                  [--compare baseline.json]
+import argparse
+import asyncio
+import contextlib
+import json
+import os
+import platform
+import random
+import socket
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import datetime
+from datetime import timedelta
+from typing import Any
+from uuid import UUID
+from uuid import uuid4
+
+import httpx
+from pydantic.fields import FieldInfo
+
+from noapi import __main__ as noapi_main
+from noapi import controllers
+from noapi._typing import Specification
+
+DATABASE_PATH = os.environ.get(
+    "NOAPI_BENCHMARK_DATABASE",
+    os.path.join(tempfile.gettempdir(), "noapi-benchmark.db"),
+)
+
+# as in main.py, but backed by sqlite
+SPECIFICATION: Specification = {
+    "services": [
+        {
+            "name": "sqlite",
+            "type": "sql",
+            "driver": "sqlite",
+            "user": "",
+            "password": "",
+            "host": "",
+            "port": 0,
+            "database": DATABASE_PATH,
+        },
+    ],
+    "resources": [
+        {
+            "name": "Account",
+            "table_name": "accounts",
+            "methods": [method.value for method in controllers.Method],
+            "model": {
+                "id": (UUID, FieldInfo(default_factory=uuid4)),
+                "name": (str, "John"),
+                "email": (str, "john@example.com"),
+                "password": (str, "someSecureP4assw0rd"),
+                "created_at": (datetime, FieldInfo(default_factory=datetime.now)),
+                "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
+            },
+            "backing_service": "sqlite",
+        },
+        {
+            "name": "Session",
+            "table_name": "sessions",
+            "methods": ["get_many", "get_one"],
+            "model": {
+                "id": (UUID, FieldInfo(default_factory=uuid4)),
+                "account_id": (UUID, FieldInfo(default_factory=uuid4)),
+                "expires_at": (datetime, FieldInfo(default_factory=datetime.now)),
+                "created_at": (datetime, FieldInfo(default_factory=datetime.now)),
+                "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
+            },
+            "backing_service": "sqlite",
+            "indexes": [["account_id", "created_at"]],
+            "filterable": ["account_id"],
+            "sortable": ["created_at"],
+        },
+    ],
+    # as before logging was configured by each app; so that runs on either
+    # side of that are comparable, & logging doesn't weigh on the results
+    "server": {"log_level": "WARNING"},
+}
+
+SESSIONS_PER_ACCOUNT = 10
+
+# sqlite stores uuids as text, but unlike the other drivers, it won't
+# convert them itself. (this module is also imported by the server process)
+sqlite3.register_adapter(UUID, str)
+
+
+@dataclass
+class Fixtures:
+    account_ids: list[str]
+    # consumed by deletes; one per request
+    deletable_ids: list[str]
+
+
+def seed_database(rows: int, deletable_rows: int, seed: int) -> Fixtures:
+    rng = random.Random(seed)
+
+    def new_id() -> str:
+        return str(UUID(int=rng.getrandbits(128), version=4))
+
+    if os.path.exists(DATABASE_PATH):
+        os.remove(DATABASE_PATH)
+
+    epoch = datetime(2023, 1, 1)
+
+    with contextlib.closing(sqlite3.connect(DATABASE_PATH)) as connection:
+        connection.executescript(
+            """\
+            CREATE TABLE accounts (
+                id TEXT PRIMARY KEY,
+                name TEXT NOT NULL,
+                email TEXT NOT NULL,
+                password TEXT NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            );
+            CREATE TABLE sessions (
+                id TEXT PRIMARY KEY,
+                account_id TEXT NOT NULL,
+                expires_at TIMESTAMP NOT NULL,
+                created_at TIMESTAMP NOT NULL,
+                updated_at TIMESTAMP NOT NULL
+            );
+            CREATE INDEX sessions_account_id_created_at
+                ON sessions (account_id, created_at);
+            """
+        )
+
+        accounts = []
+        for i in range(rows + deletable_rows):
+            created_at = epoch + timedelta(seconds=i)
+            accounts.append(
+                (
+                    new_id(),
+                    f"John #{i}",
+                    f"john{i}@example.com",
+                    "someSecureP4assw0rd",
+                    created_at,
+                    created_at,
+                )
+            )
+
+        sessions = []
+        for account in accounts[:rows]:
+            for i in range(SESSIONS_PER_ACCOUNT):
+                created_at = epoch + timedelta(minutes=i)
+                sessions.append(
+                    (
+                        new_id(),
+                        account[0],
+                        created_at + timedelta(days=30),
+                        created_at,
+                        created_at,
+                    )
+                )
+
+        connection.executemany(
+            "INSERT INTO accounts VALUES (?, ?, ?, ?, ?, ?)", accounts
+        )
+        connection.executemany("INSERT INTO sessions VALUES (?, ?, ?, ?, ?)", sessions)
+        connection.commit()
+
+    return Fixtures(
+        account_ids=[account[0] for account in accounts[:rows]],
+        deletable_ids=[account[0] for account in accounts[rows:]],
+    )
+
+
+def new_account() -> dict[str, Any]:
+    return {"name": "Jane", "email": "jane@example.com", "password": "hunter22"}
+
+
+@dataclass
+class Case:
+    resource: str
+    method: controllers.Method
+    page_size: int | None
+    # (client, fixtures, rng) -> response
+    send: Callable[[httpx.AsyncClient, Fixtures, random.Random], Any]
+
+
+def create_cases(page_sizes: list[int]) -> list[Case]:
+    cases = [
+        Case(
+            "Account",
+            controllers.Method.GET_ONE,
+            None,
+            lambda c, f, rng: c.get(f"/account/{rng.choice(f.account_ids)}"),
+        ),
+        Case(
+            "Account",
+            controllers.Method.POST,
+            None,
+            lambda c, f, rng: c.post("/account", json=new_account()),
+        ),
+        Case(
+            "Account",
+            controllers.Method.PATCH,
+            None,
+            lambda c, f, rng: c.patch(
+                f"/account/{rng.choice(f.account_ids)}", json=new_account()
+            ),
+        ),
+        Case(
+            "Account",
+            controllers.Method.DELETE,
+            None,
+            lambda c, f, rng: c.delete(f"/account/{f.deletable_ids.pop()}"),
+        ),
+    ]
+
+    for page_size in page_sizes:
+        cases += [
+            Case(
+                "Account",
+                controllers.Method.GET_MANY,
+                page_size,
+                lambda c, f, rng, page_size=page_size: c.get(
+                    "/account",
+                    params={
+                        "page": rng.randint(1, max(len(f.account_ids) // page_size, 1)),
+                        "page_size": page_size,
+                    },
+                ),
+            ),
+            Case(
+                "Account",
+                controllers.Method.GET_BATCH,
+                page_size,
+                lambda c, f, rng, page_size=page_size: c.get(
+                    "/account/batch",
+                    params={"ids": ",".join(rng.sample(f.account_ids, page_size))},
+                ),
+            ),
+            Case(
+                "Account",
+                controllers.Method.POST_BATCH,
+                page_size,
+                lambda c, f, rng, page_size=page_size: c.post(
+                    "/account/batch",
+                    json=[new_account() for _ in range(page_size)],
+                ),
+            ),
+            # filtered by, & sorted on, an index
+            Case(
+                "Session",
+                controllers.Method.GET_MANY,
+                page_size,
+                lambda c, f, rng, page_size=page_size: c.get(
+                    "/session",
+                    params={
+                        "account_id": rng.choice(f.account_ids),
+                        "sort": "-created_at",
+                        "page_size": page_size,
+                    },
+                ),
+            ),
+        ]
+
+    return cases
+
+
+def _is_error(status: str) -> bool:
+    return not status.isdigit() or int(status) >= 400
+
+
+async def run_case(
+    client: httpx.AsyncClient,
+    case: Case,
+    fixtures: Fixtures,
+    requests: int,
+    concurrency: int,
+    warm_up: int,
+    seed: int,
+) -> dict[str, Any]:
+    rng = random.Random(seed)
+
+    async def send() -> str:
+        try:
+            response = await case.send(client, fixtures, rng)
+        except httpx.TransportError:
+            # e.g. the server dropping the connection after a crash
+            return "transport_error"
+
+        return str(response.status_code)
+
+    for _ in range(warm_up):
+        await send()
+
+    latencies: list[float] = []
+    statuses: Counter[str] = Counter()
+    remaining = requests
+
+    async def worker() -> None:
+        nonlocal remaining
+        while remaining > 0:
+            remaining -= 1
+            started_at = time.perf_counter()
+            status = await send()
+            latencies.append(time.perf_counter() - started_at)
+            statuses[status] += 1
+
+    started_at = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started_at
+
+    percentiles = statistics.quantiles(latencies, n=100)
+    return {
+        "resource": case.resource,
+        "method": case.method.value,
+        "page_size": case.page_size,
+        "requests": requests,
+        "concurrency": concurrency,
+        "errors": sum(n for status, n in statuses.items() if _is_error(status)),
+        "statuses": dict(sorted(statuses.items())),
+        "requests_per_second": round(requests / elapsed, 1),
+        "p50_ms": round(percentiles[49] * 1000, 3),
+        "p99_ms": round(percentiles[98] * 1000, 3),
+        "mean_ms": round(statistics.fmean(latencies) * 1000, 3),
+    }
+
+
+@contextlib.asynccontextmanager
+async def asgi_client(concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    api = noapi_main.create_api(SPECIFICATION)
+
+    # the transport doesn't run the app's lifespan
+    await api.router.startup()
+    try:
+        # errors are counted as the 500s they'd be served as
+        transport = httpx.ASGITransport(app=api, raise_app_exceptions=False)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://benchmark"
+        ) as client:
+            yield client
+    finally:
+        await api.router.shutdown()
+
+
+def _get_free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@contextlib.asynccontextmanager
+async def uvicorn_client(concurrency: int) -> AsyncIterator[httpx.AsyncClient]:
+    port = _get_free_port()
+
+    # the app is built in the server's own process, from this module
+    environment = os.environ | {
+        noapi_main.SPECIFICATION_ENVIRONMENT_VARIABLE: "benchmarks.crud:SPECIFICATION",
+        "NOAPI_BENCHMARK_DATABASE": DATABASE_PATH,
+    }
+    server = subprocess.Popen(
+        [
+            sys.executable,
+            "-m",
+            "uvicorn",
+            "--factory",
+            "noapi.__main__:create_api_from_environment",
+            "--port",
+            str(port),
+            "--log-level",
+            "warning",
+            "--no-access-log",
+        ],
+        env=environment,
+        stdout=subprocess.DEVNULL,
+    )
+    try:
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(
+            base_url=f"http://127.0.0.1:{port}", limits=limits
+        ) as client:
+            for _ in range(100):
+                try:
+                    await client.get(noapi_main.METRICS_PATH)
+                    break
+                except httpx.TransportError:
+                    await asyncio.sleep(0.1)
+            else:
+                raise RuntimeError("The server didn't start")
+
+            yield client
+    finally:
+        server.terminate()
+        server.wait()
+
+
+TRANSPORTS = {
+    "asgi": asgi_client,
+    "uvicorn": uvicorn_client,
+}
+
+
+def get_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+async def run(args: argparse.Namespace) -> dict[str, Any]:
+    cases = create_cases(args.page_sizes)
+    results = []
+
+    for transport in args.transports:
+        # every delete needs a record of its own
+        fixtures = seed_database(
+            args.rows, args.requests + args.warm_up, seed=args.seed
+        )
+
+        async with TRANSPORTS[transport](args.concurrency) as client:
+            for case in cases:
+                result = await run_case(
+                    client,
+                    case,
+                    fixtures,
+                    requests=args.requests,
+                    concurrency=args.concurrency,
+                    warm_up=args.warm_up,
+                    seed=args.seed,
+                )
+                result = {"transport": transport, **result}
+                results.append(result)
+
+                print(
+                    f"{transport:>8} {case.resource:>8} {case.method.value:>10}"
+                    f" {case.page_size or '':>4}:"
+                    f" {result['requests_per_second']:>8.1f} req/s"
+                    f" p50 {result['p50_ms']:>7.2f}ms"
+                    f" p99 {result['p99_ms']:>7.2f}ms"
+                    + (f" ({result['errors']} errors)" if result["errors"] else "")
+                )
+
+    return {
+        "commit": get_commit(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "started_at": datetime.now().isoformat(),
+        "arguments": {
+            "transports": args.transports,
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "page_sizes": args.page_sizes,
+            "rows": args.rows,
+            "warm_up": args.warm_up,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+
+def _get_case_key(result: dict[str, Any]) -> tuple[Any, ...]:
+    return (
+        result["transport"],
+        result["resource"],
+        result["method"],
+        result["page_size"],
+    )
+
+
+def compare(baseline: dict[str, Any], report: dict[str, Any]) -> None:
+    print(f"compared to {baseline['commit'] or 'baseline'}:")
+
+    baseline_results = {_get_case_key(r): r for r in baseline["results"]}
+    for result in report["results"]:
+        before = baseline_results.get(_get_case_key(result))
+        if before is None:
+            continue
+
+        transport, resource, method, page_size = _get_case_key(result)
+        throughput = result["requests_per_second"] / before["requests_per_second"]
+        p99 = result["p99_ms"] / before["p99_ms"]
+        print(
+            f"{transport:>8} {resource:>8} {method:>10} {page_size or '':>4}:"
+            f" {(throughput - 1) * 100:>+7.1f}% req/s"
+            f" {(p99 - 1) * 100:>+7.1f}% p99"
+        )
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--transports",
+        type=lambda s: s.split(","),
+        default=list(TRANSPORTS),
+    )
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument(
+        "--page-sizes",
+        type=lambda s: [int(size) for size in s.split(",")],
+        default=[10, 100],
+    )
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--warm-up", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="benchmark.json")
+    parser.add_argument("--compare", help="a previous run's output")
+    args = parser.parse_args()
+
+    for transport in args.transports:
+        if transport not in TRANSPORTS:
+            parser.error(f"unknown transport: {transport}")
+
+    report = asyncio.run(run(args))
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"results written to {args.output}")
+
+    if args.compare is not None:
+        with open(args.compare) as f:
+            compare(json.load(f), report)
+
+    failed = [result for result in report["results"] if result["errors"]]
+    for result in failed:
+        print(
+            f"{result['transport']} {result['resource']} {result['method']}"
+            f" {result['page_size'] or ''}: {result['errors']} errors"
+            f" {result['statuses']}",
+            file=sys.stderr,
+        )
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,90 @@
+#!/usr/bin/env python3
+# per-row cost of turning database records into a json response body,
+# through model validation vs. through a precompiled trusted-read serializer.
+#
+# usage: python -m benchmarks.serializers [--rows 100] [--repeat 200]
+import argparse
+import timeit
+from collections.abc import Callable
+from collections.abc import Mapping
+from datetime import datetime
+from typing import Any
+from uuid import UUID
+from uuid import uuid4
+
+import pydantic
+from pydantic.fields import FieldInfo
+
+import noapi.json
+from noapi import models
+from noapi import serializers
+from noapi.rest import responses
+
+MODEL = {
+    "id": (UUID, FieldInfo(default_factory=uuid4)),
+    "name": (str, "John"),
+    "email": (str, "john@example.com"),
+    "password": (str, "someSecureP4assw0rd"),
+    "created_at": (datetime, FieldInfo(default_factory=datetime.now)),
+    "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
+}
+
+
+def make_records(count: int) -> list[dict[str, Any]]:
+    # as they come out of the repository layer
+    return [
+        {
+            "id": str(uuid4()),
+            "name": f"John #{i}",
+            "email": f"john{i}@example.com",
+            "password": "someSecureP4assw0rd",
+            "created_at": datetime.now(),
+            "updated_at": datetime.now(),
+        }
+        for i in range(count)
+    ]
+
+
+def render(
+    serialize: Callable[[Mapping[str, Any]], Any],
+    recs: list[dict[str, Any]],
+) -> bytes:
+    return noapi.json.dumps(responses.format_success([serialize(r) for r in recs]))
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    model = pydantic.create_model("Account", **MODEL, __base__=models.BaseModel)
+    recs = make_records(args.rows)
+
+    candidates = {
+        "validated": model.from_mapping,
+        "trusted": serializers.compile_serializer(model),
+    }
+
+    assert render(candidates["validated"], recs) == render(candidates["trusted"], recs)
+
+    results = {}
+    for name, serialize in candidates.items():
+        timings = timeit.repeat(
+            lambda: render(serialize, recs),
+            number=args.repeat,
+            repeat=5,
+        )
+        results[name] = min(timings) / args.repeat / args.rows
+
+    for name, per_row in results.items():
+        print(f"{name:>10}: {per_row * 1e6:8.2f}us/row")
+
+    speedup = results["validated"] / results["trusted"]
+    print(f"{'speedup':>10}: {speedup:8.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
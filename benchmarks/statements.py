@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+# per-call cost of preparing a query for the driver, from a plain sql string
+# (parsed, bound & compiled on every call) vs. from a cached statement.
+#
+# usage: python -m benchmarks.statements [--repeat 2000]
+import argparse
+import timeit
+from typing import Any
+
+from databases.backends.sqlite import SQLiteConnection
+from databases.core import Connection
+from sqlalchemy.dialects import sqlite
+
+from noapi.statements import Statement
+
+SQL = """\
+    SELECT id, name, email, created_at, updated_at
+      FROM accounts
+     WHERE name = :filter_name
+  ORDER BY created_at, id
+     LIMIT :limit OFFSET :offset
+"""
+
+VALUES = {"filter_name": "John", "limit": 50, "offset": 100}
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=2000)
+    args = parser.parse_args()
+
+    # the driver's side of an execution, without any i/o
+    connection: Any = SQLiteConnection.__new__(SQLiteConnection)
+    connection._dialect = sqlite.pysqlite.dialect(paramstyle="qmark")
+
+    statement = Statement(SQL, "benchmark.get_many")
+
+    candidates = {
+        "string": lambda: connection._compile(Connection._build_query(SQL, VALUES)),
+        "statement": lambda: connection._compile(
+            Connection._build_query(statement.bind(VALUES))
+        ),
+    }
+
+    sql, params, _ = candidates["string"]()
+    assert (sql, params) == candidates["statement"]()[:2]
+
+    results = {}
+    for name, prepare in candidates.items():
+        timings = timeit.repeat(prepare, number=args.repeat, repeat=5)
+        results[name] = min(timings) / args.repeat
+
+    for name, per_call in results.items():
+        print(f"{name:>10}: {per_call * 1e6:8.2f}us/call")
+
+    speedup = results["string"] / results["statement"]
+    print(f"{'speedup':>10}: {speedup:8.2f}x")
+
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
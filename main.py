@@ -52,6 +52,10 @@ API_SPECIFICATION: Specification = {
                 "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
             },
             "backing_service": "mysql",  # NOTE: this is by service name
+            # ?account_id=...&sort=-created_at
+            "indexes": [["account_id", "created_at"]],
+            "filterable": ["account_id"],
+            "sortable": ["created_at"],
         },
     ],
 }
@@ -1 +1,2 @@
+from .__main__ import create_api  # type: ignore
 from .__main__ import main as create_and_run_api  # type: ignore
@@ -1,27 +1,65 @@
 #!/usr/bin/env python3
+import logging
+import os
 from collections.abc import Awaitable
 from collections.abc import Callable
 from collections.abc import Mapping
 from typing import Any
 
-import databases
-import pydantic
+import redis.asyncio
 import starlette.routing
-import uvicorn
+import uvicorn.importer
 from fastapi import FastAPI
 from fastapi.routing import APIRoute
 
+import noapi.logger as logger
+import noapi.metrics as metrics
+from noapi import compiler
 from noapi import controllers
 from noapi import models
+from noapi import specification as _specification
 from noapi._typing import Specification
-from noapi.services.sql import dsn
+from noapi.rest import access_log
+from noapi.rest import admin
+from noapi.rest import admission
+from noapi.rest import compression
+from noapi.rest import deadlines
+from noapi.rest import exposition
+from noapi.rest import request_ids
+from noapi.rest import responses
+from noapi.rest import timing
+from noapi.services import redis as redis_service
+from noapi.services import sql as sql_service
+from noapi.services.registry import ServiceRegistry
+from noapi.usecases import ResourceUsecases
+
+
+BATCH_METHODS = frozenset({controllers.Method.GET_BATCH, controllers.Method.POST_BATCH})
+
+# the import string of the specification, for worker processes to build from
+SPECIFICATION_ENVIRONMENT_VARIABLE = "NOAPI_SPECIFICATION"
+
+METRICS_PATH = "/metrics"
+
+# the server options which are passed through to uvicorn
+UVICORN_OPTIONS = (
+    "host",
+    "port",
+    "loop",
+    "http",
+    "backlog",
+    "timeout_keep_alive",
+    "limit_concurrency",
+)
 
 
 def get_http_method(method: controllers.Method) -> str:
     return {
         controllers.Method.GET_MANY: "GET",
         controllers.Method.GET_ONE: "GET",
+        controllers.Method.GET_BATCH: "GET",
         controllers.Method.POST: "POST",
+        controllers.Method.POST_BATCH: "POST",
         controllers.Method.PATCH: "PATCH",
         controllers.Method.DELETE: "DELETE",
     }[method]
@@ -31,6 +69,9 @@ def create_endpoint(
     resource_def: Mapping[str, Any],
     method: controllers.Method,
     model: type[models.BaseModel],
+    usecases: ResourceUsecases,
+    server_def: Mapping[str, Any] | None = None,
+    limiters: dict[str, admission.Limiter] | None = None,
 ) -> APIRoute:
     # TODO: maybe there should be another layer of abstraction here?
     # this looks like shit
@@ -38,29 +79,76 @@ def create_endpoint(
     resource_name = resource_def["name"]
 
     if method == controllers.Method.GET_ONE:
-        endpoint_function = controllers.create_get_one_function(resource_def, model)
+        endpoint_function = controllers.create_get_one_function(
+            resource_def, model, usecases
+        )
         path = f"/{resource_name.lower()}/{{id}}"
         response_model = model
     elif method == controllers.Method.GET_MANY:
-        endpoint_function = controllers.create_get_many_function(resource_def, model)
+        endpoint_function = controllers.create_get_many_function(
+            resource_def, model, usecases
+        )
         path = f"/{resource_name.lower()}"
-        response_model = list[type[model]]
-        print(response_model)
+        response_model = list[model]
+    elif method == controllers.Method.GET_BATCH:
+        endpoint_function = controllers.create_get_batch_function(
+            resource_def, model, usecases
+        )
+        path = f"/{resource_name.lower()}/batch"
+        response_model = list[model]
     elif method == controllers.Method.POST:
-        endpoint_function = controllers.create_post_function(resource_def, model)
+        endpoint_function = controllers.create_post_function(
+            resource_def, model, usecases
+        )
         path = f"/{resource_name.lower()}"
         response_model = model
+    elif method == controllers.Method.POST_BATCH:
+        endpoint_function = controllers.create_post_batch_function(
+            resource_def, model, usecases
+        )
+        path = f"/{resource_name.lower()}/batch"
+        response_model = list[model]
     elif method == controllers.Method.PATCH:
-        endpoint_function = controllers.create_patch_function(resource_def, model)
+        endpoint_function = controllers.create_patch_function(
+            resource_def, model, usecases
+        )
         path = f"/{resource_name.lower()}/{{id}}"
         response_model = model
     elif method == controllers.Method.DELETE:
-        endpoint_function = controllers.create_delete_function(resource_def, model)
+        endpoint_function = controllers.create_delete_function(
+            resource_def, model, usecases
+        )
         path = f"/{resource_name.lower()}/{{id}}"
         response_model = model
     else:
         raise ValueError(f"Unknown method: {method}")
 
+    # from when the request is admitted; queueing is bounded on its own
+    endpoint_function = deadlines.add_deadline(
+        resource_def, method.value, endpoint_function
+    )
+
+    if server_def is None:
+        server_def = {}
+
+    if server_def.get("server_timing", False):
+        endpoint_function = timing.add_server_timing(endpoint_function)
+
+    if "access_log" in server_def:
+        endpoint_function = access_log.add_access_log(
+            resource_def, method.value, server_def["access_log"], endpoint_function
+        )
+
+    # outside of the access log, so that shedding load stays cheap; the
+    # rejections are counted by the metrics
+    endpoint_function = admission.add_admission_control(
+        resource_def, method.value, endpoint_function, limiters
+    )
+
+    endpoint_function = metrics.instrument(
+        resource_name, method.value, responses.finish_after_body
+    )(endpoint_function)
+
     return APIRoute(
         path=path,
         endpoint=endpoint_function,
@@ -77,20 +165,31 @@ def create_startup_event(
     service_definition: Mapping[str, Any],
 ) -> Callable[[], Awaitable[None]]:
     async def on_startup() -> None:
+        services: ServiceRegistry = api.state.services
+
         match service_definition["type"]:
             case "sql":
-                service = databases.Database(
-                    dsn(
-                        driver=service_definition["driver"],
-                        user=service_definition["user"],
-                        password=service_definition["password"],
+                replica_set = sql_service.create_replica_set(service_definition)
+                pool_def = service_definition.get("pool", {})
+
+                for database in replica_set.all_databases:
+                    await database.connect()
+
+                    if pool_def.get("warm_up", False):
+                        await sql_service.warm_up(database, pool_def.get("min_size", 1))
+
+                services.add_sql_service(service_definition["name"], replica_set)
+            case "redis":
+                client = redis.asyncio.from_url(
+                    redis_service.dsn(
                         host=service_definition["host"],
                         port=service_definition["port"],
-                        database=service_definition["database"],
+                        password=service_definition.get("password"),
+                        database=service_definition.get("database", 0),
                     )
                 )
-                await service.connect()
-                api.state.database_client = service
+                await client.ping()
+                services.add_redis_client(service_definition["name"], client)
             case _:
                 raise ValueError(f"Unknown service type: {service_definition['type']}")
 
@@ -102,10 +201,16 @@ def create_shutdown_event(
     service_definition: Mapping[str, Any],
 ) -> Callable[[], Awaitable[None]]:
     async def on_shutdown() -> None:
+        services: ServiceRegistry = api.state.services
+
         match service_definition["type"]:
             case "sql":
-                await api.state.database_client.disconnect()
-                del api.state.database_client
+                replica_set = services.remove_sql_service(service_definition["name"])
+                for database in replica_set.all_databases:
+                    await database.disconnect()
+            case "redis":
+                client = services.remove_redis_client(service_definition["name"])
+                await client.close()
             case _:
                 raise ValueError(f"Unknown service type: {service_definition['type']}")
 
@@ -113,28 +218,114 @@ def create_shutdown_event(
 
 
 # TODO: more accurate model for specification
-def main(specification: Specification) -> int:
+def create_api(specification: Specification) -> FastAPI:
+    server_def = specification.get("server", {})
+
+    # in every process serving the app; worker processes build their own
+    logger.configure_logging(
+        server_def.get("app_env", logger.DEFAULT_APP_ENV),
+        server_def.get("log_level", logger.DEFAULT_LOG_LEVEL),
+    )
+
+    compiled = compiler.compile_specification(specification)
+    timings = compiled["timings"]
+
     routes: list[starlette.routing.BaseRoute] = []
 
-    for resource_def in specification["resources"]:
-        # TODO: this creates the models in the pydantic.main namespace which
-        #       *might* be a problem
-        resource_model = pydantic.create_model(
-            resource_def["name"],
-            **resource_def["model"],
-            __base__=models.BaseModel,
-        )
+    # the app's admission limiters; each resource's are shared by its methods
+    limiters: dict[str, admission.Limiter] = {}
 
-        for method in map(controllers.Method, resource_def["methods"]):
-            routes.append(create_endpoint(resource_def, method, resource_model))
+    with compiler.timed(timings, "routes"):
+        for resource in compiled["resources"]:
+            # /resource/batch must be routed before /resource/{id} can match it
+            methods = sorted(
+                map(controllers.Method, resource["definition"]["methods"]),
+                key=lambda method: method not in BATCH_METHODS,
+            )
+            for method in methods:
+                routes.append(
+                    create_endpoint(
+                        resource["definition"],
+                        method,
+                        resource["model"],
+                        resource["usecases"],
+                        server_def,
+                        limiters,
+                    )
+                )
+
+    if server_def.get("metrics", True):
+        routes.append(exposition.create_metrics_route(METRICS_PATH))
+
+    if "admin_token" in server_def:
+        routes.extend(admin.create_routes(server_def["admin_token"]))
 
     api = FastAPI(routes=routes)
+    api.state.services = ServiceRegistry()
+    api.state.startup_timings = timings
+
+    compression_def = server_def.get("compression")
+    if compression_def is not None:
+        api.add_middleware(
+            compression.CompressionMiddleware, compression_def=compression_def
+        )
+
+    # outermost, so that everything within runs with the request's id
+    api.add_middleware(request_ids.RequestIdMiddleware)
 
     # set up service initialization & teardown
     for service_def in specification["services"]:
         api.on_event("startup")(create_startup_event(api, service_def))
         api.on_event("shutdown")(create_shutdown_event(api, service_def))
 
-    uvicorn.run(api)
+    logger.info(
+        "Compiled specification",
+        resources=len(compiled["resources"]),
+        **{
+            f"{phase}_ms": round(seconds * 1000, 3)
+            for phase, seconds in timings.items()
+        },
+    )
+
+    return api
+
+
+def create_api_from_environment() -> FastAPI:
+    # the app factory for worker processes; they can't be handed the
+    # specification itself, so they import it by name & build their own app
+    # (along with their own service pools) from it.
+    specification = uvicorn.importer.import_from_string(
+        os.environ[SPECIFICATION_ENVIRONMENT_VARIABLE]
+    )
+    return create_api(specification)
+
+
+def main(specification: Specification) -> int:
+    server_def = specification.get("server", {})
+
+    # anything not given is left to uvicorn's defaults
+    options = {k: server_def[k] for k in UVICORN_OPTIONS if k in server_def}
+
+    log_level = logger.get_level(server_def.get("log_level", logger.DEFAULT_LOG_LEVEL))
+    options["log_level"] = log_level
+
+    # ours replaces uvicorn's, which writes from the event loop; unless ours
+    # is logged at a level which is filtered out, & so wouldn't replace it
+    if "access_log" in server_def and log_level <= logging.INFO:
+        options["access_log"] = False
+
+    workers = server_def.get("workers", 1)
+    if workers > 1:
+        # pre-forked workers, sharing the listening socket
+        _specification.validate(specification)
+        os.environ[SPECIFICATION_ENVIRONMENT_VARIABLE] = server_def["specification"]
+        uvicorn.run(
+            "noapi.__main__:create_api_from_environment",
+            factory=True,
+            workers=workers,
+            **options,
+        )
+    else:
+        uvicorn.run(create_api(specification), **options)
 
     return 0
@@ -5,9 +5,20 @@ from typing import TypedDict
 ResourceIdentifier = Any
 
 
-class Service(TypedDict):
+class Pool(TypedDict, total=False):
+    min_size: int  # default: the driver's
+    max_size: int  # default: the driver's
+    connect_timeout: float  # seconds; default: the driver's
+    warm_up: bool  # default: False; open min_size connections at startup
+    statement_cache_size: int  # postgresql only; default: 100 per connection
+    # default: none; the database cancels statements running for longer. set it
+    # above the longest timeout of the resources on the service
+    statement_timeout_ms: int
+
+
+class _RequiredSQLService(TypedDict):
     name: str
-    type: str
+    type: Literal["sql"]
     driver: str
     user: str
     password: str
@@ -16,14 +27,153 @@ class Service(TypedDict):
     database: str
 
 
-class Resource(TypedDict):
+class _RequiredReplica(TypedDict):
+    host: str
+    port: int
+
+
+class Replica(_RequiredReplica, total=False):
+    # default: the primary's
+    user: str
+    password: str
+    database: str
+
+
+class SQLService(_RequiredSQLService, total=False):
+    pool: Pool
+    replicas: list[Replica]
+    sticky_seconds: float  # default: 5; reads go to the primary after a write
+
+
+class _RequiredRedisService(TypedDict):
+    name: str
+    type: Literal["redis"]
+    host: str
+    port: int
+
+
+class RedisService(_RequiredRedisService, total=False):
+    password: str
+    database: int  # default: 0
+
+
+Service = SQLService | RedisService
+
+
+class _RequiredReadThroughCache(TypedDict):
+    service: str  # NOTE: this is by service name
+
+
+class ReadThroughCache(_RequiredReadThroughCache, total=False):
+    ttl_seconds: int  # default: 60
+
+
+class Cache(TypedDict, total=False):
+    max_entries: int  # default: 1024
+    ttl_seconds: float  # default: 5
+
+
+class BatchReads(TypedDict, total=False):
+    window_ms: float  # default: 0 (a single event loop tick)
+    max_batch_size: int  # default: the resource's max_batch_size
+
+
+class WriteBatching(TypedDict, total=False):
+    window_ms: float  # default: 0 (a single event loop tick)
+    max_batch_size: int  # default: the resource's max_batch_size
+
+
+class _RequiredConcurrencyLimit(TypedDict):
+    max_concurrent: int  # requests worked on at once, per worker process
+
+
+class ConcurrencyLimit(_RequiredConcurrencyLimit, total=False):
+    max_queued: int  # default: 0; requests waiting for a turn, beyond which 503s
+    queue_timeout_ms: float  # default: 1000; how long they wait before a 503
+    retry_after: int  # default: 1 (seconds); the Retry-After of those 503s
+
+
+class _RequiredTimeout(TypedDict):
+    timeout_ms: float  # how long requests have to be served, before a 504
+
+
+class Timeout(_RequiredTimeout, total=False):
+    # default: timeout_ms; the most a client may ask for, with X-Request-Timeout-Ms
+    max_timeout_ms: float
+
+
+class _RequiredResource(TypedDict):
     name: str
     table_name: str
-    methods: list[Literal["get_many", "get_one", "post", "patch", "delete"]]
+    methods: list[
+        Literal[
+            "get_many", "get_one", "get_batch", "post", "post_batch", "patch", "delete"
+        ]
+    ]
     model: dict[str, tuple[type[Any], Any]]
     backing_service: str
 
 
-class Specification(TypedDict):
+class Resource(_RequiredResource, total=False):
+    pagination: Literal["offset", "keyset"]  # default: "offset"
+    pagination_key: str  # default: "id"; only used for "keyset" pagination
+    read_through_cache: ReadThroughCache
+    cache: Cache
+    max_batch_size: int  # default: 100; for "get_batch" & "post_batch"
+    coalesce_reads: list[Literal["get_one", "get_many"]]
+    batch_reads: BatchReads
+    write_batching: WriteBatching  # merges concurrent "post"s into multi-row INSERTs
+    trusted_reads: bool  # default: False; skip model validation on reads
+    indexes: list[list[str]]  # the columns of each index, in order; "id" is implied
+    filterable: list[str]  # must lead an index
+    sortable: list[str]  # must be servable by an index
+    access_log_sample_rate: float  # default: the server's; for busy resources
+    concurrency_limit: ConcurrencyLimit  # default: none; shared by its methods
+    # method -> limit; default: none. taken as well as the resource's limit
+    method_concurrency_limits: dict[str, ConcurrencyLimit]
+    timeout: Timeout  # default: none; for each of its methods
+    method_timeouts: dict[str, Timeout]  # method -> timeout; replaces the resource's
+
+
+class Compression(TypedDict, total=False):
+    min_size: int  # default: 1024 (bytes); smaller bodies are sent as they are
+    # in order of preference; default: ["zstd", "br", "gzip"], of those installed
+    encodings: list[Literal["zstd", "br", "gzip"]]
+    levels: dict[str, int]  # encoding -> level; default: zstd 3, br 4, gzip 6
+    cache_entries: int  # default: 256; compressed bodies kept by their etags
+
+
+class AccessLog(TypedDict, total=False):
+    sample_rate: float  # default: 1.0; the share of requests which are logged
+    slow_request_ms: float  # default: none; slower requests are always logged
+
+
+class Server(TypedDict, total=False):
+    host: str  # default: "127.0.0.1"
+    port: int  # default: 8000
+    workers: int  # default: 1; each worker process has its own service pools
+    # the import string of this specification (e.g. "main:API_SPECIFICATION"),
+    # which worker processes build their apps from; required for workers > 1
+    specification: str
+    loop: Literal["auto", "asyncio", "uvloop"]  # default: "auto"
+    http: Literal["auto", "h11", "httptools"]  # default: "auto"
+    backlog: int  # default: 2048
+    timeout_keep_alive: int  # default: 5 (seconds)
+    limit_concurrency: int  # default: unlimited; beyond it, requests get 503s
+    compression: Compression  # default: responses aren't compressed
+    metrics: bool  # default: True; prometheus metrics, served at /metrics
+    server_timing: bool  # default: False; a Server-Timing header on responses
+    admin_token: str  # default: none; serves /admin/* to bearers of this token
+    # default: uvicorn's access log; failed requests are always logged
+    access_log: AccessLog
+    app_env: str  # default: "production"; "local" logs as text, rather than json
+    log_level: str  # default: "INFO"; noapi's logs, as well as uvicorn's
+
+
+class _RequiredSpecification(TypedDict):
     services: list[Service]
     resources: list[Resource]
+
+
+class Specification(_RequiredSpecification, total=False):
+    server: Server
@@ -0,0 +1,114 @@
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Sequence
+from typing import Any
+from typing import Generic
+from typing import TypeVar
+
+from noapi import deadlines
+from noapi import metrics
+from noapi.context import Context
+from noapi.metrics import Histogram
+from noapi.metrics import RequestMetrics
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+BATCH_SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128, 256, 512)
+
+# an item, as submitted: by whom, & with what for its result
+_Pending = tuple[Context, T, asyncio.Future[Any], RequestMetrics | None]
+
+
+# collects items submitted concurrently (within one event loop tick, or within
+# `window` seconds) and hands them to `function` as a single batch. `function`
+# must return one result per item, in order; a result which is an exception is
+# raised to that item's caller alone.
+#
+# items whose requests' deadlines have passed by then are left out of the
+# batch; the batch itself runs to completion, whatever their deadlines. the
+# time it takes (e.g. in the database) is counted against each of them.
+class Batcher(Generic[T, R]):
+    def __init__(
+        self,
+        function: Callable[[Context, list[T]], Awaitable[Sequence[R | Exception]]],
+        window: float = 0.0,
+        max_batch_size: int = 100,
+    ) -> None:
+        self.function = function
+        self.window = window
+        self.max_batch_size = max_batch_size
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+
+        self._pending: list[_Pending[T]] = []
+        self._flush_handle: asyncio.Handle | None = None
+
+        # strong references to running batches; the loop only keeps weak ones
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    async def submit(self, ctx: Context, item: T) -> R:
+        loop = asyncio.get_running_loop()
+
+        future = loop.create_future()
+        self._pending.append((ctx, item, future, metrics.get_current_request()))
+
+        if len(self._pending) >= self.max_batch_size:
+            self._flush()
+        elif self._flush_handle is None:
+            if self.window > 0:
+                self._flush_handle = loop.call_later(self.window, self._flush)
+            else:
+                self._flush_handle = loop.call_soon(self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            self.batch_sizes.observe(len(batch))
+            task = asyncio.ensure_future(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[_Pending[T]]) -> None:
+        for ctx, _, future, _ in batch:
+            if not future.done() and deadlines.has_passed(ctx):
+                future.set_exception(deadlines.DeadlineExceeded())
+
+        batch = [entry for entry in batch if not entry[2].done()]
+        if not batch:
+            return
+
+        # the batch runs with the context of the first submitter; they
+        # all share the same services, so it makes no difference which.
+        ctx = deadlines.without_deadline(batch[0][0])
+
+        try:
+            with metrics.measure_shared(request for *_, request in batch):
+                results = await self.function(ctx, [item for _, item, *_ in batch])
+        except Exception as exc:
+            for _, _, future, _ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+            return
+        except BaseException:
+            # e.g. cancelled, as the app shuts down; its callers are too,
+            # rather than being left to wait on it forever
+            for _, _, future, _ in batch:
+                future.cancel()
+            raise
+
+        for (_, _, future, _), result in zip(batch, results):
+            if future.done():  # the caller was cancelled
+                continue
+
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
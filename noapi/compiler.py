@@ -0,0 +1,78 @@
+import contextlib
+import time
+from collections.abc import Iterator
+from collections.abc import Mapping
+from typing import Any
+from typing import TypedDict
+
+import pydantic
+
+from noapi import models
+from noapi import specification as _specification
+from noapi import usecases as _usecases
+from noapi._typing import Specification
+
+# turns a specification into everything needed to serve it; each resource's
+# model, repositories (& their sql) and usecases are built exactly once, and
+# then shared between all of the resource's endpoints.
+
+
+class CompiledResource(TypedDict):
+    definition: Mapping[str, Any]
+    model: type[models.BaseModel]
+    usecases: _usecases.ResourceUsecases
+
+
+class CompiledSpecification(TypedDict):
+    specification: Specification
+    resources: list[CompiledResource]
+    timings: dict[str, float]  # phase -> seconds
+
+
+@contextlib.contextmanager
+def timed(timings: dict[str, float], phase: str) -> Iterator[None]:
+    started_at = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started_at
+        timings[phase] = timings.get(phase, 0.0) + elapsed
+
+
+def create_model(resource_def: Mapping[str, Any]) -> type[models.BaseModel]:
+    # TODO: this creates the models in the pydantic.main namespace which
+    #       *might* be a problem
+    return pydantic.create_model(
+        resource_def["name"],
+        **resource_def["model"],
+        __base__=models.BaseModel,
+    )
+
+
+def compile_specification(specification: Specification) -> CompiledSpecification:
+    timings: dict[str, float] = {}
+
+    with timed(timings, "validation"):
+        _specification.validate(specification)
+
+    resource_defs = specification["resources"]
+
+    with timed(timings, "models"):
+        resource_models = [create_model(resource_def) for resource_def in resource_defs]
+
+    with timed(timings, "usecases"):
+        resource_usecases = [
+            _usecases.get_for_resource(resource_def, model)
+            for resource_def, model in zip(resource_defs, resource_models)
+        ]
+
+    return {
+        "specification": specification,
+        "resources": [
+            {"definition": resource_def, "model": model, "usecases": usecases}
+            for resource_def, model, usecases in zip(
+                resource_defs, resource_models, resource_usecases
+            )
+        ],
+        "timings": timings,
+    }
@@ -2,12 +2,30 @@ import abc
 
 import databases
 import httpx
+import redis.asyncio
 
 
 class Context(abc.ABC):
-    @property
+    # the (event loop) time by which the request is to be served; work still
+    # running then is given up on. None for no deadline
+    deadline: float | None = None
+
+    @abc.abstractmethod
+    def get_database_client(
+        self, service_name: str, read_only: bool = False
+    ) -> databases.Database:
+        ...
+
+    # records that this client has written to the service (which getting
+    # a client for writing to it does), so that its reads see its writes
     @abc.abstractmethod
-    def database_client(self) -> databases.Database:
+    def mark_written(self, service_name: str) -> None:
+        ...
+
+    # whether reads should skip the replicas (and anything which may hold
+    # data read from them) so that they see this client's recent writes
+    @abc.abstractmethod
+    def prefers_primary(self, service_name: str) -> bool:
         ...
 
     @property
@@ -15,7 +33,6 @@ class Context(abc.ABC):
     def http_client(self) -> httpx.AsyncClient:
         ...
 
-    # @property
-    # @abc.abstractmethod
-    # def redis_client(self) -> aioredis.Redis:
-    #     ...
+    @abc.abstractmethod
+    def get_redis_client(self, service_name: str) -> redis.asyncio.Redis:
+        ...
@@ -1,25 +1,52 @@
 import enum
+import functools
 from collections.abc import Awaitable
 from collections.abc import Callable
 from collections.abc import Mapping
+from collections.abc import Sequence
+from datetime import datetime
 from typing import Any
 
 import fastapi
+import pydantic
 from fastapi import Depends
 
 import noapi.logger as logger
+import noapi.metrics as metrics
 import noapi.rest.responses as responses
 from noapi import models
+from noapi import serializers
+from noapi import specification
 from noapi import usecases as _usecases
 from noapi._typing import ResourceIdentifier
 from noapi.errors import ServiceError
+from noapi.querying import parse_sort
+from noapi.querying import Query
 from noapi.rest.context import RestContext
 
 
+DEFAULT_PAGE_SIZE = 10
+
+# query parameters which are not filters
+_RESERVED_PARAMS = frozenset(
+    {"page", "page_size", "cursor", "stream", "fields", "sort"}
+)
+
+# the field which versions a record, if the model has one. every write goes
+# through the model, whose default factory gives it a new value (unless the
+# client supplies one), so reading it can stand in for reading the record.
+VERSION_FIELD = "updated_at"
+
+# a page is versioned by which records are on it, and their versions
+_PAGE_VERSION_FIELDS = ("id", VERSION_FIELD)
+
+
 class Method(str, enum.Enum):
     GET_MANY = "get_many"  # /resource
     GET_ONE = "get_one"  # /resource/{id}
+    GET_BATCH = "get_batch"  # /resource/batch?ids=a,b,c
     POST = "post"
+    POST_BATCH = "post_batch"  # /resource/batch
     PATCH = "patch"
     DELETE = "delete"
 
@@ -29,6 +56,22 @@ def determine_http_code(error: ServiceError) -> int:
         # 4xx
         case ServiceError.RESOURCE_NOT_FOUND:
             return fastapi.status.HTTP_404_NOT_FOUND
+        case ServiceError.RESOURCE_INVALID_CURSOR:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.RESOURCE_INVALID_PAGE_SIZE:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.RESOURCE_BATCH_TOO_LARGE:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.RESOURCE_INVALID_FIELDS:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.RESOURCE_INVALID_QUERY:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.RESOURCE_INVALID_ID:
+            return fastapi.status.HTTP_400_BAD_REQUEST
+        case ServiceError.ADMIN_UNAUTHORIZED:
+            return fastapi.status.HTTP_401_UNAUTHORIZED
+        case ServiceError.PROFILER_BUSY:
+            return fastapi.status.HTTP_409_CONFLICT
         # 5xx
         case ServiceError.RESOURCE_FETCH_FAILED:
             return fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -38,22 +81,232 @@ def determine_http_code(error: ServiceError) -> int:
             return fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
         case ServiceError.RESOURCE_DELETION_FAILED:
             return fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+        case ServiceError.SERVER_OVERLOADED:
+            return fastapi.status.HTTP_503_SERVICE_UNAVAILABLE
+        case ServiceError.DEADLINE_EXCEEDED:
+            return fastapi.status.HTTP_504_GATEWAY_TIMEOUT
         case _:
             return fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
 
 
+def _wants_stream(request: fastapi.Request, stream: bool) -> bool:
+    # newline-delimited json; one record per line, written as they're read
+    return stream or responses.NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+def _parse_fields(
+    model: type[models.BaseModel], fields: str | None
+) -> tuple[str, ...] | None | ServiceError:
+    # ?fields=a,b,c; None means every field of the model
+    if fields is None:
+        return None
+
+    requested = {field.strip() for field in fields.split(",")}
+    if not requested or not requested <= model.__fields__.keys():
+        return ServiceError.RESOURCE_INVALID_FIELDS
+
+    if len(requested) == len(model.__fields__):
+        return None
+
+    return tuple(k for k in model.__fields__ if k in requested)
+
+
+def _parse_ids(resource_def: Mapping[str, Any], ids: str) -> list[str] | ServiceError:
+    # comma-separated, with duplicates removed (preserving order); each is
+    # passed on as the model's id type spells it
+    id_type = resource_def["model"]["id"][0]
+    try:
+        parsed = [
+            str(pydantic.parse_obj_as(id_type, id)) for id in ids.split(",") if id
+        ]
+    except pydantic.ValidationError:
+        return ServiceError.RESOURCE_INVALID_ID
+
+    return list(dict.fromkeys(parsed))
+
+
+def _is_versioned(
+    model: type[models.BaseModel],
+    fields: tuple[str, ...] | None,
+    required_fields: Sequence[str],
+) -> bool:
+    # the validators are derived from fields which must also be read
+    if VERSION_FIELD not in model.__fields__:
+        return False
+
+    return fields is None or set(required_fields) <= set(fields)
+
+
+def _parse_last_modified(version: Any) -> datetime | None:
+    try:
+        return pydantic.parse_obj_as(datetime, version)
+    except pydantic.ValidationError:
+        return None
+
+
+def _get_record_validators(
+    id: ResourceIdentifier,
+    fields: tuple[str, ...] | None,
+    rec: Mapping[str, Any],
+) -> responses.Validators:
+    return responses.Validators(
+        etag=responses.versioned_etag([id, fields, rec[VERSION_FIELD]]),
+        last_modified=_parse_last_modified(rec[VERSION_FIELD]),
+    )
+
+
+def _get_page_validators(
+    fields: tuple[str, ...] | None,
+    recs: Sequence[Mapping[str, Any]],
+    next_cursor: str | None = None,
+) -> responses.Validators:
+    # no last-modified; a page also changes when records leave it, which
+    # the versions of the records left on it can't tell. nor can they tell
+    # whether there are records after it (e.g. once more have been added,
+    # or beyond a filter); a keyset page's cursor is part of it too.
+    return responses.Validators(
+        etag=responses.versioned_etag(
+            [fields, [(rec["id"], rec[VERSION_FIELD]) for rec in recs], next_cursor]
+        ),
+    )
+
+
+def _create_query_parser(
+    resource_def: Mapping[str, Any],
+    model: type[models.BaseModel],
+) -> Callable[[Mapping[str, str], str | None], Query | ServiceError]:
+    filterable = frozenset(resource_def.get("filterable", []))
+    sortable = frozenset(resource_def.get("sortable", []))
+
+    # whether an index can serve an ordering depends on what's filtered
+    @functools.lru_cache(maxsize=128)
+    def is_sortable(filter_keys: tuple[str, ...], sort_field: str) -> bool:
+        return sort_field in sortable and specification.is_sortable(
+            resource_def, filter_keys, sort_field
+        )
+
+    # ?account_id=...&sort=-created_at
+    def parse_query(
+        params: Mapping[str, str], sort: str | None
+    ) -> Query | ServiceError:
+        filters = []
+        for k, v in params.items():
+            if k in _RESERVED_PARAMS:
+                continue
+
+            if k not in filterable:
+                return ServiceError.RESOURCE_INVALID_QUERY
+
+            try:
+                value = pydantic.parse_obj_as(model.__fields__[k].outer_type_, v)
+            except pydantic.ValidationError:
+                return ServiceError.RESOURCE_INVALID_QUERY
+
+            filters.append((k, value))
+
+        query = Query(filters=tuple(sorted(filters, key=lambda f: f[0])))
+
+        if sort is not None:
+            query = query._replace(sort=parse_sort(sort))
+            if not is_sortable(query.filter_keys, query.sort.field):
+                return ServiceError.RESOURCE_INVALID_QUERY
+
+        return query
+
+    return parse_query
+
+
+def _create_read_serializers(
+    resource_def: Mapping[str, Any],
+    model: type[models.BaseModel],
+) -> Callable[[tuple[str, ...] | None], Callable[[Mapping[str, Any]], Any]]:
+    trusted_reads = resource_def.get("trusted_reads", False)
+
+    # compiled once per distinct set of fields
+    @functools.lru_cache(maxsize=128)
+    def get_serializer(
+        fields: tuple[str, ...] | None
+    ) -> Callable[[Mapping[str, Any]], Any]:
+        # records read back from our own tables can skip model validation
+        if trusted_reads:
+            return serializers.compile_serializer(model, fields)
+
+        if fields is not None:
+            return models.create_partial_model(model, fields).from_mapping
+
+        return model.from_mapping
+
+    return get_serializer
+
+
 def create_get_many_function(
     resource_def: Mapping[str, Any],
     model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
 ) -> Callable[[fastapi.Request], Awaitable[fastapi.Response]]:
-    usecases = _usecases.get_for_resource(resource_def, model)
+    if resource_def.get("pagination", "offset") == "keyset":
+        return _create_get_many_after_function(resource_def, model, usecases)
+
+    get_serializer = _create_read_serializers(resource_def, model)
+    parse_query = _create_query_parser(resource_def, model)
 
     async def function(
         request: fastapi.Request,
         page: int = 1,
-        page_size: int = 10,
+        page_size: int | None = None,
+        stream: bool = False,
+        fields: str | None = None,
+        sort: str | None = None,
         ctx: RestContext = Depends(),
     ) -> fastapi.Response:
+        selected_fields = _parse_fields(model, fields)
+        if isinstance(selected_fields, ServiceError):
+            return responses.failure(
+                error=selected_fields,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(selected_fields),
+            )
+
+        query = parse_query(request.query_params, sort)
+        if isinstance(query, ServiceError):
+            return responses.failure(
+                error=query,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(query),
+            )
+
+        serialize = get_serializer(selected_fields)
+
+        if _wants_stream(request, stream):
+            stream_usecase = usecases.get("iterate_many")
+            if stream_usecase is None:
+                logger.error(
+                    f"No usecase available to process the incoming request",
+                    resource_name=resource_def["name"],
+                    method=Method.GET_MANY,
+                )
+                return responses.failure(
+                    error=ServiceError.RESOURCE_FETCH_FAILED,
+                    message="Failed to fetch resource(s)",
+                    status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            recs = await stream_usecase(ctx, page, page_size, selected_fields, query)
+            if isinstance(recs, ServiceError):
+                return responses.failure(
+                    error=recs,
+                    message="Failed to fetch resource(s)",
+                    status_code=determine_http_code(recs),
+                )
+
+            return responses.stream(
+                data=(serialize(rec) async for rec in recs),
+                status_code=fastapi.status.HTTP_200_OK,
+            )
+
+        if page_size is None:
+            page_size = DEFAULT_PAGE_SIZE
+
         usecase = usecases.get("get_many")
         if usecase is None:
             logger.error(
@@ -67,7 +320,22 @@ def create_get_many_function(
                 status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        data = await usecase(ctx, page, page_size)
+        versioned = _is_versioned(model, selected_fields, _PAGE_VERSION_FIELDS)
+        if versioned and responses.is_conditional(request.headers):
+            # check the client's copy against the page's versions alone
+            versions = await usecase(ctx, page, page_size, _PAGE_VERSION_FIELDS, query)
+            if isinstance(versions, ServiceError):
+                return responses.failure(
+                    error=versions,
+                    message="Failed to fetch resource(s)",
+                    status_code=determine_http_code(versions),
+                )
+
+            validators = _get_page_validators(selected_fields, versions)
+            if responses.is_not_modified(request.headers, validators):
+                return responses.not_modified(validators)
+
+        data = await usecase(ctx, page, page_size, selected_fields, query)
         if isinstance(data, ServiceError):
             return responses.failure(
                 error=data,
@@ -75,11 +343,138 @@ def create_get_many_function(
                 status_code=determine_http_code(data),
             )
 
-        resp = [model.from_mapping(rec) for rec in data]
+        with metrics.measure("model"):
+            resp = [serialize(rec) for rec in data]
 
         return responses.success(
             data=resp,
             status_code=fastapi.status.HTTP_200_OK,
+            validators=(
+                _get_page_validators(selected_fields, data) if versioned else None
+            ),
+            request_headers=request.headers,
+        )
+
+    return function
+
+
+def _create_get_many_after_function(
+    resource_def: Mapping[str, Any],
+    model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
+) -> Callable[[fastapi.Request], Awaitable[fastapi.Response]]:
+    get_serializer = _create_read_serializers(resource_def, model)
+    parse_query = _create_query_parser(resource_def, model)
+
+    async def function(
+        request: fastapi.Request,
+        cursor: str | None = None,
+        page_size: int | None = None,
+        stream: bool = False,
+        fields: str | None = None,
+        ctx: RestContext = Depends(),
+    ) -> fastapi.Response:
+        selected_fields = _parse_fields(model, fields)
+        if isinstance(selected_fields, ServiceError):
+            return responses.failure(
+                error=selected_fields,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(selected_fields),
+            )
+
+        # keyset pages are always ordered by the pagination key
+        query = parse_query(request.query_params, request.query_params.get("sort"))
+        if isinstance(query, ServiceError):
+            return responses.failure(
+                error=query,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(query),
+            )
+
+        serialize = get_serializer(selected_fields)
+
+        if _wants_stream(request, stream):
+            stream_usecase = usecases.get("iterate_many_after")
+            if stream_usecase is None:
+                logger.error(
+                    f"No usecase available to process the incoming request",
+                    resource_name=resource_def["name"],
+                    method=Method.GET_MANY,
+                )
+                return responses.failure(
+                    error=ServiceError.RESOURCE_FETCH_FAILED,
+                    message="Failed to fetch resource(s)",
+                    status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
+                )
+
+            recs = await stream_usecase(ctx, cursor, page_size, selected_fields, query)
+            if isinstance(recs, ServiceError):
+                return responses.failure(
+                    error=recs,
+                    message="Failed to fetch resource(s)",
+                    status_code=determine_http_code(recs),
+                )
+
+            return responses.stream(
+                data=(serialize(rec) async for rec in recs),
+                status_code=fastapi.status.HTTP_200_OK,
+            )
+
+        if page_size is None:
+            page_size = DEFAULT_PAGE_SIZE
+
+        usecase = usecases.get("get_many_after")
+        if usecase is None:
+            logger.error(
+                f"No usecase available to process the incoming request",
+                resource_name=resource_def["name"],
+                method=Method.GET_MANY,
+            )
+            return responses.failure(
+                error=ServiceError.RESOURCE_FETCH_FAILED,
+                message="Failed to fetch resource(s)",
+                status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        versioned = _is_versioned(model, selected_fields, _PAGE_VERSION_FIELDS)
+        if versioned and responses.is_conditional(request.headers):
+            # check the client's copy against the page's versions alone
+            versions = await usecase(
+                ctx, cursor, page_size, _PAGE_VERSION_FIELDS, query
+            )
+            if isinstance(versions, ServiceError):
+                return responses.failure(
+                    error=versions,
+                    message="Failed to fetch resource(s)",
+                    status_code=determine_http_code(versions),
+                )
+
+            validators = _get_page_validators(selected_fields, *versions)
+            if responses.is_not_modified(request.headers, validators):
+                return responses.not_modified(validators)
+
+        data = await usecase(ctx, cursor, page_size, selected_fields, query)
+        if isinstance(data, ServiceError):
+            return responses.failure(
+                error=data,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(data),
+            )
+
+        recs, next_cursor = data
+        with metrics.measure("model"):
+            resp = [serialize(rec) for rec in recs]
+
+        return responses.success(
+            data=resp,
+            status_code=fastapi.status.HTTP_200_OK,
+            meta={"next_cursor": next_cursor},
+            validators=(
+                _get_page_validators(selected_fields, recs, next_cursor)
+                if versioned
+                else None
+            ),
+            request_headers=request.headers,
         )
 
     return function
@@ -88,13 +483,26 @@ def create_get_many_function(
 def create_get_one_function(
     resource_def: Mapping[str, Any],
     model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
 ) -> Callable[[fastapi.Request], Awaitable[fastapi.Response]]:
-    usecases = _usecases.get_for_resource(resource_def, model)
+    get_serializer = _create_read_serializers(resource_def, model)
 
     async def function(
+        request: fastapi.Request,
         id: ResourceIdentifier,
+        fields: str | None = None,
         ctx: RestContext = Depends(),
     ) -> fastapi.Response:
+        selected_fields = _parse_fields(model, fields)
+        if isinstance(selected_fields, ServiceError):
+            return responses.failure(
+                error=selected_fields,
+                message="Failed to fetch resource",
+                status_code=determine_http_code(selected_fields),
+            )
+
+        serialize = get_serializer(selected_fields)
+
         usecase = usecases.get("get_one")
         if usecase is None:
             logger.error(
@@ -108,7 +516,22 @@ def create_get_one_function(
                 status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
-        data = await usecase(ctx, id)
+        versioned = _is_versioned(model, selected_fields, (VERSION_FIELD,))
+        if versioned and responses.is_conditional(request.headers):
+            # check the client's copy against the record's version alone
+            version = await usecase(ctx, id, (VERSION_FIELD,))
+            if isinstance(version, ServiceError):
+                return responses.failure(
+                    error=version,
+                    message="Failed to fetch resource",
+                    status_code=determine_http_code(version),
+                )
+
+            validators = _get_record_validators(id, selected_fields, version)
+            if responses.is_not_modified(request.headers, validators):
+                return responses.not_modified(validators)
+
+        data = await usecase(ctx, id, selected_fields)
         if isinstance(data, ServiceError):
             return responses.failure(
                 error=data,
@@ -116,7 +539,63 @@ def create_get_one_function(
                 status_code=determine_http_code(data),
             )
 
-        resp = model.from_mapping(data)
+        with metrics.measure("model"):
+            resp = serialize(data)
+
+        return responses.success(
+            data=resp,
+            status_code=fastapi.status.HTTP_200_OK,
+            validators=(
+                _get_record_validators(id, selected_fields, data) if versioned else None
+            ),
+            request_headers=request.headers,
+        )
+
+    return function
+
+
+def create_get_batch_function(
+    resource_def: Mapping[str, Any],
+    model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
+) -> Callable[[str], Awaitable[fastapi.Response]]:
+    serialize = _create_read_serializers(resource_def, model)(None)
+
+    async def function(
+        ids: str,
+        ctx: RestContext = Depends(),
+    ) -> fastapi.Response:
+        usecase = usecases.get("get_batch")
+        if usecase is None:
+            logger.error(
+                f"No usecase available to process the incoming request",
+                resource_name=resource_def["name"],
+                method=Method.GET_BATCH,
+            )
+            return responses.failure(
+                error=ServiceError.RESOURCE_FETCH_FAILED,
+                message="Failed to fetch resource(s)",
+                status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        resource_ids = _parse_ids(resource_def, ids)
+        if isinstance(resource_ids, ServiceError):
+            return responses.failure(
+                error=resource_ids,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(resource_ids),
+            )
+
+        data = await usecase(ctx, resource_ids)
+        if isinstance(data, ServiceError):
+            return responses.failure(
+                error=data,
+                message="Failed to fetch resource(s)",
+                status_code=determine_http_code(data),
+            )
+
+        with metrics.measure("model"):
+            resp = [serialize(rec) for rec in data]
 
         return responses.success(
             data=resp,
@@ -129,11 +608,10 @@ def create_get_one_function(
 def create_post_function(
     resource_def: Mapping[str, Any],
     model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
 ) -> Callable[[models.BaseModel], Awaitable[fastapi.Response]]:
-    usecases = _usecases.get_for_resource(resource_def, model)
-
     async def function(
-        obj: models.BaseModel,
+        obj: model,  # type: ignore[valid-type]
         ctx: RestContext = Depends(),
     ) -> fastapi.Response:
         usecase = usecases.get("post")
@@ -157,11 +635,55 @@ def create_post_function(
                 status_code=determine_http_code(data),
             )
 
-        resp = model.from_mapping(data)
+        with metrics.measure("model"):
+            resp = model.from_mapping(data)
 
         return responses.success(
             data=resp,
             status_code=fastapi.status.HTTP_200_OK,
+            cookies=ctx.cookies,
+        )
+
+    return function
+
+
+def create_post_batch_function(
+    resource_def: Mapping[str, Any],
+    model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
+) -> Callable[[list[models.BaseModel]], Awaitable[fastapi.Response]]:
+    async def function(
+        objs: list[model],  # type: ignore[valid-type]
+        ctx: RestContext = Depends(),
+    ) -> fastapi.Response:
+        usecase = usecases.get("post_batch")
+        if usecase is None:
+            logger.error(
+                f"No usecase available to process the incoming request",
+                resource_name=resource_def["name"],
+                method=Method.POST_BATCH,
+            )
+            return responses.failure(
+                error=ServiceError.RESOURCE_CREATION_FAILED,
+                message="Failed to create resource(s)",
+                status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+        data = await usecase(ctx, objs)
+        if isinstance(data, ServiceError):
+            return responses.failure(
+                error=data,
+                message="Failed to create resource(s)",
+                status_code=determine_http_code(data),
+            )
+
+        with metrics.measure("model"):
+            resp = [model.from_mapping(rec) for rec in data]
+
+        return responses.success(
+            data=resp,
+            status_code=fastapi.status.HTTP_200_OK,
+            cookies=ctx.cookies,
         )
 
     return function
@@ -170,14 +692,14 @@ def create_post_function(
 def create_patch_function(
     resource_def: Mapping[str, Any],
     model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
 ) -> Callable[[ResourceIdentifier, models.BaseModel], Awaitable[fastapi.Response]]:
-    usecases = _usecases.get_for_resource(resource_def, model)
+    patch_model = models.create_patch_model(model)
 
-    # TODO: need to type `obj` here dynamically. this might need a refactor?
     # TODO: can i type id here? (do i need to?)
     async def function(
         id: ResourceIdentifier,
-        obj: Any,
+        obj: patch_model,  # type: ignore[valid-type]
         ctx: RestContext = Depends(),
     ) -> fastapi.Response:
         usecase = usecases.get("patch")
@@ -185,7 +707,7 @@ def create_patch_function(
             logger.error(
                 f"No usecase available to process the incoming request",
                 resource_name=resource_def["name"],
-                method=Method.POST,
+                method=Method.PATCH,
             )
             return responses.failure(
                 error=ServiceError.RESOURCE_UPDATE_FAILED,
@@ -193,6 +715,14 @@ def create_patch_function(
                 status_code=fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR,
             )
 
+        # a patched record gets a new updated_at, as a replaced one did,
+        # unless the client gives one
+        if (
+            VERSION_FIELD in patch_model.__fields__
+            and VERSION_FIELD not in obj.__fields_set__
+        ):
+            setattr(obj, VERSION_FIELD, model.__fields__[VERSION_FIELD].get_default())
+
         data = await usecase(ctx, id, obj)
         if isinstance(data, ServiceError):
             return responses.failure(
@@ -201,11 +731,13 @@ def create_patch_function(
                 status_code=determine_http_code(data),
             )
 
-        resp = model.from_mapping(data)
+        with metrics.measure("model"):
+            resp = model.from_mapping(data)
 
         return responses.success(
             data=resp,
             status_code=fastapi.status.HTTP_200_OK,
+            cookies=ctx.cookies,
         )
 
     return function
@@ -214,9 +746,8 @@ def create_patch_function(
 def create_delete_function(
     resource_def: Mapping[str, Any],
     model: type[models.BaseModel],
+    usecases: _usecases.ResourceUsecases,
 ) -> Callable[[fastapi.Request], Awaitable[fastapi.Response]]:
-    usecases = _usecases.get_for_resource(resource_def, model)
-
     # TODO: can i type id here? (do i need to?)
     async def function(
         id: ResourceIdentifier,
@@ -243,11 +774,13 @@ def create_delete_function(
                 status_code=determine_http_code(data),
             )
 
-        resp = model.from_mapping(data)
+        with metrics.measure("model"):
+            resp = model.from_mapping(data)
 
         return responses.success(
             data=resp,
             status_code=fastapi.status.HTTP_200_OK,
+            cookies=ctx.cookies,
         )
 
     return function
@@ -0,0 +1,142 @@
+import asyncio
+import copy
+import functools
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from typing import Concatenate
+from typing import ParamSpec
+from typing import TypeVar
+
+from noapi.context import Context
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# a read still running at its request's deadline is cancelled, rather than
+# holding its pooled connection for as long as it takes. asyncpg cancels the
+# statement on the server as well; other drivers only stop waiting for it, so
+# the connection is closed rather than returned to the pool (see sql.py), &
+# the pool's statement_timeout_ms bounds the statement on the server.
+#
+# writes aren't; once sent, a write may be committed whether or not anybody
+# is still waiting for it (e.g. by drivers which can't cancel it), so its
+# client is told how it went, rather than given a 504 for a write which
+# happened. only writes which haven't been sent by the deadline are dropped.
+#
+# a streamed response is read after its request's handler has returned, but
+# it's bound by the deadline all the same; once it has been started, though,
+# it can only be cut short.
+#
+# work shared by several requests (e.g. coalesced or batched reads) runs to
+# completion for whichever of them are still waiting; each request only
+# stops waiting for it at its own deadline.
+
+
+class DeadlineExceeded(Exception):
+    pass
+
+
+def has_passed(ctx: Context) -> bool:
+    return (
+        ctx.deadline is not None and ctx.deadline <= asyncio.get_running_loop().time()
+    )
+
+
+async def wait(ctx: Context, awaitable: Awaitable[R]) -> R:
+    # cancels the awaitable at the deadline; to only stop waiting for it,
+    # rather than cancel it, it must be shielded
+    if ctx.deadline is None:
+        return await awaitable
+
+    timeout = ctx.deadline - asyncio.get_running_loop().time()
+    try:
+        return await asyncio.wait_for(awaitable, timeout)
+    except asyncio.TimeoutError as e:
+        # (and not one raised by the driver itself)
+        if has_passed(ctx):
+            raise DeadlineExceeded from e
+
+        raise
+
+
+async def iterate(ctx: Context, iterator: AsyncIterator[R]) -> AsyncIterator[R]:
+    # for streams; reading is cancelled at the deadline, by a single timer
+    # (rather than a wait() for every item, which would start a task each)
+    if ctx.deadline is None:
+        async for item in iterator:
+            yield item
+        return
+
+    task = asyncio.current_task()
+    assert task is not None
+    reading = False
+    expired = False
+
+    def expire() -> None:
+        nonlocal expired
+        expired = True
+        # (if it isn't reading, it stops before reading the next item)
+        if reading:
+            task.cancel()
+
+    timer = asyncio.get_running_loop().call_at(ctx.deadline, expire)
+    try:
+        while not expired:
+            reading = True
+            try:
+                item = await anext(iterator)
+            except StopAsyncIteration:
+                return
+            except asyncio.CancelledError as e:
+                if not expired:
+                    raise
+
+                # (python 3.11+ counts a task's cancellations)
+                if hasattr(task, "uncancel"):
+                    task.uncancel()
+                raise DeadlineExceeded from e
+            finally:
+                reading = False
+
+            yield item
+
+        raise DeadlineExceeded
+    finally:
+        timer.cancel()
+
+
+def without_deadline(ctx: Context) -> Context:
+    # for work shared with other requests; the copy's deadline is its only
+    # difference, & the rest of it (e.g. its writes) is shared with ctx
+    if ctx.deadline is None:
+        return ctx
+
+    shared = copy.copy(ctx)
+    shared.deadline = None
+    return shared
+
+
+def bound(
+    function: Callable[Concatenate[Context, P], Awaitable[R]]
+) -> Callable[Concatenate[Context, P], Awaitable[R]]:
+    # for reads; cancelled at the deadline
+    @functools.wraps(function)
+    async def wrapper(ctx: Context, *args: P.args, **kwargs: P.kwargs) -> R:
+        return await wait(ctx, function(ctx, *args, **kwargs))
+
+    return wrapper
+
+
+def checked(
+    function: Callable[Concatenate[Context, P], Awaitable[R]]
+) -> Callable[Concatenate[Context, P], Awaitable[R]]:
+    # for writes; only sent within the deadline, & then seen through
+    @functools.wraps(function)
+    async def wrapper(ctx: Context, *args: P.args, **kwargs: P.kwargs) -> R:
+        if has_passed(ctx):
+            raise DeadlineExceeded
+
+        return await function(ctx, *args, **kwargs)
+
+    return wrapper
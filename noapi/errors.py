@@ -7,6 +7,18 @@ class ServiceError(str, enum.Enum):
     RESOURCE_CREATION_FAILED = "resource.creation_failed"
     RESOURCE_DELETION_FAILED = "resource.deletion_failed"
     RESOURCE_UPDATE_FAILED = "resource.update_failed"
+    RESOURCE_INVALID_CURSOR = "resource.invalid_cursor"
+    RESOURCE_INVALID_PAGE_SIZE = "resource.invalid_page_size"
+    RESOURCE_BATCH_TOO_LARGE = "resource.batch_too_large"
+    RESOURCE_INVALID_FIELDS = "resource.invalid_fields"
+    RESOURCE_INVALID_QUERY = "resource.invalid_query"
+    RESOURCE_INVALID_ID = "resource.invalid_id"
+
+    ADMIN_UNAUTHORIZED = "admin.unauthorized"
+    PROFILER_BUSY = "admin.profiler_busy"
+
+    SERVER_OVERLOADED = "server.overloaded"
+    DEADLINE_EXCEEDED = "server.deadline_exceeded"
 
     # TODO: support for custom ones
     # (e.g. "accounts.username_exists", "avatars.size_too_large")
@@ -1,9 +1,10 @@
+import decimal
 import uuid
 from typing import Any
 
 import fastapi.responses
 import orjson
-import pydantic
+import pydantic.json
 
 
 def _default_processor(data: Any) -> Any:
@@ -15,6 +16,9 @@ def _default_processor(data: Any) -> Any:
         return [_default_processor(v) for v in data]
     elif isinstance(data, uuid.UUID):
         return str(data)
+    elif isinstance(data, decimal.Decimal):
+        # as pydantic encodes them
+        return pydantic.json.decimal_encoder(data)
     else:
         return data
 
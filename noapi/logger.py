@@ -1,16 +1,26 @@
+import atexit
 import logging as stdlib_logging
 import os
+import queue
 import sys
 from contextvars import ContextVar
+from datetime import datetime
+from datetime import timezone
+from logging.handlers import QueueHandler
+from logging.handlers import QueueListener
 from types import TracebackType
 from typing import Any
 
 import structlog
 from structlog.types import EventDict
+from structlog.types import Processor
 from structlog.types import WrappedLogger
 
 _ROOT_LOGGER = stdlib_logging.getLogger()
 
+DEFAULT_APP_ENV = "production"
+DEFAULT_LOG_LEVEL = "INFO"
+
 _REQUEST_ID_CONTEXT = ContextVar("request_id")
 
 
@@ -22,8 +32,33 @@ def get_request_id() -> Any | None:
     return _REQUEST_ID_CONTEXT.get(None)
 
 
+# name -> logger; wrapping one is too costly to do for every event
+_LOGGERS: dict[str, structlog.stdlib.BoundLogger] = {}
+
+# structlog's defaults, until logging is configured
+_PROCESSORS: list[Processor] | None = None
+
+# writes the queued records, once logging is configured
+_LISTENER: QueueListener | None = None
+# queues the root logger's records for the listener
+_QUEUE_HANDLER: QueueHandler | None = None
+
+
 def get_logger(name: str | None = None) -> structlog.stdlib.BoundLogger:
-    return structlog.wrap_logger(_ROOT_LOGGER, logger_name=name or "root")
+    name = name or "root"
+
+    logger = _LOGGERS.get(name)
+    if logger is None:
+        logger = structlog.wrap_logger(
+            _ROOT_LOGGER,
+            processors=_PROCESSORS,
+            wrapper_class=structlog.stdlib.BoundLogger,
+            cache_logger_on_first_use=True,
+            logger_name=name,
+        )
+        _LOGGERS[name] = logger
+
+    return logger
 
 
 def log_as_text(app_env: str) -> bool:
@@ -36,34 +71,106 @@ def add_process_id(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDic
 
 
 def add_request_id(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
-    if request_id := _REQUEST_ID_CONTEXT.get(None):
+    request_id = _REQUEST_ID_CONTEXT.get(None)
+    if request_id is None:
+        # on the listener's thread; records carry the id they were made with
+        request_id = getattr(event_dict.get("_record"), "request_id", None)
+
+    if request_id:
         event_dict["request_id"] = request_id
 
     return event_dict
 
 
+def add_record_timestamp(_: WrappedLogger, __: str, event_dict: EventDict) -> EventDict:
+    # when the record was made, rather than when the listener got to it
+    created = datetime.fromtimestamp(event_dict["_record"].created, timezone.utc)
+    event_dict["timestamp"] = created.isoformat().replace("+00:00", "Z")
+    return event_dict
+
+
+class _QueueHandler(QueueHandler):
+    def prepare(self, record: stdlib_logging.LogRecord) -> stdlib_logging.LogRecord:
+        # formatting is left to the listener's thread; only what can't be
+        # read from there is taken from this one
+        record.request_id = _REQUEST_ID_CONTEXT.get(None)
+        return record
+
+
+def get_level(log_level: str | int) -> int:
+    # "info" / "INFO" / 20 -> 20
+    if isinstance(log_level, int):
+        return log_level
+
+    level = stdlib_logging.getLevelName(log_level.upper())
+    if not isinstance(level, int):
+        raise ValueError(f"Unknown log level: {log_level}")
+
+    return level
+
+
 def configure_logging(app_env: str, log_level: str | int) -> None:
+    # may be called again (e.g. by each app built in a process); each call
+    # replaces what the last one set up, rather than adding to it
+    global _PROCESSORS, _LISTENER, _QUEUE_HANDLER
+
+    log_level = get_level(log_level)
+
     if log_as_text(app_env):
         renderer = structlog.dev.ConsoleRenderer(colors=True)
     else:
         renderer = structlog.processors.JSONRenderer()
 
     formatter = structlog.stdlib.ProcessorFormatter(
-        processor=renderer,
+        processors=[
+            structlog.stdlib.ProcessorFormatter.remove_processors_meta,
+            add_process_id,
+            renderer,
+        ],
         foreign_pre_chain=[
-            structlog.processors.TimeStamper(fmt="iso", key="timestamp"),
+            add_record_timestamp,
             structlog.stdlib.add_log_level,
             structlog.stdlib.add_logger_name,
-            add_process_id,
             add_request_id,
         ],
     )
 
+    # records are rendered & written by a background thread, so that a slow
+    # stdout (or whatever reads from it) holds up that thread, rather than
+    # the event loop & every request on it.
     handler = stdlib_logging.StreamHandler()
     handler.setFormatter(formatter)
-    handler.setLevel(log_level)
 
-    _ROOT_LOGGER.addHandler(handler)
+    log_queue: queue.SimpleQueue[stdlib_logging.LogRecord] = queue.SimpleQueue()
+
+    if _LISTENER is not None:
+        _LISTENER.stop()
+    else:
+        atexit.register(stop_logging)
+
+    _LISTENER = QueueListener(log_queue, handler)
+    _LISTENER.start()
+
+    if _QUEUE_HANDLER is not None:
+        _ROOT_LOGGER.removeHandler(_QUEUE_HANDLER)
+
+    _QUEUE_HANDLER = _QueueHandler(log_queue)
+    _ROOT_LOGGER.addHandler(_QUEUE_HANDLER)
+    _ROOT_LOGGER.setLevel(log_level)
+
+    # the events' own processors run on the caller's thread (e.g. the event
+    # loop's), before their records are queued; so only those which are
+    # cheap, or need the caller's context. rendering is left to the listener.
+    _PROCESSORS = [
+        structlog.stdlib.filter_by_level,
+        structlog.processors.TimeStamper(fmt="iso", key="timestamp"),
+        structlog.stdlib.add_log_level,
+        add_request_id,
+        # the exception is only at hand on this thread
+        structlog.processors.format_exc_info,
+        structlog.stdlib.ProcessorFormatter.wrap_for_formatter,
+    ]
+    _LOGGERS.clear()
 
     for name in stdlib_logging.root.manager.loggerDict:
         logger = stdlib_logging.getLogger(name)
@@ -71,28 +178,46 @@ def configure_logging(app_env: str, log_level: str | int) -> None:
         # defer logging control to the root logger
         logger.propagate = True
         logger.setLevel(log_level)
-        for handler in logger.handlers:
+        for handler in list(logger.handlers):
             logger.removeHandler(handler)
 
 
+def stop_logging() -> None:
+    # writes out whatever is still queued
+    global _LISTENER
+
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
+
+
+# the level is checked before anything else, so that events which won't be
+# logged don't cost anything more
+
+
 def debug(*args, **kwargs) -> None:
-    return get_logger().debug(*args, **kwargs)
+    if _ROOT_LOGGER.isEnabledFor(stdlib_logging.DEBUG):
+        get_logger().debug(*args, **kwargs)
 
 
 def info(*args, **kwargs) -> None:
-    return get_logger().info(*args, **kwargs)
+    if _ROOT_LOGGER.isEnabledFor(stdlib_logging.INFO):
+        get_logger().info(*args, **kwargs)
 
 
 def warning(*args, **kwargs) -> None:
-    return get_logger().warning(*args, **kwargs)
+    if _ROOT_LOGGER.isEnabledFor(stdlib_logging.WARNING):
+        get_logger().warning(*args, **kwargs)
 
 
 def error(*args, **kwargs) -> None:
-    return get_logger().error(*args, **kwargs)
+    if _ROOT_LOGGER.isEnabledFor(stdlib_logging.ERROR):
+        get_logger().error(*args, **kwargs)
 
 
 def critical(*args, **kwargs) -> None:
-    return get_logger().critical(*args, **kwargs)
+    if _ROOT_LOGGER.isEnabledFor(stdlib_logging.CRITICAL):
+        get_logger().critical(*args, **kwargs)
 
 
 # control the exception traceback message format
@@ -0,0 +1,362 @@
+import bisect
+import contextlib
+import functools
+import time
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Iterable
+from collections.abc import Iterator
+from collections.abc import Mapping
+from collections.abc import Sequence
+from contextvars import ContextVar
+from types import TracebackType
+from typing import Any
+from typing import ParamSpec
+from typing import TypeVar
+
+from noapi import profiling
+
+P = ParamSpec("P")
+R = TypeVar("R")
+
+# seconds; from half a millisecond to ten seconds
+LATENCY_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+class Histogram:
+    def __init__(self, buckets: Sequence[float]) -> None:
+        self.buckets = tuple(sorted(buckets))
+
+        # per-bucket (non-cumulative) counts; the last is for +Inf
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+# per-process; each worker process serves its own metrics.
+#
+# (resource, method) -> count
+_REQUESTS: dict[tuple[str, str], int] = {}
+# (resource, method, error) -> count
+_ERRORS: dict[tuple[str, str, str], int] = {}
+# (resource, method) -> latency
+_LATENCIES: dict[tuple[str, str], Histogram] = {}
+# (resource, method, phase) -> time spent in the phase, per request
+_PHASE_LATENCIES: dict[tuple[str, str, str], Histogram] = {}
+
+# the error counted for a request which raised, rather than failing with one
+# of its own (& so was answered with a 500, if at all)
+UNHANDLED_EXCEPTION = "server.unhandled_exception"
+
+
+class RequestMetrics:
+    __slots__ = ("phases", "error")
+
+    def __init__(self) -> None:
+        self.phases: dict[str, float] = {}
+        self.error: str | None = None
+
+
+# the request being served by the current task, if any
+_CURRENT_REQUEST: ContextVar[RequestMetrics | None] = ContextVar(
+    "metrics_request", default=None
+)
+
+
+class measure:
+    # adds the time spent within it to a phase of the current request,
+    # e.g. `with metrics.measure("db"): ...`; a no-op outside of one
+    __slots__ = ("phase", "request", "started_at")
+
+    def __init__(self, phase: str) -> None:
+        self.phase = phase
+
+    def __enter__(self) -> None:
+        self.request = _CURRENT_REQUEST.get()
+        if self.request is not None:
+            self.started_at = time.perf_counter()
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None,
+        exc_value: BaseException | None,
+        traceback: TracebackType | None,
+    ) -> None:
+        if self.request is not None:
+            elapsed = time.perf_counter() - self.started_at
+            phases = self.request.phases
+            phases[self.phase] = phases.get(self.phase, 0.0) + elapsed
+
+
+def measure_async(
+    phase: str,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    def decorator(function: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            with measure(phase):
+                return await function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def measure_iteration(
+    phase: str,
+) -> Callable[[Callable[P, AsyncIterator[R]]], Callable[P, AsyncIterator[R]]]:
+    # each step of the iteration is measured, but not what's done with its items
+    def decorator(
+        function: Callable[P, AsyncIterator[R]]
+    ) -> Callable[P, AsyncIterator[R]]:
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> AsyncIterator[R]:
+            iterator = function(*args, **kwargs)
+            while True:
+                with measure(phase):
+                    try:
+                        item = await anext(iterator)
+                    except StopAsyncIteration:
+                        return
+
+                yield item
+
+        return wrapper
+
+    return decorator
+
+
+def get_current_request() -> RequestMetrics | None:
+    return _CURRENT_REQUEST.get()
+
+
+@contextlib.contextmanager
+def measure_shared(requests: Iterable[RequestMetrics | None]) -> Iterator[None]:
+    # work done on behalf of several requests at once (e.g. a batch of
+    # coalesced reads) is added to the phases of each of them, rather than
+    # to those of whichever request's task happened to do it
+    shared = RequestMetrics()
+    token = _CURRENT_REQUEST.set(shared)
+    try:
+        yield
+    finally:
+        _CURRENT_REQUEST.reset(token)
+        for request in requests:
+            if request is not None:
+                for phase, seconds in shared.phases.items():
+                    request.phases[phase] = request.phases.get(phase, 0.0) + seconds
+
+
+def get_current_phases() -> Mapping[str, float]:
+    # the time spent in each phase of the current request, so far
+    request = _CURRENT_REQUEST.get()
+    if request is None:
+        return {}
+
+    return request.phases
+
+
+def record_error(error: str) -> None:
+    # counted against the current request, once it's finished
+    request = _CURRENT_REQUEST.get()
+    if request is not None:
+        request.error = error
+
+
+def record_exception() -> None:
+    # unless the request has already failed with an error of its own (e.g.
+    # the deadline it exceeded, raised to cut its stream short)
+    request = _CURRENT_REQUEST.get()
+    if request is not None and request.error is None:
+        request.error = UNHANDLED_EXCEPTION
+
+
+def _get_histogram(histograms: dict[Any, Histogram], key: tuple[str, ...]) -> Histogram:
+    histogram = histograms.get(key)
+    if histogram is None:
+        histogram = Histogram(LATENCY_BUCKETS)
+        histograms[key] = histogram
+
+    return histogram
+
+
+def instrument(
+    resource_name: str,
+    method: str,
+    finish_after: Callable[[Any, Callable[[], None]], bool] | None = None,
+) -> Callable[[Callable[P, Awaitable[R]]], Callable[P, Awaitable[R]]]:
+    # finish_after(result, finish) defers counting the request to finish, for
+    # results still being worked on once the function has returned (e.g. a
+    # streamed response), & returns whether it did
+    def decorator(function: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        key = (resource_name, method)
+
+        @functools.wraps(function)
+        async def wrapper(*args: P.args, **kwargs: P.kwargs) -> R:
+            request = RequestMetrics()
+            token = _CURRENT_REQUEST.set(request)
+            started_at = time.perf_counter()
+
+            def finish() -> None:
+                elapsed = time.perf_counter() - started_at
+
+                profiling.record_request(resource_name, method, elapsed)
+
+                _REQUESTS[key] = _REQUESTS.get(key, 0) + 1
+                _get_histogram(_LATENCIES, key).observe(elapsed)
+
+                for phase, seconds in request.phases.items():
+                    histogram = _get_histogram(_PHASE_LATENCIES, (*key, phase))
+                    histogram.observe(seconds)
+
+                if request.error is not None:
+                    error_key = (*key, request.error)
+                    _ERRORS[error_key] = _ERRORS.get(error_key, 0) + 1
+
+            deferred = False
+            try:
+                result = await function(*args, **kwargs)
+                deferred = finish_after is not None and finish_after(result, finish)
+                return result
+            except Exception:
+                # (a cancellation, e.g. of a client which left, isn't one)
+                record_exception()
+                raise
+            finally:
+                # if deferred, the request stays current for the rest of its
+                # work, which is done from this task (or ones started from it)
+                if not deferred:
+                    _CURRENT_REQUEST.reset(token)
+                    finish()
+
+        return wrapper
+
+    return decorator
+
+
+# prometheus' text exposition format
+
+
+def _format_labels(labels: Mapping[str, Any]) -> str:
+    if not labels:
+        return ""
+
+    formatted = []
+    for k, v in labels.items():
+        v = str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+        formatted.append(f'{k}="{v}"')
+
+    return "{" + ",".join(formatted) + "}"
+
+
+def _format_value(value: float) -> str:
+    if isinstance(value, int):
+        return str(value)
+
+    return repr(float(value))
+
+
+def _format_header(name: str, type: str, help: str) -> Iterator[str]:
+    yield f"# HELP {name} {help}"
+    yield f"# TYPE {name} {type}"
+
+
+def _format_samples(
+    name: str,
+    type: str,
+    help: str,
+    samples: Mapping[tuple[Any, ...], float],
+    label_names: Sequence[str],
+) -> Iterator[str]:
+    yield from _format_header(name, type, help)
+    for label_values, value in samples.items():
+        labels = _format_labels(dict(zip(label_names, label_values)))
+        yield f"{name}{labels} {_format_value(value)}"
+
+
+def format_counter(
+    name: str,
+    help: str,
+    samples: Mapping[tuple[Any, ...], float],
+    label_names: Sequence[str],
+) -> Iterator[str]:
+    return _format_samples(name, "counter", help, samples, label_names)
+
+
+def format_gauge(
+    name: str,
+    help: str,
+    samples: Mapping[tuple[Any, ...], float],
+    label_names: Sequence[str],
+) -> Iterator[str]:
+    return _format_samples(name, "gauge", help, samples, label_names)
+
+
+def format_histogram(
+    name: str,
+    help: str,
+    histograms: Mapping[tuple[Any, ...], Histogram],
+    label_names: Sequence[str],
+) -> Iterator[str]:
+    yield from _format_header(name, "histogram", help)
+    for label_values, histogram in histograms.items():
+        labels = dict(zip(label_names, label_values))
+
+        cumulative = 0
+        for bound, count in zip(histogram.buckets, histogram.counts):
+            cumulative += count
+            bucket_labels = _format_labels(labels | {"le": _format_value(bound)})
+            yield f"{name}_bucket{bucket_labels} {cumulative}"
+
+        bucket_labels = _format_labels(labels | {"le": "+Inf"})
+        yield f"{name}_bucket{bucket_labels} {histogram.count}"
+        yield f"{name}_sum{_format_labels(labels)} {_format_value(histogram.sum)}"
+        yield f"{name}_count{_format_labels(labels)} {histogram.count}"
+
+
+def format_request_metrics() -> Iterator[str]:
+    yield from format_counter(
+        "noapi_requests_total",
+        "Requests served, by resource & method.",
+        _REQUESTS,
+        ("resource", "method"),
+    )
+    yield from format_counter(
+        "noapi_request_errors_total",
+        "Requests which failed, by resource, method & service error.",
+        _ERRORS,
+        ("resource", "method", "error"),
+    )
+    yield from format_histogram(
+        "noapi_request_duration_seconds",
+        "Time taken to serve a request, by resource & method.",
+        _LATENCIES,
+        ("resource", "method"),
+    )
+    yield from format_histogram(
+        "noapi_request_phase_duration_seconds",
+        "Time spent in each phase of a request, by resource & method.",
+        _PHASE_LATENCIES,
+        ("resource", "method", "phase"),
+    )
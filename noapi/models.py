@@ -1,4 +1,6 @@
+from collections.abc import Callable
 from collections.abc import Mapping
+from collections.abc import Sequence
 from typing import Any
 from typing import TypeVar
 
@@ -14,3 +16,54 @@ class BaseModel(pydantic.BaseModel):
     @classmethod
     def from_mapping(cls: T, mapping: Mapping[str, Any]) -> T:
         return cls(**{k: mapping[k] for k in cls.__fields__})
+
+
+def create_partial_model(cls: T, fields: Sequence[str]) -> T:
+    # a model with only a subset of another's fields, for sparse responses
+    return pydantic.create_model(
+        cls.__name__,
+        **{
+            k: (cls.__fields__[k].annotation, cls.__fields__[k].field_info)
+            for k in fields
+        },
+        __base__=BaseModel,
+    )
+
+
+def create_patch_model(cls: T) -> T:
+    # every field but the id may be given, & only those given are written
+    # (see .dict(exclude_unset=True)); none of them may be unset with null,
+    # unless the field itself is nullable
+    fields = {k: field for k, field in cls.__fields__.items() if k != "id"}
+    non_nullable = [k for k, field in fields.items() if not field.allow_none]
+
+    def reject_null(cls: Any, value: Any) -> Any:
+        if value is None:
+            raise ValueError("none is not an allowed value")
+
+        return value
+
+    validators = {}
+    if non_nullable:
+        validators["reject_null"] = pydantic.validator(
+            *non_nullable, pre=True, allow_reuse=True
+        )(reject_null)
+
+    return pydantic.create_model(
+        f"{cls.__name__}Patch",
+        **{k: (field.annotation, None) for k, field in fields.items()},
+        __base__=BaseModel,
+        __validators__=validators,
+    )
+
+
+def create_id_normalizer(id_type: Any) -> Callable[[Any], str]:
+    # ids arrive as they were spelled in the url; different spellings of one
+    # id (e.g. a uuid's case, or its hyphens) normalize to the same string
+    def normalize_id(id: Any) -> str:
+        try:
+            return str(pydantic.parse_obj_as(id_type, id))
+        except pydantic.ValidationError:
+            return str(id)
+
+    return normalize_id
@@ -0,0 +1,26 @@
+import base64
+from collections.abc import Sequence
+from typing import Any
+
+import noapi.json
+
+# cursors are opaque to clients; they hold the sort key values of the
+# last record on a page, which the next page's query will resume after.
+
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    data = base64.urlsafe_b64encode(noapi.json.dumps(list(values)))
+    return data.decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list[Any] | None:
+    try:
+        data = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = noapi.json.loads(data)
+    except ValueError:  # binascii.Error, orjson.JSONDecodeError
+        return None
+
+    if not isinstance(values, list):
+        return None
+
+    return values
@@ -0,0 +1,93 @@
+import asyncio
+import cProfile
+import pstats
+from typing import Any
+
+import noapi.logger as logger
+from noapi.errors import ServiceError
+
+# captures a profile of everything the event loop runs, for a while. the
+# requests served during the capture are listed with it, by request id, so
+# that a slow request found in the logs can be found in its profile.
+
+MAX_CAPTURE_SECONDS = 60
+
+
+class _Capture:
+    def __init__(self) -> None:
+        self.profile = cProfile.Profile()
+        self.requests: list[dict[str, Any]] = []
+
+
+# only one profiler can be enabled at a time
+_ACTIVE_CAPTURE: _Capture | None = None
+
+
+def record_request(resource_name: str, method: str, seconds: float) -> None:
+    if _ACTIVE_CAPTURE is None:
+        return
+
+    _ACTIVE_CAPTURE.requests.append(
+        {
+            "request_id": logger.get_request_id(),
+            "resource": resource_name,
+            "method": method,
+            "duration_ms": round(seconds * 1000, 3),
+        }
+    )
+
+
+def _format_function(function: tuple[str, int, str]) -> str:
+    filename, line, name = function
+    if filename == "~":  # builtins
+        return name
+
+    return f"{filename}:{line}({name})"
+
+
+def _get_functions(profile: cProfile.Profile, limit: int) -> list[dict[str, Any]]:
+    stats = pstats.Stats(profile).stats  # type: ignore[attr-defined]
+
+    # by cumulative time; the costliest call paths first
+    entries = sorted(stats.items(), key=lambda entry: entry[1][3], reverse=True)
+    return [
+        {
+            "function": _format_function(function),
+            "calls": calls,
+            "primitive_calls": primitive_calls,
+            "total_seconds": total_seconds,
+            "cumulative_seconds": cumulative_seconds,
+        }
+        for function, (
+            primitive_calls,
+            calls,
+            total_seconds,
+            cumulative_seconds,
+            _,
+        ) in entries[:limit]
+    ]
+
+
+async def capture(seconds: float, limit: int) -> dict[str, Any] | ServiceError:
+    global _ACTIVE_CAPTURE
+
+    if _ACTIVE_CAPTURE is not None:
+        return ServiceError.PROFILER_BUSY
+
+    capture = _Capture()
+    _ACTIVE_CAPTURE = capture
+    try:
+        capture.profile.enable()
+        try:
+            await asyncio.sleep(seconds)
+        finally:
+            capture.profile.disable()
+    finally:
+        _ACTIVE_CAPTURE = None
+
+    return {
+        "request_id": logger.get_request_id(),
+        "seconds": seconds,
+        "requests": capture.requests,
+        "functions": _get_functions(capture.profile, limit),
+    }
@@ -0,0 +1,28 @@
+from typing import Any
+from typing import NamedTuple
+
+# filters & ordering for listing a resource, e.g. ?account_id=...&sort=-created_at
+# they're kept hashable so that the sql compiled for them can be cached, and
+# identical reads coalesced.
+
+
+class Sort(NamedTuple):
+    field: str
+    descending: bool
+
+
+class Query(NamedTuple):
+    filters: tuple[tuple[str, Any], ...] = ()  # (field, value); sorted by field
+    sort: Sort | None = None
+
+    @property
+    def filter_keys(self) -> tuple[str, ...]:
+        return tuple(k for k, _ in self.filters)
+
+
+def parse_sort(sort: str) -> Sort:
+    # "created_at" is ascending, "-created_at" descending
+    if sort.startswith("-"):
+        return Sort(sort[1:], descending=True)
+
+    return Sort(sort, descending=False)
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import weakref
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+
+from noapi import deadlines
+from noapi._typing import ResourceIdentifier
+from noapi.batching import Batcher
+from noapi.context import Context
+from noapi.models import create_id_normalizer
+from noapi.repositories.sql import DEFAULT_MAX_BATCH_SIZE
+from noapi.repositories.sql import ResourceRepository
+
+# batches concurrent get_one calls for distinct ids into a single get_batch
+# (`WHERE id IN (...)`) call, with each caller receiving only its own record.
+
+# resource name -> the live loaders for it; one per app serving the resource.
+# only for the stats, which (as every other metric) are per process.
+_LOADERS: dict[str, weakref.WeakSet[Batcher[ResourceIdentifier, Any]]] = {}
+
+
+def create_loader(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> Batcher[ResourceIdentifier, dict[str, Any] | None]:
+    batch_def = resource_def["batch_reads"]
+    normalize_id = create_id_normalizer(resource_def["model"]["id"][0])
+
+    async def load(
+        ctx: Context, ids: list[ResourceIdentifier]
+    ) -> list[dict[str, Any] | None]:
+        # records are matched to ids as the cache keys them, so that an id
+        # spelled differently from the database's (e.g. an upper-case uuid)
+        # still gets its record
+        keys = [normalize_id(id) for id in ids]
+        unique_ids = list(dict(zip(keys, ids)).values())
+        data = await repository["get_batch"](ctx, unique_ids)
+
+        recs = {normalize_id(rec["id"]): rec for rec in data}
+        return [recs.get(key) for key in keys]
+
+    loader: Batcher[ResourceIdentifier, dict[str, Any] | None] = Batcher(
+        load,
+        window=batch_def.get("window_ms", 0) / 1000,
+        max_batch_size=batch_def.get(
+            "max_batch_size",
+            resource_def.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+        ),
+    )
+    _LOADERS.setdefault(resource_def["name"], weakref.WeakSet()).add(loader)
+    return loader
+
+
+def get_batch_size_stats() -> dict[str, dict[str, Any]]:
+    stats = {}
+    for resource_name, loaders in _LOADERS.items():
+        if loaders:
+            histograms = [loader.batch_sizes for loader in loaders]
+            stats[resource_name] = {
+                "buckets": histograms[0].buckets,
+                "counts": [
+                    sum(counts) for counts in zip(*(h.counts for h in histograms))
+                ],
+                "sum": sum(h.sum for h in histograms),
+                "count": sum(h.count for h in histograms),
+            }
+
+    return stats
+
+
+def wrap_resource_repository(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> ResourceRepository:
+    # shared by every usecase of the resource (within this app); each app
+    # reads through its own repository, so must batch with its own loader.
+    loader = create_loader(resource_def, repository)
+
+    async def get_one(
+        ctx: Context,
+        id: ResourceIdentifier,
+        fields: Sequence[str] | None,
+    ) -> dict[str, Any] | None:
+        # only whole records are batched
+        if fields is not None:
+            return await repository["get_one"](ctx, id, fields)
+
+        # only stops waiting at the deadline; the batch is read for the others
+        return await deadlines.wait(ctx, loader.submit(ctx, id))
+
+    return {
+        **repository,
+        "get_one": get_one,
+    }
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import time
+import weakref
+from collections import OrderedDict
+from collections.abc import Hashable
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+
+from noapi._typing import ResourceIdentifier
+from noapi.context import Context
+from noapi.models import BaseModel
+from noapi.models import create_id_normalizer
+from noapi.repositories.sql import ResourceRepository
+
+# a bounded, per-process cache in front of another resource repository.
+# writes made through this process invalidate it; writes made elsewhere
+# are only picked up once the entry's ttl has passed.
+
+
+class LRUCache:
+    def __init__(self, max_entries: int, ttl_seconds: float) -> None:
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        # bumped on every invalidation, so that reads which raced with a
+        # write can tell that the record they fetched may already be stale.
+        self.generation = 0
+
+        # key -> (expires_at, value), least recently used first
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            del self._entries[key]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def delete(self, key: Hashable) -> None:
+        self._entries.pop(key, None)
+        self.generation += 1
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self.generation += 1
+
+
+# resource name -> the live caches for it; one per app serving the resource.
+# only for the stats, which (as every other metric) are per process.
+_CACHES: dict[str, weakref.WeakSet[LRUCache]] = {}
+
+
+def create_cache(resource_def: Mapping[str, Any]) -> LRUCache:
+    cache_def = resource_def["cache"]
+    cache = LRUCache(
+        max_entries=cache_def.get("max_entries", 1024),
+        ttl_seconds=cache_def.get("ttl_seconds", 5),
+    )
+    _CACHES.setdefault(resource_def["name"], weakref.WeakSet()).add(cache)
+    return cache
+
+
+def get_cache_stats() -> dict[str, dict[str, int]]:
+    stats = {}
+    for resource_name, caches in _CACHES.items():
+        if caches:
+            stats[resource_name] = {
+                "entries": sum(len(cache) for cache in caches),
+                "hits": sum(cache.hits for cache in caches),
+                "misses": sum(cache.misses for cache in caches),
+                "evictions": sum(cache.evictions for cache in caches),
+            }
+
+    return stats
+
+
+def wrap_resource_repository(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> ResourceRepository:
+    # shared by every usecase of the resource (within this app), so that
+    # writes from any of them invalidate the reads of every other one.
+    cache = create_cache(resource_def)
+    normalize_id = create_id_normalizer(resource_def["model"]["id"][0])
+
+    async def get_one(
+        ctx: Context,
+        id: ResourceIdentifier,
+        fields: Sequence[str] | None,
+    ) -> dict[str, Any] | None:
+        key = normalize_id(id)
+
+        data = cache.get(key)
+        if data is not None:
+            return data if fields is None else {k: data[k] for k in fields}
+
+        # only whole records are cached
+        if fields is not None:
+            return await repository["get_one"](ctx, id, fields)
+
+        generation = cache.generation
+        data = await repository["get_one"](ctx, id, None)
+        if data is not None and cache.generation == generation:
+            cache.set(key, data)
+
+        return data
+
+    async def patch(
+        ctx: Context,
+        id: ResourceIdentifier,
+        data: BaseModel,
+    ) -> dict[str, Any] | None:
+        rec = await repository["patch"](ctx, id, data)
+        cache.delete(normalize_id(id))
+        return rec
+
+    async def delete(
+        ctx: Context,
+        id: ResourceIdentifier,
+    ) -> dict[str, Any] | None:
+        rec = await repository["delete"](ctx, id)
+        cache.delete(normalize_id(id))
+        return rec
+
+    return {
+        **repository,
+        "get_one": get_one,
+        "patch": patch,
+        "delete": delete,
+    }
@@ -1 +1,119 @@
-# TODO
+from __future__ import annotations
+
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+
+import redis.exceptions
+
+import noapi.json
+import noapi.logger as logger
+from noapi._typing import ResourceIdentifier
+from noapi.context import Context
+from noapi.models import BaseModel
+from noapi.models import create_id_normalizer
+from noapi.repositories.sql import ResourceRepository
+
+# a read-through cache in front of another resource repository; get_one is
+# served from redis when possible, and writes to a record invalidate it.
+# if redis is unavailable, requests fall through to the wrapped repository.
+
+# written over a record's entry when it's written to, rather than deleting the
+# entry; reads only fill entries which don't exist, so a read which raced the
+# write (and fetched the record as it was before it) can't put it back. reads
+# slower than this can, but only until the entry's ttl passes.
+TOMBSTONE = b""
+TOMBSTONE_SECONDS = 5
+
+
+def wrap_resource_repository(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> ResourceRepository:
+    cache_def = resource_def["read_through_cache"]
+    ttl_seconds = cache_def.get("ttl_seconds", 60)
+    normalize_id = create_id_normalizer(resource_def["model"]["id"][0])
+
+    def make_key(id: ResourceIdentifier) -> str:
+        return f"noapi:{resource_def['name']}:{normalize_id(id)}"
+
+    async def invalidate(ctx: Context, id: ResourceIdentifier) -> None:
+        try:
+            await ctx.get_redis_client(cache_def["service"]).set(
+                make_key(id), TOMBSTONE, ex=TOMBSTONE_SECONDS
+            )
+        except redis.exceptions.RedisError as exc:
+            logger.warning(
+                "Failed to invalidate cached resource",
+                resource_name=resource_def["name"],
+                error=str(exc),
+            )
+
+    async def get_one(
+        ctx: Context,
+        id: ResourceIdentifier,
+        fields: Sequence[str] | None,
+    ) -> dict[str, Any] | None:
+        key = make_key(id)
+
+        try:
+            cached = await ctx.get_redis_client(cache_def["service"]).get(key)
+        except redis.exceptions.RedisError as exc:
+            logger.warning(
+                "Failed to read cached resource",
+                resource_name=resource_def["name"],
+                error=str(exc),
+            )
+            return await repository["get_one"](ctx, id, fields)
+
+        if cached == TOMBSTONE:
+            # just written to; not to be cached again until it expires
+            return await repository["get_one"](ctx, id, fields)
+
+        if cached is not None:
+            data = noapi.json.loads(cached)
+            return data if fields is None else {k: data[k] for k in fields}
+
+        # only whole records are cached
+        if fields is not None:
+            return await repository["get_one"](ctx, id, fields)
+
+        data = await repository["get_one"](ctx, id, None)
+        if data is None:
+            return None
+
+        try:
+            await ctx.get_redis_client(cache_def["service"]).set(
+                key, noapi.json.dumps(data), ex=ttl_seconds, nx=True
+            )
+        except redis.exceptions.RedisError as exc:
+            logger.warning(
+                "Failed to cache resource",
+                resource_name=resource_def["name"],
+                error=str(exc),
+            )
+
+        return data
+
+    async def patch(
+        ctx: Context,
+        id: ResourceIdentifier,
+        data: BaseModel,
+    ) -> dict[str, Any] | None:
+        rec = await repository["patch"](ctx, id, data)
+        await invalidate(ctx, id)
+        return rec
+
+    async def delete(
+        ctx: Context,
+        id: ResourceIdentifier,
+    ) -> dict[str, Any] | None:
+        rec = await repository["delete"](ctx, id)
+        await invalidate(ctx, id)
+        return rec
+
+    return {
+        **repository,
+        "get_one": get_one,
+        "patch": patch,
+        "delete": delete,
+    }
@@ -1,41 +1,136 @@
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import functools
+from collections.abc import AsyncIterator
 from collections.abc import Awaitable
 from collections.abc import Callable
 from collections.abc import Mapping
+from collections.abc import Sequence
 from typing import Any
+from typing import ParamSpec
 from typing import TypedDict
 from typing import TypeVar
 
+import databases
+
+import noapi.metrics as metrics
+from noapi import deadlines
 from noapi._typing import ResourceIdentifier
 from noapi.context import Context
 from noapi.models import BaseModel
+from noapi.querying import Query
+from noapi.querying import Sort
+from noapi.statements import Statement
 
+P = ParamSpec("P")
 R = TypeVar("R")
 
-# TODO: how will we handle different backing services?
+# dialects which can return the affected rows of a write within the same
+# statement; for the others, we build the response from what we wrote.
+_RETURNING_DIALECTS = frozenset({"postgresql", "sqlite"})
+
+DEFAULT_MAX_BATCH_SIZE = 100
+
+# distinct field sets (?fields=), filters & sorts per query to keep sql for
+QUERY_CACHE_SIZE = 128
+
+# records fetched per query when iterating through an entire table
+ITERATION_CHUNK_SIZE = 1000
 
 
 class ResourceRepository(TypedDict):
-    get_one: Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | None]]
-    get_many: Callable[[Context, int, int], Awaitable[list[dict[str, Any]]]]
+    get_one: Callable[
+        [Context, ResourceIdentifier, Sequence[str] | None],
+        Awaitable[dict[str, Any] | None],
+    ]
+    get_batch: Callable[
+        [Context, Sequence[ResourceIdentifier]], Awaitable[list[dict[str, Any]]]
+    ]
+    get_many: Callable[
+        [Context, int, int, Sequence[str] | None, Query],
+        Awaitable[list[dict[str, Any]]],
+    ]
+    get_many_after: Callable[
+        [Context, Mapping[str, Any] | None, int, Sequence[str] | None, Query],
+        Awaitable[list[dict[str, Any]]],
+    ]
+    iterate_many: Callable[
+        [Context, int, int | None, Sequence[str] | None, Query],
+        AsyncIterator[dict[str, Any]],
+    ]
+    iterate_many_after: Callable[
+        [Context, Mapping[str, Any] | None, int | None, Sequence[str] | None, Query],
+        AsyncIterator[dict[str, Any]],
+    ]
     post: Callable[[Context, BaseModel], Awaitable[dict[str, Any]]]
-    patch: Callable[[Context, ResourceIdentifier, BaseModel], Awaitable[dict[str, Any]]]
-    delete: Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any]]]
+    post_batch: Callable[
+        [Context, Sequence[BaseModel]], Awaitable[list[dict[str, Any]]]
+    ]
+    patch: Callable[
+        [Context, ResourceIdentifier, BaseModel], Awaitable[dict[str, Any] | None]
+    ]
+    delete: Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | None]]
 
 
 def get_for_resource(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
 ) -> ResourceRepository:
+    # the time spent in each is counted as the request's database time, and
+    # bounded by its deadline (see deadlines.py). the iterators are read as
+    # the response is streamed, & bounded there
+    def timed(function: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        return metrics.measure_async("db")(deadlines.bound(function))
+
+    def timed_write(function: Callable[P, Awaitable[R]]) -> Callable[P, Awaitable[R]]:
+        return metrics.measure_async("db")(deadlines.checked(function))
+
     return {
-        "get_one": create_get_one_function(resource_def, model_cls),
-        "get_many": create_get_many_function(resource_def, model_cls),
-        "post": create_post_function(resource_def, model_cls),
-        "patch": create_patch_function(resource_def, model_cls),
-        "delete": create_delete_function(resource_def, model_cls),
+        "get_one": timed(create_get_one_function(resource_def, model_cls)),
+        "get_batch": timed(create_get_batch_function(resource_def, model_cls)),
+        "get_many": timed(create_get_many_function(resource_def, model_cls)),
+        "get_many_after": timed(
+            create_get_many_after_function(resource_def, model_cls)
+        ),
+        "iterate_many": metrics.measure_iteration("db")(
+            create_iterate_many_function(resource_def, model_cls)
+        ),
+        "iterate_many_after": metrics.measure_iteration("db")(
+            create_iterate_many_after_function(resource_def, model_cls)
+        ),
+        "post": timed_write(create_post_function(resource_def, model_cls)),
+        "post_batch": timed_write(create_post_batch_function(resource_def, model_cls)),
+        "patch": timed_write(create_patch_function(resource_def, model_cls)),
+        "delete": timed_write(create_delete_function(resource_def, model_cls)),
     }
 
 
+def _supports_returning(database: databases.Database) -> bool:
+    return database.url.dialect in _RETURNING_DIALECTS
+
+
+@contextlib.asynccontextmanager
+async def _read_connection(
+    database: databases.Database,
+) -> AsyncIterator[databases.core.Connection]:
+    # a read cancelled mid-statement (e.g. at its request's deadline) leaves
+    # its connection with the statement still running, or its rows unread;
+    # the connection is closed, rather than handed on to the next read
+    async with database.connection() as connection:
+        try:
+            yield connection
+        except asyncio.CancelledError:
+            match database.url.dialect:
+                case "postgresql":
+                    connection.raw_connection.terminate()
+                case "mysql":
+                    connection.raw_connection.close()
+                # (sqlite's connections aren't pooled; each is closed anyway)
+
+            raise
+
+
 def _get_resource_read_params(model_cls: type[BaseModel]) -> list[str]:
     # TODO: make a way to have a model field private?
     return list(model_cls.__fields__.keys())
@@ -45,157 +140,519 @@ def _get_resource_write_params(model_cls: type[BaseModel]) -> list[str]:
     return list(model_cls.__fields__.keys())
 
 
+def get_resource_pagination_params(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> list[str]:
+    # the columns a keyset page is ordered by; "id" is always included
+    # last as a tiebreaker so that the ordering is total.
+    key = resource_def.get("pagination_key", "id")
+    if key not in model_cls.__fields__:
+        raise ValueError(f"Unknown pagination key: {key}")
+
+    return [key] if key == "id" else [key, "id"]
+
+
+def _compile_filters(filter_keys: Sequence[str]) -> list[str]:
+    return [f"{k} = :filter_{k}" for k in filter_keys]
+
+
+def _get_filter_params(query: Query) -> dict[str, Any]:
+    return {f"filter_{k}": v for k, v in query.filters}
+
+
+def _compile_where(conditions: Sequence[str]) -> str:
+    return f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+
+def _compile_order_by(sort: Sort | None) -> str:
+    if sort is None:
+        return ""
+
+    # "id" breaks ties, so that records don't move between pages
+    direction = "DESC" if sort.descending else "ASC"
+    if sort.field == "id":
+        return f"ORDER BY id {direction}"
+
+    return f"ORDER BY {sort.field} {direction}, id {direction}"
+
+
 def create_get_one_function(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
-) -> Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | None]]:
+) -> Callable[
+    [Context, ResourceIdentifier, Sequence[str] | None],
+    Awaitable[dict[str, Any] | None],
+]:
     read_params = _get_resource_read_params(model_cls)
 
-    query = f"""\
-        SELECT {", ".join(read_params)}
-          FROM {resource_def["table_name"]}
-         WHERE id = :id
-    """
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def get_query(fields: tuple[str, ...]) -> Statement:
+        sql = f"""\
+            SELECT {", ".join(fields)}
+              FROM {resource_def["table_name"]}
+             WHERE id = :id
+        """
+        return Statement(sql, f"{resource_def['name']}.get_one")
 
     async def get_one(
         ctx: Context,
         id: ResourceIdentifier,
+        fields: Sequence[str] | None,
     ) -> dict[str, Any] | None:
+        database = ctx.get_database_client(
+            resource_def["backing_service"], read_only=True
+        )
+        query = get_query(tuple(fields or read_params))
         params = {
             "id": id,
         }
-        rec = await ctx.database_client.fetch_one(query, params)
+        async with _read_connection(database) as connection:
+            rec = await connection.fetch_one(query.bind(params))
+
         return dict(rec._mapping) if rec is not None else None
 
     return get_one
 
 
+def create_get_batch_function(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> Callable[[Context, Sequence[ResourceIdentifier]], Awaitable[list[dict[str, Any]]]]:
+    read_params = _get_resource_read_params(model_cls)
+
+    # batch size -> query; batch sizes are bounded by the usecase
+    queries: dict[int, Statement] = {}
+
+    def get_query(size: int) -> Statement:
+        query = queries.get(size)
+        if query is None:
+            sql = f"""\
+                SELECT {", ".join(read_params)}
+                  FROM {resource_def["table_name"]}
+                 WHERE id IN ({", ".join(f":id_{i}" for i in range(size))})
+            """
+            query = Statement(sql, f"{resource_def['name']}.get_batch")
+            queries[size] = query
+        return query
+
+    async def get_batch(
+        ctx: Context,
+        ids: Sequence[ResourceIdentifier],
+    ) -> list[dict[str, Any]]:
+        database = ctx.get_database_client(
+            resource_def["backing_service"], read_only=True
+        )
+        if not ids:
+            return []
+
+        params = {f"id_{i}": id for i, id in enumerate(ids)}
+        async with _read_connection(database) as connection:
+            recs = await connection.fetch_all(get_query(len(ids)).bind(params))
+
+        return [dict(rec._mapping) for rec in recs]
+
+    return get_batch
+
+
 def create_get_many_function(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
-) -> Callable[[Context, int, int], Awaitable[list[dict[str, Any]]]]:
+) -> Callable[
+    [Context, int, int, Sequence[str] | None, Query], Awaitable[list[dict[str, Any]]]
+]:
     read_params = _get_resource_read_params(model_cls)
 
-    query = f"""\
-        SELECT {", ".join(read_params)}
-          FROM {resource_def["table_name"]}
-         LIMIT :limit
-        OFFSET :offset
-    """
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def get_query(
+        fields: tuple[str, ...], filter_keys: tuple[str, ...], sort: Sort | None
+    ) -> Statement:
+        sql = f"""\
+            SELECT {", ".join(fields)}
+              FROM {resource_def["table_name"]}
+             {_compile_where(_compile_filters(filter_keys))}
+             {_compile_order_by(sort)}
+             LIMIT :limit
+            OFFSET :offset
+        """
+        return Statement(sql, f"{resource_def['name']}.get_many")
 
     async def get_many(
         ctx: Context,
         page: int,
         page_size: int,
+        fields: Sequence[str] | None,
+        query: Query,
     ) -> list[dict[str, Any]]:
+        database = ctx.get_database_client(
+            resource_def["backing_service"], read_only=True
+        )
+        statement = get_query(
+            tuple(fields or read_params), query.filter_keys, query.sort
+        )
         params = {
             "limit": page_size,
             "offset": (page - 1) * page_size,
+            **_get_filter_params(query),
         }
-        recs = await ctx.database_client.fetch_all(query, params)
+        async with _read_connection(database) as connection:
+            recs = await connection.fetch_all(statement.bind(params))
+
         return [dict(rec._mapping) for rec in recs]
 
     return get_many
 
 
+def create_get_many_after_function(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> Callable[
+    [Context, Mapping[str, Any] | None, int, Sequence[str] | None, Query],
+    Awaitable[list[dict[str, Any]]],
+]:
+    read_params = _get_resource_read_params(model_cls)
+    key_params = get_resource_pagination_params(resource_def, model_cls)
+
+    key = key_params[0]
+    if key == "id":
+        after_clause = "id > :id"
+    else:
+        # (key, id) > (:key, :id), expanded so that mysql can use the key's index
+        after_clause = f"{key} > :{key} OR ({key} = :{key} AND id > :id)"
+
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def get_query(
+        fields: tuple[str, ...], filter_keys: tuple[str, ...], first_page: bool
+    ) -> Statement:
+        # the sort key is always selected; it's needed for the next cursor
+        columns = [k for k in read_params if k in fields or k in key_params]
+        conditions = _compile_filters(filter_keys)
+        if not first_page:
+            conditions.append(f"({after_clause})")
+
+        sql = f"""\
+            SELECT {", ".join(columns)}
+              FROM {resource_def["table_name"]}
+             {_compile_where(conditions)}
+          ORDER BY {", ".join(key_params)}
+             LIMIT :limit
+        """
+        return Statement(sql, f"{resource_def['name']}.get_many_after")
+
+    async def get_many_after(
+        ctx: Context,
+        after: Mapping[str, Any] | None,
+        page_size: int,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> list[dict[str, Any]]:
+        database = ctx.get_database_client(
+            resource_def["backing_service"], read_only=True
+        )
+        statement = get_query(
+            tuple(fields or read_params),
+            query.filter_keys,
+            first_page=after is None,
+        )
+        params: dict[str, Any] = {
+            "limit": page_size,
+            **_get_filter_params(query),
+        }
+        if after is not None:
+            params |= {k: after[k] for k in key_params}
+
+        async with _read_connection(database) as connection:
+            recs = await connection.fetch_all(statement.bind(params))
+
+        return [dict(rec._mapping) for rec in recs]
+
+    return get_many_after
+
+
+def create_iterate_many_function(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> Callable[
+    [Context, int, int | None, Sequence[str] | None, Query],
+    AsyncIterator[dict[str, Any]],
+]:
+    read_params = _get_resource_read_params(model_cls)
+
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def get_query(
+        fields: tuple[str, ...],
+        filter_keys: tuple[str, ...],
+        sort: Sort | None,
+        paged: bool,
+    ) -> Statement:
+        sql = f"""\
+            SELECT {", ".join(fields)}
+              FROM {resource_def["table_name"]}
+             {_compile_where(_compile_filters(filter_keys))}
+             {_compile_order_by(sort)}
+             {"LIMIT :limit OFFSET :offset" if paged else ""}
+        """
+        return Statement(sql, f"{resource_def['name']}.iterate_many")
+
+    async def iterate_many(
+        ctx: Context,
+        page: int,
+        page_size: int | None,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> AsyncIterator[dict[str, Any]]:
+        database = ctx.get_database_client(
+            resource_def["backing_service"], read_only=True
+        )
+        statement = get_query(
+            tuple(fields or read_params),
+            query.filter_keys,
+            query.sort,
+            paged=page_size is not None,
+        )
+        params = _get_filter_params(query)
+        if page_size is not None:
+            params |= {
+                "limit": page_size,
+                "offset": (page - 1) * page_size,
+            }
+
+        async with _read_connection(database) as connection:
+            async for rec in connection.iterate(statement.bind(params)):
+                yield dict(rec._mapping)
+
+    return iterate_many
+
+
+def create_iterate_many_after_function(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> Callable[
+    [Context, Mapping[str, Any] | None, int | None, Sequence[str] | None, Query],
+    AsyncIterator[dict[str, Any]],
+]:
+    get_many_after = create_get_many_after_function(resource_def, model_cls)
+    key_params = get_resource_pagination_params(resource_def, model_cls)
+
+    # walks the table in keyset-ordered chunks rather than through a single
+    # cursor; some drivers (e.g. aiomysql) buffer a cursor's entire result
+    # client-side, and this way no connection is held while the client reads.
+    async def iterate_many_after(
+        ctx: Context,
+        after: Mapping[str, Any] | None,
+        limit: int | None,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> AsyncIterator[dict[str, Any]]:
+        remaining = limit
+        while remaining is None or remaining > 0:
+            chunk_size = ITERATION_CHUNK_SIZE
+            if remaining is not None:
+                chunk_size = min(chunk_size, remaining)
+                remaining -= chunk_size
+
+            recs = await get_many_after(ctx, after, chunk_size, fields, query)
+            for rec in recs:
+                yield rec
+
+            if len(recs) < chunk_size:
+                break
+
+            after = {k: recs[-1][k] for k in key_params}
+
+    return iterate_many_after
+
+
 def create_post_function(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
 ) -> Callable[[Context, BaseModel], Awaitable[dict[str, Any]]]:
     write_params = _get_resource_write_params(model_cls)
     read_params = _get_resource_read_params(model_cls)
 
-    query = f"""\
-        INSERT INTO {resource_def["name"]} ({", ".join(write_params)})
+    sql = f"""\
+        INSERT INTO {resource_def["table_name"]} ({", ".join(write_params)})
              VALUES ({", ".join(f":{k}" for k in write_params)})
     """
 
-    read_query = f"""\
-        SELECT {", ".join(read_params)}
-          FROM {resource_def["table_name"]}
-         WHERE id = :id
+    returning_sql = f"""\
+        {sql.strip()}
+          RETURNING {", ".join(read_params)}
     """
 
+    query = Statement(sql, f"{resource_def['name']}.post")
+    returning_query = Statement(returning_sql, f"{resource_def['name']}.post")
+
     async def post(
         ctx: Context,
         data: BaseModel,
     ) -> dict[str, Any]:
+        database = ctx.get_database_client(resource_def["backing_service"])
         params = data.dict()
-        id = await ctx.database_client.execute(query, params)
-        assert id is not None
 
-        params = {
-            "id": id,
-        }
-        rec = await ctx.database_client.fetch_one(read_query, params)
-        assert rec is not None
-        return dict(rec._mapping)
+        if _supports_returning(database):
+            rec = await database.fetch_one(returning_query.bind(params))
+            assert rec is not None
+            return dict(rec._mapping)
+
+        # every column was written from the validated model, so the
+        # record we just inserted is exactly what we already have.
+        await database.execute(query.bind(params))
+        return {k: params[k] for k in read_params}
 
     return post
 
 
-def create_patch_function(
+def create_post_batch_function(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
-) -> Callable[[Context, ResourceIdentifier, BaseModel], Awaitable[dict[str, Any]]]:
+) -> Callable[[Context, Sequence[BaseModel]], Awaitable[list[dict[str, Any]]]]:
     write_params = _get_resource_write_params(model_cls)
     read_params = _get_resource_read_params(model_cls)
 
-    query = f"""\
-        UPDATE {resource_def["table_name"]}
-           SET {", ".join(f"{k} = :{k}" for k in write_params)}
-         WHERE id = :id
-    """
+    # (batch size, returning) -> query; batch sizes are bounded by the usecase
+    queries: dict[tuple[int, bool], Statement] = {}
+
+    def get_query(size: int, returning: bool) -> Statement:
+        query = queries.get((size, returning))
+        if query is None:
+            values = ", ".join(
+                f"({', '.join(f':{k}_{i}' for k in write_params)})" for i in range(size)
+            )
+            sql = f"""\
+                INSERT INTO {resource_def["table_name"]} ({", ".join(write_params)})
+                     VALUES {values}
+            """
+            if returning:
+                sql += f"RETURNING {', '.join(read_params)}"
+
+            query = Statement(sql, f"{resource_def['name']}.post_batch")
+            queries[(size, returning)] = query
+        return query
+
+    async def post_batch(
+        ctx: Context,
+        data: Sequence[BaseModel],
+    ) -> list[dict[str, Any]]:
+        database = ctx.get_database_client(resource_def["backing_service"])
+        if not data:
+            return []
+
+        rows = [obj.dict() for obj in data]
+        params = {f"{k}_{i}": v for i, row in enumerate(rows) for k, v in row.items()}
+
+        if _supports_returning(database):
+            query = get_query(len(rows), returning=True)
+            recs = await database.fetch_all(query.bind(params))
+            return [dict(rec._mapping) for rec in recs]
+
+        # every column was written from the validated models, so the
+        # records we just inserted are exactly what we already have.
+        query = get_query(len(rows), returning=False)
+        await database.execute(query.bind(params))
+        return [{k: row[k] for k in read_params} for row in rows]
+
+    return post_batch
 
-    read_query = f"""\
+
+def create_patch_function(
+    resource_def: Mapping[str, Any], model_cls: type[BaseModel]
+) -> Callable[
+    [Context, ResourceIdentifier, BaseModel], Awaitable[dict[str, Any] | None]
+]:
+    write_params = _get_resource_write_params(model_cls)
+    read_params = _get_resource_read_params(model_cls)
+
+    read_sql = f"""\
         SELECT {", ".join(read_params)}
           FROM {resource_def["table_name"]}
          WHERE id = :id
     """
 
+    read_query = Statement(read_sql, f"{resource_def['name']}.patch")
+
+    # (fields written, returning) -> query; only the fields given are written
+    @functools.lru_cache(maxsize=QUERY_CACHE_SIZE)
+    def get_query(fields: tuple[str, ...], returning: bool) -> Statement:
+        sql = f"""\
+            UPDATE {resource_def["table_name"]}
+               SET {", ".join(f"{k} = :{k}" for k in fields)}
+             WHERE id = :id
+        """
+        if returning:
+            sql += f"RETURNING {', '.join(read_params)}"
+
+        return Statement(sql, f"{resource_def['name']}.patch")
+
     async def patch(
         ctx: Context,
         id: ResourceIdentifier,
         data: BaseModel,
-    ) -> dict[str, Any]:
-        params = data.dict()
+    ) -> dict[str, Any] | None:
+        database = ctx.get_database_client(resource_def["backing_service"])
+        params = data.dict(exclude_unset=True)
+        fields = tuple(k for k in write_params if k in params and k != "id")
         params["id"] = id
-        await ctx.database_client.execute(query, params)
 
-        params = {
-            "id": id,
-        }
-        rec = await ctx.database_client.fetch_one(read_query, params)
-        assert rec is not None
-        return dict(rec._mapping)
+        if not fields:
+            rec = await database.fetch_one(read_query.bind(params))
+            return dict(rec._mapping) if rec is not None else None
+
+        if _supports_returning(database):
+            query = get_query(fields, returning=True)
+            rec = await database.fetch_one(query.bind(params))
+            return dict(rec._mapping) if rec is not None else None
+
+        # the rest of the record wasn't written, so it has to be read back;
+        # within the update's transaction, so that it's what was written.
+        async with database.transaction():
+            await database.execute(get_query(fields, returning=False).bind(params))
+            rec = await database.fetch_one(read_query.bind(params))
+
+        return dict(rec._mapping) if rec is not None else None
 
     return patch
 
 
 def create_delete_function(
     resource_def: Mapping[str, Any], model_cls: type[BaseModel]
-) -> Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any]]]:
+) -> Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | None]]:
     read_params = _get_resource_read_params(model_cls)
 
-    query = f"""\
+    sql = f"""\
         DELETE FROM {resource_def["table_name"]}
               WHERE id = :id
     """
 
-    read_query = f"""\
+    returning_sql = f"""\
+        {sql.strip()}
+          RETURNING {", ".join(read_params)}
+    """
+
+    read_sql = f"""\
         SELECT {", ".join(read_params)}
           FROM {resource_def["table_name"]}
          WHERE id = :id
+           FOR UPDATE
     """
 
+    query = Statement(sql, f"{resource_def['name']}.delete")
+    returning_query = Statement(returning_sql, f"{resource_def['name']}.delete")
+    read_query = Statement(read_sql, f"{resource_def['name']}.delete")
+
     async def delete(
         ctx: Context,
         id: ResourceIdentifier,
-    ) -> dict[str, Any]:
+    ) -> dict[str, Any] | None:
+        database = ctx.get_database_client(resource_def["backing_service"])
         params = {
             "id": id,
         }
-        rec = await ctx.database_client.fetch_one(read_query, params)
-        assert rec is not None
-        data = dict(rec._mapping)
 
-        await ctx.database_client.execute(query, params)
-        return data
+        if _supports_returning(database):
+            rec = await database.fetch_one(returning_query.bind(params))
+            return dict(rec._mapping) if rec is not None else None
+
+        # without RETURNING, we need to read the record before deleting it;
+        # lock it so that what we return is what we actually deleted.
+        async with database.transaction():
+            rec = await database.fetch_one(read_query.bind(params))
+            if rec is None:
+                return None
+
+            await database.execute(query.bind(params))
+
+        return dict(rec._mapping)
 
     return delete
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import asyncio
+import weakref
+from collections.abc import Mapping
+from typing import Any
+
+from noapi.batching import Batcher
+from noapi.context import Context
+from noapi.models import BaseModel
+from noapi.repositories.sql import DEFAULT_MAX_BATCH_SIZE
+from noapi.repositories.sql import ResourceRepository
+
+# merges concurrent post calls into a single post_batch call; one multi-row
+# INSERT (& one commit) rather than one per record, with each caller still
+# receiving only its own record, or error.
+
+# resource name -> the live batchers for it; one per app serving the resource.
+# only for the stats, which (as every other metric) are per process.
+_BATCHERS: dict[str, weakref.WeakSet[Batcher[BaseModel, Any]]] = {}
+
+# resource name -> batches which failed, & were retried a record at a time
+_FALLBACKS: dict[str, int] = {}
+
+
+def create_batcher(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> Batcher[BaseModel, dict[str, Any]]:
+    resource_name = resource_def["name"]
+    batch_def = resource_def["write_batching"]
+
+    async def insert(
+        ctx: Context, objs: list[BaseModel]
+    ) -> list[dict[str, Any] | Exception]:
+        try:
+            data = await repository["post_batch"](ctx, objs)
+        except Exception:
+            if len(objs) == 1:
+                raise
+
+            # a single bad record (e.g. a duplicate id) fails the whole
+            # statement; insert each on its own, so that it fails alone
+            _FALLBACKS[resource_name] = _FALLBACKS.get(resource_name, 0) + 1
+            return await asyncio.gather(
+                *(repository["post"](ctx, obj) for obj in objs),
+                return_exceptions=True,
+            )
+
+        # the order of RETURNING rows isn't guaranteed (e.g. by sqlite)
+        recs = {str(rec["id"]): rec for rec in data}
+        return [recs[str(obj.id)] for obj in objs]  # type: ignore[attr-defined]
+
+    batcher: Batcher[BaseModel, dict[str, Any]] = Batcher(
+        insert,
+        window=batch_def.get("window_ms", 0) / 1000,
+        max_batch_size=batch_def.get(
+            "max_batch_size",
+            resource_def.get("max_batch_size", DEFAULT_MAX_BATCH_SIZE),
+        ),
+    )
+    _BATCHERS.setdefault(resource_name, weakref.WeakSet()).add(batcher)
+    return batcher
+
+
+def get_write_batching_stats() -> dict[str, dict[str, Any]]:
+    stats = {}
+    for resource_name, batchers in _BATCHERS.items():
+        if batchers:
+            histograms = [batcher.batch_sizes for batcher in batchers]
+            stats[resource_name] = {
+                "buckets": histograms[0].buckets,
+                "counts": [
+                    sum(counts) for counts in zip(*(h.counts for h in histograms))
+                ],
+                "sum": sum(h.sum for h in histograms),
+                "count": sum(h.count for h in histograms),
+                "fallbacks": _FALLBACKS.get(resource_name, 0),
+            }
+
+    return stats
+
+
+def wrap_resource_repository(
+    resource_def: Mapping[str, Any], repository: ResourceRepository
+) -> ResourceRepository:
+    # shared by every usecase of the resource (within this app); each app
+    # writes through its own repository, so must batch with its own batcher.
+    batcher = create_batcher(resource_def, repository)
+
+    async def post(ctx: Context, data: BaseModel) -> dict[str, Any]:
+        # the batch is written with the first caller's context; every
+        # caller's reads must still see its write, as if it made it itself
+        ctx.mark_written(resource_def["backing_service"])
+
+        # not given up on at the deadline, once written (see deadlines.py);
+        # the batcher leaves it out if the deadline passes before then
+        return await batcher.submit(ctx, data)
+
+    return {
+        **repository,
+        "post": post,
+    }
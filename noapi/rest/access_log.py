@@ -0,0 +1,65 @@
+import functools
+import math
+import random
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Mapping
+from typing import Any
+from typing import ParamSpec
+
+import fastapi
+
+import noapi.logger as logger
+
+P = ParamSpec("P")
+
+# a log line per request (or per sampled request, for busy resources), which
+# is written from the logging thread rather than by uvicorn on the event loop.
+# failures & slow requests are always logged, whatever the sample rate.
+
+
+def add_access_log(
+    resource_def: Mapping[str, Any],
+    method: str,
+    access_log_def: Mapping[str, Any],
+    function: Callable[P, Awaitable[fastapi.Response]],
+) -> Callable[P, Awaitable[fastapi.Response]]:
+    sample_rate = resource_def.get(
+        "access_log_sample_rate", access_log_def.get("sample_rate", 1.0)
+    )
+    slow_request_seconds = access_log_def.get("slow_request_ms", math.inf) / 1000
+
+    @functools.wraps(function)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> fastapi.Response:
+        started_at = time.perf_counter()
+        status_code: int | None = None
+        try:
+            response = await function(*args, **kwargs)
+            status_code = response.status_code
+            return response
+        except Exception:
+            # answered with a 500, once it's been raised to the server
+            status_code = fastapi.status.HTTP_500_INTERNAL_SERVER_ERROR
+            raise
+        finally:
+            elapsed = time.perf_counter() - started_at
+
+            # (unless it was cancelled, e.g. as its client left; there was
+            # no one to answer)
+            if status_code is not None and (
+                status_code >= 500
+                or elapsed >= slow_request_seconds
+                or random.random() < sample_rate
+            ):
+                logger.info(
+                    "Served request",
+                    resource=resource_def["name"],
+                    method=method,
+                    status_code=status_code,
+                    duration_ms=round(elapsed * 1000, 3),
+                    # each line stands for 1 / sample_rate requests
+                    sample_rate=sample_rate,
+                )
+
+    return wrapper
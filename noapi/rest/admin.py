@@ -0,0 +1,70 @@
+import hmac
+from collections.abc import Awaitable
+from collections.abc import Callable
+
+import fastapi
+from fastapi.routing import APIRoute
+
+import noapi.rest.responses as responses
+from noapi import profiling
+from noapi.controllers import determine_http_code
+from noapi.errors import ServiceError
+
+# operational endpoints; only served when the specification sets an admin
+# token, and only to requests bearing it.
+
+PROFILE_PATH = "/admin/profile"
+
+
+def _create_authorizer(admin_token: str) -> Callable[[fastapi.Request], bool]:
+    expected = f"Bearer {admin_token}".encode()
+
+    def is_authorized(request: fastapi.Request) -> bool:
+        authorization = request.headers.get("authorization", "")
+        return hmac.compare_digest(authorization.encode(), expected)
+
+    return is_authorized
+
+
+def create_profile_function(
+    admin_token: str,
+) -> Callable[[fastapi.Request], Awaitable[fastapi.Response]]:
+    is_authorized = _create_authorizer(admin_token)
+
+    async def function(
+        request: fastapi.Request,
+        seconds: float = fastapi.Query(5, gt=0, le=profiling.MAX_CAPTURE_SECONDS),
+        limit: int = fastapi.Query(50, gt=0),
+    ) -> fastapi.Response:
+        if not is_authorized(request):
+            return responses.failure(
+                error=ServiceError.ADMIN_UNAUTHORIZED,
+                message="Missing or invalid admin token",
+                status_code=determine_http_code(ServiceError.ADMIN_UNAUTHORIZED),
+            )
+
+        data = await profiling.capture(seconds, limit)
+        if isinstance(data, ServiceError):
+            return responses.failure(
+                error=data,
+                message="Failed to capture profile",
+                status_code=determine_http_code(data),
+            )
+
+        return responses.success(
+            data=data,
+            status_code=fastapi.status.HTTP_200_OK,
+        )
+
+    return function
+
+
+def create_routes(admin_token: str) -> list[APIRoute]:
+    return [
+        APIRoute(
+            path=PROFILE_PATH,
+            endpoint=create_profile_function(admin_token),
+            methods=["GET"],
+            include_in_schema=False,
+        ),
+    ]
@@ -0,0 +1,203 @@
+import asyncio
+import collections
+import functools
+import weakref
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Mapping
+from typing import Any
+from typing import ParamSpec
+
+import fastapi
+
+from noapi.controllers import determine_http_code
+from noapi.errors import ServiceError
+from noapi.rest import responses
+
+P = ParamSpec("P")
+
+# bounds the requests each resource (and each of its methods) works on at
+# once, so that a spike is turned away at the door with a 503, rather than
+# queueing on the database pool until every client has timed out.
+#
+# the limits are per-app (and so per-process); each worker admits its own share.
+
+DEFAULT_MAX_QUEUED = 0
+DEFAULT_QUEUE_TIMEOUT_MS = 1000
+DEFAULT_RETRY_AFTER = 1  # seconds
+
+
+class Limiter:
+    def __init__(
+        self, max_concurrent: int, max_queued: int, queue_timeout_seconds: float
+    ) -> None:
+        self.max_concurrent = max_concurrent
+        self.max_queued = max_queued
+        self.queue_timeout_seconds = queue_timeout_seconds
+
+        self.active = 0
+        # first come, first served; a released slot is handed to the oldest
+        self._waiters: collections.deque[asyncio.Future[None]] = collections.deque()
+
+        self.admitted = 0
+        self.rejected_queue_full = 0
+        self.rejected_queue_timeout = 0
+
+    @property
+    def queued(self) -> int:
+        return len(self._waiters)
+
+    async def acquire(self) -> bool:
+        if self.active < self.max_concurrent and not self._waiters:
+            self.active += 1
+            self.admitted += 1
+            return True
+
+        if len(self._waiters) >= self.max_queued:
+            self.rejected_queue_full += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, self.queue_timeout_seconds)
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # handed a slot just as it gave up; pass it on
+                self.release()
+            elif waiter in self._waiters:
+                # (a release may already have dropped it, cancelled)
+                self._waiters.remove(waiter)
+
+            # (not the builtin TimeoutError before python 3.11)
+            if isinstance(e, asyncio.TimeoutError):
+                self.rejected_queue_timeout += 1
+                return False
+
+            raise
+
+        self.admitted += 1
+        return True
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # the slot changes hands, so active stays as it is
+                waiter.set_result(None)
+                return
+
+        self.active -= 1
+
+
+# "Account" (shared by its methods) or "Account.get_one" -> the live limiters
+# for it; one per app serving the resource. only for the stats, which (as
+# every other metric) are per process.
+_LIMITERS: dict[str, weakref.WeakSet[Limiter]] = {}
+
+
+def get_admission_stats() -> dict[str, dict[str, int]]:
+    stats = {}
+    for name, limiters in _LIMITERS.items():
+        if limiters:
+            stats[name] = {
+                stat: sum(getattr(limiter, stat) for limiter in limiters)
+                for stat in (
+                    "active",
+                    "queued",
+                    "admitted",
+                    "rejected_queue_full",
+                    "rejected_queue_timeout",
+                )
+            }
+
+    return stats
+
+
+def _get_limiter(
+    name: str, limit_def: Mapping[str, Any], limiters: dict[str, Limiter]
+) -> Limiter:
+    # every method of a resource shares the resource's limiter
+    limiter = limiters.get(name)
+    if limiter is None:
+        limiter = Limiter(
+            max_concurrent=limit_def["max_concurrent"],
+            max_queued=limit_def.get("max_queued", DEFAULT_MAX_QUEUED),
+            queue_timeout_seconds=limit_def.get(
+                "queue_timeout_ms", DEFAULT_QUEUE_TIMEOUT_MS
+            )
+            / 1000,
+        )
+        limiters[name] = limiter
+        _LIMITERS.setdefault(name, weakref.WeakSet()).add(limiter)
+
+    return limiter
+
+
+def overloaded(retry_after: int) -> fastapi.Response:
+    error = ServiceError.SERVER_OVERLOADED
+    return responses.failure(
+        error,
+        "Too many concurrent requests; try again later",
+        status_code=determine_http_code(error),
+        headers={"retry-after": str(retry_after)},
+    )
+
+
+def add_admission_control(
+    resource_def: Mapping[str, Any],
+    method: str,
+    function: Callable[P, Awaitable[fastapi.Response]],
+    limiters: dict[str, Limiter] | None = None,
+) -> Callable[P, Awaitable[fastapi.Response]]:
+    # the app's limiters, by name; shared by the endpoints of each resource
+    if limiters is None:
+        limiters = {}
+
+    resource_name = resource_def["name"]
+
+    # the method's own limit is taken first, then the resource's
+    limits: list[tuple[Limiter, int]] = []
+    for name, limit_def in (
+        (
+            f"{resource_name}.{method}",
+            resource_def.get("method_concurrency_limits", {}).get(method),
+        ),
+        (resource_name, resource_def.get("concurrency_limit")),
+    ):
+        if limit_def is not None:
+            limits.append(
+                (
+                    _get_limiter(name, limit_def, limiters),
+                    limit_def.get("retry_after", DEFAULT_RETRY_AFTER),
+                )
+            )
+
+    if not limits:
+        return function
+
+    @functools.wraps(function)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> fastapi.Response:
+        acquired: list[Limiter] = []
+
+        def release() -> None:
+            for limiter in reversed(acquired):
+                limiter.release()
+
+        streaming = False
+        try:
+            for limiter, retry_after in limits:
+                if not await limiter.acquire():
+                    return overloaded(retry_after)
+
+                acquired.append(limiter)
+
+            response = await function(*args, **kwargs)
+            # a streamed body holds its slots until it has been read
+            streaming = responses.finish_after_body(response, release)
+            return response
+        finally:
+            if not streaming:
+                release()
+
+    return wrapper
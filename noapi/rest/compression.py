@@ -0,0 +1,227 @@
+import functools
+import gzip
+import hashlib
+import math
+from collections.abc import Callable
+from collections.abc import Mapping
+from typing import Any
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+from noapi.repositories.memory import LRUCache
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover
+    zstandard = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+# compresses response bodies for clients which accept it. bodies with an
+# etag are those which are served again unchanged, so their compressed
+# forms are kept, and hot records & pages are only compressed once.
+
+DEFAULT_MIN_SIZE = 1024  # bytes; smaller bodies aren't worth the cpu
+DEFAULT_CACHE_ENTRIES = 256
+
+DEFAULT_LEVELS = {
+    "zstd": 3,
+    "br": 4,
+    "gzip": 6,
+}
+
+COMPRESSIBLE_MEDIA_TYPES = ("application/json", "application/x-ndjson")
+
+
+def get_available_encodings() -> list[str]:
+    # in order of preference
+    encodings = []
+    if zstandard is not None:
+        encodings.append("zstd")
+    if brotli is not None:
+        encodings.append("br")
+    encodings.append("gzip")
+    return encodings
+
+
+def create_encoder(encoding: str, level: int) -> Callable[[bytes], bytes]:
+    match encoding:
+        case "zstd":
+            compressor = zstandard.ZstdCompressor(level=level)
+            return compressor.compress
+        case "br":
+            return functools.partial(brotli.compress, quality=level)
+        case "gzip":
+            # without a timestamp, so that equal bodies compress equally
+            return functools.partial(gzip.compress, compresslevel=level, mtime=0)
+        case _:
+            raise ValueError(f"Unknown encoding: {encoding}")
+
+
+@functools.lru_cache(maxsize=256)
+def _parse_accept_encoding(accept_encoding: str) -> frozenset[str]:
+    # "gzip, br;q=0.5, zstd;q=0"; any non-zero quality will do
+    accepted = set()
+    for part in accept_encoding.split(","):
+        encoding, _, params = part.partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                continue
+
+        if quality > 0:
+            accepted.add(encoding.strip().lower())
+
+    return frozenset(accepted)
+
+
+class CompressionStats:
+    def __init__(self) -> None:
+        self.responses = 0
+        self.raw_bytes = 0
+        self.compressed_bytes = 0
+
+
+# encoding -> stats
+_STATS: dict[str, CompressionStats] = {}
+
+
+def get_compression_stats() -> dict[str, dict[str, int]]:
+    return {
+        encoding: {
+            "responses": stats.responses,
+            "raw_bytes": stats.raw_bytes,
+            "compressed_bytes": stats.compressed_bytes,
+        }
+        for encoding, stats in _STATS.items()
+    }
+
+
+class CompressionMiddleware:
+    def __init__(self, app: ASGIApp, compression_def: Mapping[str, Any]) -> None:
+        self.app = app
+        self.min_size = compression_def.get("min_size", DEFAULT_MIN_SIZE)
+
+        encodings = compression_def.get("encodings", get_available_encodings())
+        levels = DEFAULT_LEVELS | compression_def.get("levels", {})
+        self.encoders = {
+            encoding: create_encoder(encoding, levels[encoding])
+            for encoding in encodings
+        }
+
+        # (path, query string, body digest, encoding) -> compressed body; a
+        # digest of the bytes themselves never goes stale
+        self.cache = LRUCache(
+            max_entries=compression_def.get("cache_entries", DEFAULT_CACHE_ENTRIES),
+            ttl_seconds=math.inf,
+        )
+
+    def _negotiate(self, scope: Scope) -> str | None:
+        accept_encoding = Headers(scope=scope).get("accept-encoding")
+        if not accept_encoding:
+            return None
+
+        accepted = _parse_accept_encoding(accept_encoding)
+        for encoding in self.encoders:
+            if encoding in accepted or "*" in accepted:
+                return encoding
+
+        return None
+
+    def _should_compress(self, headers: MutableHeaders, body: bytes) -> bool:
+        if len(body) < self.min_size or "content-encoding" in headers:
+            return False
+
+        return headers.get("content-type", "").startswith(COMPRESSIBLE_MEDIA_TYPES)
+
+    def _compress(
+        self, scope: Scope, headers: MutableHeaders, encoding: str, body: bytes
+    ) -> bytes:
+        etag = headers.get("etag")
+        if etag is None:
+            compressed = self.encoders[encoding](body)
+        else:
+            # a strong etag is a digest of the body; a weak one is of what it
+            # was built from, which may have changed without changing it (e.g.
+            # a write which didn't bump the version), so can't stand in for it
+            if etag.startswith("W/"):
+                digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+            else:
+                digest = etag
+
+            key = (scope["path"], scope["query_string"], digest, encoding)
+            compressed = self.cache.get(key)
+            if compressed is None:
+                compressed = self.encoders[encoding](body)
+                self.cache.set(key, compressed)
+
+        stats = _STATS.get(encoding)
+        if stats is None:
+            stats = CompressionStats()
+            _STATS[encoding] = stats
+
+        stats.responses += 1
+        stats.raw_bytes += len(body)
+        stats.compressed_bytes += len(compressed)
+        return compressed
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._negotiate(scope)
+        start_message: Message | None = None
+
+        async def send_compressed(message: Message) -> None:
+            nonlocal start_message
+
+            # the headers depend on the body; hold them until it's seen
+            if message["type"] == "http.response.start":
+                start_message = message
+                return
+
+            if message["type"] != "http.response.body" or start_message is None:
+                await send(message)
+                return
+
+            start, start_message = start_message, None
+            headers = MutableHeaders(scope=start)
+            headers.add_vary_header("accept-encoding")
+
+            body = message.get("body", b"")
+
+            # streamed bodies are written as they're produced, uncompressed
+            if (
+                encoding is None
+                or message.get("more_body", False)
+                or not self._should_compress(headers, body)
+            ):
+                await send(start)
+                await send(message)
+                return
+
+            compressed = self._compress(scope, headers, encoding, body)
+
+            headers["content-encoding"] = encoding
+            headers["content-length"] = str(len(compressed))
+            if "etag" in headers and not headers["etag"].startswith("W/"):
+                # the same content, but no longer the same bytes
+                headers["etag"] = "W/" + headers["etag"]
+
+            await send(start)
+            await send({"type": "http.response.body", "body": compressed})
+
+        await self.app(scope, receive, send_compressed)
@@ -1,18 +1,103 @@
+import asyncio
+import math
+import time
+
 import databases
 import fastapi
 import httpx
+import redis.asyncio
 
 from noapi import context
+from noapi.rest.responses import Cookie
+from noapi.services.registry import ServiceRegistry
+
+# set on a client once it writes to a service with replicas; holds the time
+# until which its reads go to the primary, so that they include its writes.
+STICKY_COOKIE_PREFIX = "noapi_primary_"
+
+# a client's own timeout for its request, in milliseconds; it may ask for up
+# to the method's max_timeout_ms (e.g. less than the default, if it would give
+# up sooner anyway, so that no work is done for nobody)
+TIMEOUT_HEADER = "x-request-timeout-ms"
 
 
 class RestContext(context.Context):
     def __init__(self, request: fastapi.Request) -> None:
         self._request = request
 
+        # service name -> time until which reads should go to the primary
+        self._primary_until: dict[str, float] = {}
+
+    @property
+    def _services(self) -> ServiceRegistry:
+        return self._request.app.state.services
+
+    def set_deadline(self, timeout_seconds: float, max_timeout_seconds: float) -> None:
+        requested = self._request.headers.get(TIMEOUT_HEADER)
+        if requested is not None:
+            try:
+                requested_seconds = float(requested) / 1000
+            except ValueError:
+                pass
+            else:
+                if requested_seconds > 0:
+                    timeout_seconds = min(requested_seconds, max_timeout_seconds)
+
+        self.deadline = asyncio.get_running_loop().time() + timeout_seconds
+
+    def get_database_client(
+        self, service_name: str, read_only: bool = False
+    ) -> databases.Database:
+        replica_set = self._services.get_sql_service(service_name)
+
+        if not read_only:
+            self.mark_written(service_name)
+            return replica_set.primary
+
+        if self.prefers_primary(service_name):
+            return replica_set.primary
+
+        return replica_set.get_replica()
+
+    def mark_written(self, service_name: str) -> None:
+        replica_set = self._services.get_sql_service(service_name)
+        if replica_set.replicas:
+            sticky_until = time.time() + replica_set.sticky_seconds
+            self._primary_until[service_name] = sticky_until
+
+    def prefers_primary(self, service_name: str) -> bool:
+        if service_name in self._primary_until:
+            return True
+
+        if not self._services.get_sql_service(service_name).replicas:
+            return False
+
+        cookie = self._request.cookies.get(STICKY_COOKIE_PREFIX + service_name)
+        if cookie is None:
+            return False
+
+        try:
+            return float(cookie) > time.time()
+        except ValueError:
+            return False
+
     @property
-    def database_client(self) -> databases.Database:
-        return self._request.app.state.database_client
+    def cookies(self) -> list[Cookie]:
+        # to be set on the response, for the client's following requests
+        return [
+            {
+                "key": STICKY_COOKIE_PREFIX + service_name,
+                "value": f"{sticky_until:.3f}",
+                "max_age": math.ceil(sticky_until - time.time()),
+                "httponly": True,
+                "samesite": "lax",
+            }
+            for service_name, sticky_until in self._primary_until.items()
+        ]
 
     @property
     def http_client(self) -> httpx.AsyncClient:
         return self._request.app.state.http_client
+
+    def get_redis_client(self, service_name: str) -> redis.asyncio.Redis:
+        return self._services.get_redis_client(service_name)
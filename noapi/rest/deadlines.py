@@ -0,0 +1,77 @@
+import functools
+from collections.abc import AsyncIterator
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Mapping
+from typing import Any
+from typing import ParamSpec
+
+import fastapi
+
+import noapi.metrics as metrics
+from noapi import deadlines
+from noapi.controllers import determine_http_code
+from noapi.deadlines import DeadlineExceeded
+from noapi.errors import ServiceError
+from noapi.rest import responses
+from noapi.rest.context import RestContext
+
+P = ParamSpec("P")
+
+# gives each request a deadline, carried on its context down to the
+# repositories, and answers those which miss it with a 504.
+
+
+def deadline_exceeded() -> fastapi.Response:
+    error = ServiceError.DEADLINE_EXCEEDED
+    return responses.failure(
+        error,
+        "The request was not served within its deadline",
+        status_code=determine_http_code(error),
+    )
+
+
+def add_deadline(
+    resource_def: Mapping[str, Any],
+    method: str,
+    function: Callable[P, Awaitable[fastapi.Response]],
+) -> Callable[P, Awaitable[fastapi.Response]]:
+    # a method's own timeout replaces the resource's
+    timeout_def = resource_def.get("method_timeouts", {}).get(
+        method, resource_def.get("timeout")
+    )
+    if timeout_def is None:
+        return function
+
+    timeout_seconds = timeout_def["timeout_ms"] / 1000
+    max_timeout_seconds = (
+        timeout_def.get("max_timeout_ms", timeout_def["timeout_ms"]) / 1000
+    )
+
+    @functools.wraps(function)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> fastapi.Response:
+        # every controller takes its context as "ctx"
+        ctx: RestContext = kwargs["ctx"]
+        ctx.set_deadline(timeout_seconds, max_timeout_seconds)
+
+        try:
+            response = await function(*args, **kwargs)
+        except DeadlineExceeded:
+            return deadline_exceeded()
+
+        if isinstance(response, fastapi.responses.StreamingResponse):
+            response.body_iterator = _bound_body(ctx, response.body_iterator)
+
+        return response
+
+    return wrapper
+
+
+async def _bound_body(ctx: RestContext, body: AsyncIterator[Any]) -> AsyncIterator[Any]:
+    try:
+        async for chunk in deadlines.iterate(ctx, body):
+            yield chunk
+    except DeadlineExceeded:
+        # (the client sees the response cut short)
+        metrics.record_error(ServiceError.DEADLINE_EXCEEDED.value)
+        raise
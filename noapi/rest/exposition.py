@@ -0,0 +1,189 @@
+from collections.abc import Iterator
+from collections.abc import Mapping
+from typing import Any
+
+import fastapi
+from fastapi.routing import APIRoute
+
+import noapi.metrics as metrics
+from noapi import statements
+from noapi.metrics import Histogram
+from noapi.repositories import loader
+from noapi.repositories import memory
+from noapi.repositories import write_batching
+from noapi.rest import admission
+from noapi.rest import compression
+
+# everything noapi measures, in prometheus' text format
+
+# (starlette adds the charset)
+CONTENT_TYPE = "text/plain; version=0.0.4"
+
+
+def _by_resource(
+    stats: Mapping[str, Mapping[str, Any]], stat: str
+) -> dict[tuple[str], Any]:
+    return {(name,): values[stat] for name, values in stats.items()}
+
+
+def _format_cache_metrics() -> Iterator[str]:
+    stats = memory.get_cache_stats()
+
+    yield from metrics.format_gauge(
+        "noapi_cache_entries",
+        "Records held in each resource's in-process cache.",
+        _by_resource(stats, "entries"),
+        ("resource",),
+    )
+    for stat in ("hits", "misses", "evictions"):
+        yield from metrics.format_counter(
+            f"noapi_cache_{stat}_total",
+            f"In-process cache {stat}, by resource.",
+            _by_resource(stats, stat),
+            ("resource",),
+        )
+
+
+def _format_loader_metrics() -> Iterator[str]:
+    histograms = {}
+    for resource_name, stats in loader.get_batch_size_stats().items():
+        histogram = Histogram(stats["buckets"])
+        histogram.counts = list(stats["counts"])
+        histogram.sum = stats["sum"]
+        histogram.count = stats["count"]
+        histograms[(resource_name,)] = histogram
+
+    yield from metrics.format_histogram(
+        "noapi_loader_batch_size",
+        "Records read by each batch of coalesced reads, by resource.",
+        histograms,
+        ("resource",),
+    )
+
+
+def _format_write_batching_metrics() -> Iterator[str]:
+    stats = write_batching.get_write_batching_stats()
+
+    histograms = {}
+    for resource_name, values in stats.items():
+        histogram = Histogram(values["buckets"])
+        histogram.counts = list(values["counts"])
+        histogram.sum = values["sum"]
+        histogram.count = values["count"]
+        histograms[(resource_name,)] = histogram
+
+    yield from metrics.format_histogram(
+        "noapi_write_batch_size",
+        "Records written by each batch of coalesced posts, by resource.",
+        histograms,
+        ("resource",),
+    )
+    yield from metrics.format_counter(
+        "noapi_write_batch_fallbacks_total",
+        "Batches of coalesced posts retried a record at a time, by resource.",
+        _by_resource(stats, "fallbacks"),
+        ("resource",),
+    )
+
+
+def _format_statement_metrics() -> Iterator[str]:
+    # "Account.get_one" -> ("Account", "get_one")
+    stats = {
+        tuple(name.split(".", 1)): values
+        for name, values in statements.get_statement_stats().items()
+    }
+
+    for stat in ("statements", "compilations", "executions"):
+        yield from metrics.format_counter(
+            f"noapi_sql_{stat}_total",
+            f"Sql {stat}, by resource & method.",
+            {name: values[stat] for name, values in stats.items()},
+            ("resource", "method"),
+        )
+    for stat in ("parse_seconds", "compile_seconds"):
+        yield from metrics.format_counter(
+            f"noapi_sql_{stat}_total",
+            f"Time spent on sql {stat.removesuffix('_seconds')}s, by resource & method.",
+            {name: values[stat] for name, values in stats.items()},
+            ("resource", "method"),
+        )
+
+
+def _format_compression_metrics() -> Iterator[str]:
+    stats = compression.get_compression_stats()
+
+    yield from metrics.format_counter(
+        "noapi_compressed_responses_total",
+        "Responses compressed, by encoding.",
+        {(encoding,): values["responses"] for encoding, values in stats.items()},
+        ("encoding",),
+    )
+    for stat in ("raw_bytes", "compressed_bytes"):
+        yield from metrics.format_counter(
+            f"noapi_compression_{stat}_total",
+            f"Response bytes {stat.removesuffix('_bytes')}, by encoding.",
+            {(encoding,): values[stat] for encoding, values in stats.items()},
+            ("encoding",),
+        )
+
+
+def _format_admission_metrics() -> Iterator[str]:
+    # "Account" -> ("Account", "*"), "Account.get_one" -> ("Account", "get_one")
+    stats = {
+        tuple(name.split(".", 1)) if "." in name else (name, "*"): values
+        for name, values in admission.get_admission_stats().items()
+    }
+
+    yield from metrics.format_gauge(
+        "noapi_admission_active_requests",
+        "Requests being worked on, by resource & method (* for all of them).",
+        {name: values["active"] for name, values in stats.items()},
+        ("resource", "method"),
+    )
+    yield from metrics.format_gauge(
+        "noapi_admission_queued_requests",
+        "Requests waiting to be worked on, by resource & method.",
+        {name: values["queued"] for name, values in stats.items()},
+        ("resource", "method"),
+    )
+    yield from metrics.format_counter(
+        "noapi_admission_admitted_total",
+        "Requests admitted, by resource & method.",
+        {name: values["admitted"] for name, values in stats.items()},
+        ("resource", "method"),
+    )
+    yield from metrics.format_counter(
+        "noapi_admission_rejected_total",
+        "Requests turned away with a 503, by resource, method & reason.",
+        {
+            (*name, reason): values[f"rejected_{reason}"]
+            for name, values in stats.items()
+            for reason in ("queue_full", "queue_timeout")
+        },
+        ("resource", "method", "reason"),
+    )
+
+
+def format_metrics() -> str:
+    lines = [
+        *metrics.format_request_metrics(),
+        *_format_cache_metrics(),
+        *_format_loader_metrics(),
+        *_format_write_batching_metrics(),
+        *_format_statement_metrics(),
+        *_format_compression_metrics(),
+        *_format_admission_metrics(),
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def create_metrics_route(path: str) -> APIRoute:
+    async def get_metrics() -> fastapi.Response:
+        return fastapi.Response(format_metrics(), media_type=CONTENT_TYPE)
+
+    return APIRoute(
+        path=path,
+        endpoint=get_metrics,
+        methods=["GET"],
+        include_in_schema=False,
+    )
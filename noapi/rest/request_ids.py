@@ -0,0 +1,51 @@
+import re
+import uuid
+
+from starlette.datastructures import Headers
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp
+from starlette.types import Message
+from starlette.types import Receive
+from starlette.types import Scope
+from starlette.types import Send
+
+import noapi.logger as logger
+
+# every request gets an id, which is attached to its logs, its metrics &
+# profiles, and its response. one given by the client (or by a proxy in front
+# of us) is kept, so long as it's something we'd be happy to log & echo back.
+
+REQUEST_ID_HEADER = "x-request-id"
+
+_VALID_REQUEST_ID = re.compile(r"[A-Za-z0-9._:-]{1,128}")
+
+
+def _get_request_id(scope: Scope) -> str:
+    request_id = Headers(scope=scope).get(REQUEST_ID_HEADER)
+    if request_id is not None and _VALID_REQUEST_ID.fullmatch(request_id):
+        return request_id
+
+    return uuid.uuid4().hex
+
+
+class RequestIdMiddleware:
+    # a plain asgi middleware, so that the endpoint runs in this context
+    # and sees the request id which is set here
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _get_request_id(scope)
+        logger.set_request_id(request_id)
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[REQUEST_ID_HEADER] = request_id
+
+            await send(message)
+
+        await self.app(scope, receive, send_with_request_id)
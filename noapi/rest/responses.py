@@ -1,18 +1,31 @@
+import email.utils
+import hashlib
+from collections.abc import AsyncIterable
+from collections.abc import AsyncIterator
+from collections.abc import Callable
 from collections.abc import Iterable
 from collections.abc import Mapping
+from datetime import datetime
+from datetime import timezone
 from typing import Any
 from typing import Generic
 from typing import Literal
+from typing import NamedTuple
 from typing import TypedDict
 from typing import TypeVar
 
+import fastapi.responses
 from pydantic.generics import GenericModel
+from starlette.background import BackgroundTask
 
 import noapi.json
+import noapi.metrics as metrics
 from noapi.errors import ServiceError
 
 T = TypeVar("T")
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
 
 class Cookie(TypedDict, total=False):
     key: str
@@ -32,7 +45,8 @@ def create_response(
     headers: dict[str, str] | None,
     cookies: Iterable[Cookie] | None = None,
 ) -> noapi.json.ORJSONResponse:
-    response = noapi.json.ORJSONResponse(content, status_code, headers)
+    with metrics.measure("serialization"):
+        response = noapi.json.ORJSONResponse(content, status_code, headers)
 
     if cookies is None:
         cookies = []
@@ -46,10 +60,81 @@ def create_response(
 class Success(GenericModel, Generic[T]):
     status: Literal["success"]
     data: T
+    meta: dict[str, Any] | None = None
+
+
+class Validators(NamedTuple):
+    etag: str
+    last_modified: datetime | None = None
+
+
+def versioned_etag(version: Any) -> str:
+    # weak; derived from what the representation was built from, rather
+    # than from its bytes, so that it can be checked before building it
+    digest = hashlib.blake2b(noapi.json.dumps(version), digest_size=16)
+    return f'W/"{digest.hexdigest()}"'
+
+
+def content_etag(body: bytes) -> str:
+    digest = hashlib.blake2b(body, digest_size=16)
+    return f'"{digest.hexdigest()}"'
+
+
+def is_conditional(request_headers: Mapping[str, str]) -> bool:
+    return "if-none-match" in request_headers or "if-modified-since" in request_headers
+
+
+def _opaque_tag(etag: str) -> str:
+    # if-none-match uses the weak comparison
+    return etag.removeprefix("W/")
+
+
+def is_not_modified(request_headers: Mapping[str, str], validators: Validators) -> bool:
+    # if-modified-since is only considered without an if-none-match
+    if_none_match = request_headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+
+        etags = {_opaque_tag(etag.strip()) for etag in if_none_match.split(",")}
+        return _opaque_tag(validators.etag) in etags
+
+    if_modified_since = request_headers.get("if-modified-since")
+    if if_modified_since is not None and validators.last_modified is not None:
+        try:
+            since = email.utils.parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+
+        if since.tzinfo is None:
+            since = since.replace(tzinfo=timezone.utc)
+
+        # http dates have a resolution of a second
+        last_modified = validators.last_modified.astimezone(timezone.utc)
+        return last_modified.replace(microsecond=0) <= since
+
+    return False
 
 
-def format_success(data: Any) -> dict[str, Any]:
-    return {"status": "success", "data": data}
+def format_validators(validators: Validators) -> dict[str, str]:
+    headers = {"etag": validators.etag}
+    if validators.last_modified is not None:
+        headers["last-modified"] = email.utils.format_datetime(
+            validators.last_modified.astimezone(timezone.utc), usegmt=True
+        )
+
+    return headers
+
+
+def not_modified(validators: Validators) -> fastapi.Response:
+    return fastapi.Response(status_code=304, headers=format_validators(validators))
+
+
+def format_success(data: Any, meta: Mapping[str, Any] | None = None) -> dict[str, Any]:
+    if meta is None:
+        return {"status": "success", "data": data}
+
+    return {"status": "success", "data": data, "meta": meta}
 
 
 def success(
@@ -57,9 +142,85 @@ def success(
     status_code: int = 200,
     headers: dict | None = None,
     cookies: Iterable[Cookie] | None = None,
-) -> noapi.json.ORJSONResponse:
-    content = format_success(data)
-    return create_response(content, status_code, headers, cookies)
+    meta: Mapping[str, Any] | None = None,
+    validators: Validators | None = None,
+    request_headers: Mapping[str, str] | None = None,
+) -> fastapi.Response:
+    content = format_success(data, meta)
+    response = create_response(content, status_code, headers, cookies)
+
+    # given the request's headers, the response can be made conditional;
+    # without validators of its own, it's validated by its content.
+    if request_headers is not None and validators is None:
+        validators = Validators(etag=content_etag(response.body))
+
+    if validators is not None:
+        if request_headers is not None and is_not_modified(request_headers, validators):
+            return not_modified(validators)
+
+        response.headers.update(format_validators(validators))
+
+    return response
+
+
+def stream(
+    data: AsyncIterable[Any],
+    status_code: int = 200,
+    headers: dict | None = None,
+) -> fastapi.responses.StreamingResponse:
+    async def render() -> AsyncIterator[bytes]:
+        async for obj in data:
+            yield noapi.json.dumps(obj) + b"\n"
+
+    return fastapi.responses.StreamingResponse(
+        render(),
+        status_code=status_code,
+        headers=headers,
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+def finish_after_body(response: fastapi.Response, finish: Callable[[], None]) -> bool:
+    # a streamed body is read (from the database) & written after the
+    # request's handler has returned; what the request holds until it has
+    # been served (e.g. its admission) is let go of once the body has been
+    # written, or abandoned. returns whether finish was deferred; if it
+    # wasn't, it's the caller's to call.
+    if not isinstance(response, fastapi.responses.StreamingResponse):
+        return False
+
+    finished = False
+
+    def finish_once() -> None:
+        nonlocal finished
+        if not finished:
+            finished = True
+            finish()
+
+    body = response.body_iterator
+
+    async def body_iterator() -> AsyncIterator[Any]:
+        try:
+            async for chunk in body:
+                yield chunk
+        except Exception:
+            metrics.record_exception()
+            raise
+        finally:
+            finish_once()
+
+    # run once the response is over, however it went; the body is never
+    # started if the client leaves first, nor finished if it leaves midway
+    background = response.background
+
+    async def after_response() -> None:
+        finish_once()
+        if background is not None:
+            await background()
+
+    response.body_iterator = body_iterator()
+    response.background = BackgroundTask(after_response)
+    return True
 
 
 class Error(GenericModel, Generic[T]):
@@ -79,5 +240,6 @@ def failure(
     headers: dict | None = None,
     cookies: Iterable[Cookie] | None = None,
 ) -> noapi.json.ORJSONResponse:
+    metrics.record_error(error.value)
     content = format_failure(error, message)
     return create_response(content, status_code, headers, cookies)
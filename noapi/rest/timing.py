@@ -0,0 +1,45 @@
+import functools
+import time
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Mapping
+from typing import ParamSpec
+
+import fastapi
+
+import noapi.logger as logger
+import noapi.metrics as metrics
+
+P = ParamSpec("P")
+
+# an opt-in breakdown of where each request's time went, for browsers' dev
+# tools & curl -v. it's visible to every client, so it's off by default.
+
+
+def format_server_timing(
+    phases: Mapping[str, float], total_seconds: float, request_id: str | None
+) -> str:
+    entries = [f"{phase};dur={seconds * 1000:.3f}" for phase, seconds in phases.items()]
+    entries.append(f"total;dur={total_seconds * 1000:.3f}")
+    if request_id is not None:
+        entries.append(f'request;desc="{request_id}"')
+
+    return ", ".join(entries)
+
+
+def add_server_timing(
+    function: Callable[P, Awaitable[fastapi.Response]]
+) -> Callable[P, Awaitable[fastapi.Response]]:
+    # must run within metrics.instrument, which collects the phases
+    @functools.wraps(function)
+    async def wrapper(*args: P.args, **kwargs: P.kwargs) -> fastapi.Response:
+        started_at = time.perf_counter()
+        response = await function(*args, **kwargs)
+        elapsed = time.perf_counter() - started_at
+
+        response.headers["server-timing"] = format_server_timing(
+            metrics.get_current_phases(), elapsed, logger.get_request_id()
+        )
+        return response
+
+    return wrapper
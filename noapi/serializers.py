@@ -0,0 +1,118 @@
+import operator
+from collections.abc import Callable
+from collections.abc import Mapping
+from collections.abc import Sequence
+from datetime import date
+from datetime import datetime
+from datetime import time
+from decimal import Decimal
+from typing import Any
+from uuid import UUID
+
+from pydantic import datetime_parse
+
+from noapi.models import BaseModel
+
+# serializers turn database records straight into structures which orjson
+# can natively encode (str, int, datetime, UUID, ...), without building and
+# validating a model for each record. they are only suitable for data which
+# is already known to be valid (e.g. records read back from the database).
+
+Serializer = Callable[[Mapping[str, Any]], dict[str, Any]]
+
+
+def _to_bool(value: Any) -> bool | None:
+    return bool(value) if value is not None else None
+
+
+def _to_uuid(value: Any) -> UUID | str | None:
+    # as pydantic parses them; e.g. sqlite's text, or mysql's binary(16)
+    if value is None or isinstance(value, UUID):
+        return value
+
+    if isinstance(value, str):
+        # already spelled as it would be serialized
+        if len(value) == 36 and value.islower():
+            return value
+
+        return UUID(value)
+
+    if isinstance(value, bytes):
+        try:
+            return UUID(value.decode())
+        except ValueError:
+            return UUID(bytes=value)
+
+    return UUID(value)
+
+
+def _to_decimal(value: Any) -> Decimal | None:
+    if value is None or isinstance(value, Decimal):
+        return value
+
+    if isinstance(value, bytes):
+        value = value.decode()
+
+    return Decimal(str(value).strip())
+
+
+def _parsed_with(cls: type, parse: Callable[[Any], Any]) -> Callable[[Any], Any]:
+    # for values which drivers may return as text (or timestamps)
+    def convert(value: Any) -> Any:
+        # (exactly; e.g. a datetime is a date, but not serialized as one)
+        if value is None or type(value) is cls:
+            return value
+
+        return parse(value)
+
+    return convert
+
+
+# field type -> conversion for values which the database returns in a
+# different representation than the model's (e.g. mysql's tinyint bools, or
+# sqlite's text datetimes), so that a record serializes as its model would
+_CONVERTERS: dict[type, Callable[[Any], Any]] = {
+    bool: _to_bool,
+    datetime: _parsed_with(datetime, datetime_parse.parse_datetime),
+    date: _parsed_with(date, datetime_parse.parse_date),
+    time: _parsed_with(time, datetime_parse.parse_time),
+    UUID: _to_uuid,
+    Decimal: _to_decimal,
+}
+
+
+def compile_serializer(
+    model_cls: type[BaseModel],
+    fields: Sequence[str] | None = None,
+) -> Serializer:
+    if fields is None:
+        fields = list(model_cls.__fields__)
+
+    keys = tuple(fields)
+    converters = [_CONVERTERS.get(model_cls.__fields__[k].outer_type_) for k in keys]
+
+    if any(converters):
+        conversions = list(zip(keys, converters))
+
+        def serialize_converted(rec: Mapping[str, Any]) -> dict[str, Any]:
+            return {
+                k: convert(rec[k]) if convert is not None else rec[k]
+                for k, convert in conversions
+            }
+
+        return serialize_converted
+
+    if len(keys) == 1:
+        (key,) = keys
+
+        def serialize_one(rec: Mapping[str, Any]) -> dict[str, Any]:
+            return {key: rec[key]}
+
+        return serialize_one
+
+    getter = operator.itemgetter(*keys)
+
+    def serialize(rec: Mapping[str, Any]) -> dict[str, Any]:
+        return dict(zip(keys, getter(rec)))
+
+    return serialize
@@ -0,0 +1,10 @@
+def dsn(
+    host: str,
+    port: int,
+    password: str | None = None,
+    database: int = 0,
+) -> str:
+    if password is not None:
+        return f"redis://:{password}@{host}:{port}/{database}"
+
+    return f"redis://{host}:{port}/{database}"
@@ -0,0 +1,30 @@
+import redis.asyncio
+
+from noapi.services.sql import ReplicaSet
+
+# the clients for each of the services declared in the specification, by
+# service name; resources find theirs through their "backing_service".
+
+
+class ServiceRegistry:
+    def __init__(self) -> None:
+        self._sql_services: dict[str, ReplicaSet] = {}
+        self._redis_clients: dict[str, redis.asyncio.Redis] = {}
+
+    def add_sql_service(self, name: str, replica_set: ReplicaSet) -> None:
+        self._sql_services[name] = replica_set
+
+    def get_sql_service(self, name: str) -> ReplicaSet:
+        return self._sql_services[name]
+
+    def remove_sql_service(self, name: str) -> ReplicaSet:
+        return self._sql_services.pop(name)
+
+    def add_redis_client(self, name: str, client: redis.asyncio.Redis) -> None:
+        self._redis_clients[name] = client
+
+    def get_redis_client(self, name: str) -> redis.asyncio.Redis:
+        return self._redis_clients[name]
+
+    def remove_redis_client(self, name: str) -> redis.asyncio.Redis:
+        return self._redis_clients.pop(name)
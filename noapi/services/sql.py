@@ -1,3 +1,18 @@
+import asyncio
+import itertools
+from collections.abc import Mapping
+from collections.abc import Sequence
+from typing import Any
+
+import databases
+
+# the keyword each driver takes for its connection timeout, in seconds
+_CONNECT_TIMEOUT_OPTIONS = {
+    "mysql": "connect_timeout",
+    "postgresql": "timeout",
+}
+
+
 def dsn(
     driver: str,
     user: str,
@@ -7,3 +22,118 @@ def dsn(
     database: str,
 ) -> str:
     return f"{driver}://{user}:{password}@{host}:{port}/{database}"
+
+
+def create_database(service_def: Mapping[str, Any]) -> databases.Database:
+    url = databases.DatabaseURL(
+        dsn(
+            driver=service_def["driver"],
+            user=service_def["user"],
+            password=service_def["password"],
+            host=service_def["host"],
+            port=service_def["port"],
+            database=service_def["database"],
+        )
+    )
+
+    pool_def = service_def.get("pool", {})
+    options: dict[str, Any] = {}
+
+    # each driver applies its own defaults for anything which isn't given
+    if "min_size" in pool_def:
+        options["min_size"] = pool_def["min_size"]
+    if "max_size" in pool_def:
+        options["max_size"] = pool_def["max_size"]
+    if "connect_timeout" in pool_def:
+        option = _CONNECT_TIMEOUT_OPTIONS.get(url.dialect)
+        if option is None:
+            raise ValueError(f"Connect timeouts are unsupported for {url.dialect}")
+
+        options[option] = pool_def["connect_timeout"]
+
+    if "statement_cache_size" in pool_def:
+        # only asyncpg prepares statements server-side (& caches them by sql)
+        if url.dialect != "postgresql":
+            raise ValueError(f"Statement caches are unsupported for {url.dialect}")
+
+        options["statement_cache_size"] = pool_def["statement_cache_size"]
+
+    if "statement_timeout_ms" in pool_def:
+        # a backstop for the requests' deadlines, which cancel statements
+        # client-side; any statement still running after this is cancelled
+        # by the database itself. (mysql only bounds SELECTs)
+        timeout_ms = int(pool_def["statement_timeout_ms"])
+        if url.dialect == "postgresql":
+            options["server_settings"] = {"statement_timeout": str(timeout_ms)}
+        elif url.dialect == "mysql":
+            options["init_command"] = f"SET SESSION MAX_EXECUTION_TIME = {timeout_ms}"
+        else:
+            raise ValueError(f"Statement timeouts are unsupported for {url.dialect}")
+
+    return databases.Database(url, **options)
+
+
+async def warm_up(database: databases.Database, connections: int) -> None:
+    # hold every connection at once, so that the pool has to open (and
+    # check) as many of them as were asked for before serving requests
+    checked = 0
+    all_checked = asyncio.Event()
+
+    async def check_connection() -> None:
+        nonlocal checked
+        try:
+            async with database.connection() as connection:
+                await connection.execute("SELECT 1")
+
+                checked += 1
+                if checked == connections:
+                    all_checked.set()
+
+                await all_checked.wait()
+        finally:
+            # a check which failed releases the others, which would
+            # otherwise wait on it forever
+            all_checked.set()
+
+    await asyncio.gather(*(check_connection() for _ in range(connections)))
+
+
+# a primary database, and any number of read replicas of it; reads are
+# spread over the replicas in turn, or go to the primary if there are none.
+class ReplicaSet:
+    def __init__(
+        self,
+        primary: databases.Database,
+        replicas: Sequence[databases.Database] = (),
+        sticky_seconds: float = 0,
+    ) -> None:
+        self.primary = primary
+        self.replicas = list(replicas)
+
+        # how long a client reads from the primary for after writing to it;
+        # long enough for the replicas to have caught up with its writes.
+        self.sticky_seconds = sticky_seconds
+
+        self._next_replica = itertools.cycle(self.replicas)
+
+    @property
+    def all_databases(self) -> list[databases.Database]:
+        return [self.primary, *self.replicas]
+
+    def get_replica(self) -> databases.Database:
+        if not self.replicas:
+            return self.primary
+
+        return next(self._next_replica)
+
+
+def create_replica_set(service_def: Mapping[str, Any]) -> ReplicaSet:
+    return ReplicaSet(
+        primary=create_database(service_def),
+        replicas=[
+            # replicas share the primary's settings, unless they say otherwise
+            create_database({**service_def, **replica_def})
+            for replica_def in service_def.get("replicas", [])
+        ],
+        sticky_seconds=service_def.get("sticky_seconds", 5),
+    )
@@ -0,0 +1,38 @@
+import asyncio
+from collections.abc import Awaitable
+from collections.abc import Callable
+from collections.abc import Hashable
+from typing import Any
+from typing import TypeVar
+
+T = TypeVar("T")
+
+
+# coalesces concurrent calls sharing a key into a single in-flight call,
+# whose result (or exception) is then handed out to each of the callers.
+class SingleFlight:
+    def __init__(self) -> None:
+        self._calls: dict[Hashable, asyncio.Future[Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self._calls)
+
+    async def do(self, key: Hashable, function: Callable[[], Awaitable[T]]) -> T:
+        future = self._calls.get(key)
+        if future is None:
+            future = asyncio.ensure_future(function())
+            future.add_done_callback(lambda f: self._forget(key, f))
+            self._calls[key] = future
+
+        # a caller going away (e.g. a client disconnect) must
+        # not cancel the call for every other caller waiting on it
+        return await asyncio.shield(future)
+
+    def _forget(self, key: Hashable, future: asyncio.Future[Any]) -> None:
+        if self._calls.get(key) is future:
+            del self._calls[key]
+
+        # mark the exception as retrieved; if every caller was cancelled,
+        # nobody else will, and asyncio would log it as never retrieved.
+        if not future.cancelled():
+            future.exception()
@@ -0,0 +1,139 @@
+from collections.abc import Collection
+from collections.abc import Mapping
+from typing import Any
+
+import noapi.logger as logger
+from noapi._typing import Specification
+from noapi.rest import compression
+
+# checks which are made once, when the specification is loaded, rather than
+# being discovered by a client (or by the database) at request time.
+
+
+def get_indexes(resource_def: Mapping[str, Any]) -> list[tuple[str, ...]]:
+    # the primary key is always indexed
+    return [("id",), *(tuple(index) for index in resource_def.get("indexes", []))]
+
+
+def is_sortable(
+    resource_def: Mapping[str, Any],
+    filter_keys: Collection[str],
+    sort_field: str,
+) -> bool:
+    # an index can produce rows in the sort field's order if every column
+    # before it in the index is pinned to a single value by an equality filter
+    for index in get_indexes(resource_def):
+        if sort_field in index:
+            prefix = index[: index.index(sort_field)]
+            if set(prefix) <= set(filter_keys):
+                return True
+
+    return False
+
+
+def validate_resource(resource_def: Mapping[str, Any]) -> None:
+    name = resource_def["name"]
+    model_fields = resource_def["model"].keys()
+
+    for index in get_indexes(resource_def):
+        for column in index:
+            if column not in model_fields:
+                raise ValueError(f"{name}: unknown column in index: {column}")
+
+    # filtering on a column which doesn't lead an index would scan the table
+    leading_columns = {index[0] for index in get_indexes(resource_def)}
+    filterable = resource_def.get("filterable", [])
+    for field in filterable:
+        if field not in leading_columns:
+            raise ValueError(f"{name}: filterable field is not indexed: {field}")
+
+    sortable = resource_def.get("sortable", [])
+    if sortable and resource_def.get("pagination", "offset") == "keyset":
+        raise ValueError(f"{name}: keyset pages are ordered by the pagination key")
+
+    for field in sortable:
+        if not is_sortable(resource_def, filterable, field):
+            raise ValueError(f"{name}: sortable field is not indexed: {field}")
+
+    method_limit_defs = resource_def.get("method_concurrency_limits", {})
+    for method in method_limit_defs:
+        if method not in resource_def["methods"]:
+            raise ValueError(f"{name}: concurrency limit for unserved method: {method}")
+
+    limit_defs = list(method_limit_defs.values())
+    if "concurrency_limit" in resource_def:
+        limit_defs.append(resource_def["concurrency_limit"])
+
+    for limit_def in limit_defs:
+        if limit_def["max_concurrent"] < 1:
+            raise ValueError(f"{name}: at least one concurrent request must be allowed")
+        if limit_def.get("max_queued", 0) < 0:
+            raise ValueError(f"{name}: queued requests must not be negative")
+
+    method_timeout_defs = resource_def.get("method_timeouts", {})
+    for method in method_timeout_defs:
+        if method not in resource_def["methods"]:
+            raise ValueError(f"{name}: timeout for unserved method: {method}")
+
+    timeout_defs = list(method_timeout_defs.values())
+    if "timeout" in resource_def:
+        timeout_defs.append(resource_def["timeout"])
+
+    for timeout_def in timeout_defs:
+        timeout_ms = timeout_def["timeout_ms"]
+        if timeout_ms <= 0:
+            raise ValueError(f"{name}: timeouts must be positive")
+        if timeout_def.get("max_timeout_ms", timeout_ms) < timeout_ms:
+            raise ValueError(f"{name}: max timeouts must be at least the timeout")
+
+
+def validate(specification: Specification) -> None:
+    server_def = specification.get("server", {})
+    if server_def.get("workers", 1) > 1 and "specification" not in server_def:
+        raise ValueError("Worker processes need the specification's import string")
+
+    if "admin_token" in server_def and not server_def["admin_token"]:
+        raise ValueError("The admin token must not be empty")
+
+    logger.get_level(server_def.get("log_level", logger.DEFAULT_LOG_LEVEL))
+
+    sample_rate = server_def.get("access_log", {}).get("sample_rate", 1.0)
+    if not 0 <= sample_rate <= 1:
+        raise ValueError("The access log sample rate must be within [0, 1]")
+
+    compression_def = server_def.get("compression", {})
+    available_encodings = compression.get_available_encodings()
+    for encoding in compression_def.get("encodings", []):
+        if encoding not in available_encodings:
+            raise ValueError(f"Compression library not installed: {encoding}")
+
+    service_types = {}
+    for service_def in specification["services"]:
+        if service_def["name"] in service_types:
+            raise ValueError(f"Duplicate service name: {service_def['name']}")
+
+        service_types[service_def["name"]] = service_def["type"]
+
+    for resource_def in specification["resources"]:
+        name = resource_def["name"]
+
+        if server_def.get("metrics", True) and name.lower() == "metrics":
+            raise ValueError(f"{name}: routes would clash with /metrics")
+
+        if "admin_token" in server_def and name.lower() == "admin":
+            raise ValueError(f"{name}: routes would clash with /admin")
+
+        sample_rate = resource_def.get("access_log_sample_rate", 1.0)
+        if not 0 <= sample_rate <= 1:
+            raise ValueError(f"{name}: access log sample rate must be within [0, 1]")
+
+        backing_service = resource_def["backing_service"]
+        if service_types.get(backing_service) != "sql":
+            raise ValueError(f"{name}: unknown sql service: {backing_service}")
+
+        if "read_through_cache" in resource_def:
+            cache_service = resource_def["read_through_cache"]["service"]
+            if service_types.get(cache_service) != "redis":
+                raise ValueError(f"{name}: unknown redis service: {cache_service}")
+
+        validate_resource(resource_def)
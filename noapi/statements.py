@@ -0,0 +1,137 @@
+import time
+from collections.abc import Mapping
+from typing import Any
+
+import sqlalchemy
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql.compiler import Compiled
+from sqlalchemy.sql.elements import ClauseElement
+
+# given a plain string, `databases` parses it into a text() clause, binds the
+# values into a copy of it, and has sqlalchemy compile that for the dialect,
+# on every call. a statement does the parsing & compiling once per query (and
+# dialect), and only the values change between calls.
+#
+# the compiled sql is identical between calls, so drivers which cache server
+# side prepared statements by their sql (asyncpg) will also reuse them.
+#
+# `databases` has no public hook for this; its backends compile queries in a
+# private `_compile`, which reads private attributes of the compiled form
+# (e.g. `_bind_processors`, `_result_columns`), handed through here as is.
+# hence `databases` is pinned (see requirements.txt), & tests/test_statements.py
+# checks each backend compiles a statement as it would compile a text clause.
+
+
+class StatementStats:
+    def __init__(self) -> None:
+        self.statements = 0
+        self.compilations = 0
+        self.executions = 0
+
+        # time spent doing what would otherwise be done on every execution
+        self.parse_seconds = 0.0
+        self.compile_seconds = 0.0
+
+    @property
+    def saved_seconds(self) -> float:
+        # an estimate; every execution past the first of each statement
+        # would have otherwise parsed & compiled the statement again. the
+        # first compile is the coldest, so this errs on the high side.
+        # (see benchmarks/statements.py for a measurement)
+        if self.statements == 0 or self.compilations == 0:
+            return 0.0
+
+        reuses = self.executions - self.compilations
+        per_parse = self.parse_seconds / self.statements
+        per_compile = self.compile_seconds / self.compilations
+        return max(reuses, 0) * (per_parse + per_compile)
+
+
+# statement name (e.g. "Account.get_one") -> stats
+_STATS: dict[str, StatementStats] = {}
+
+
+def get_stats(name: str) -> StatementStats:
+    stats = _STATS.get(name)
+    if stats is None:
+        stats = StatementStats()
+        _STATS[name] = stats
+
+    return stats
+
+
+def get_statement_stats() -> dict[str, dict[str, Any]]:
+    return {
+        name: {
+            "statements": stats.statements,
+            "compilations": stats.compilations,
+            "executions": stats.executions,
+            "parse_seconds": stats.parse_seconds,
+            "compile_seconds": stats.compile_seconds,
+            "saved_seconds": stats.saved_seconds,
+        }
+        for name, stats in _STATS.items()
+    }
+
+
+class Statement:
+    def __init__(self, sql: str, name: str) -> None:
+        self.stats = get_stats(name)
+
+        started_at = time.perf_counter()
+        self.clause = sqlalchemy.text(sql)
+        self.stats.parse_seconds += time.perf_counter() - started_at
+        self.stats.statements += 1
+
+        self._bind_names = tuple(self.clause._bindparams)
+
+        # (dialect, paramstyle) -> compiled
+        self._compiled: dict[tuple[type[Dialect], str], Compiled] = {}
+
+    def compile(self, dialect: Dialect) -> Compiled:
+        key = (type(dialect), dialect.paramstyle)
+
+        compiled = self._compiled.get(key)
+        if compiled is None:
+            started_at = time.perf_counter()
+            compiled = self.clause.compile(
+                dialect=dialect,
+                compile_kwargs={"render_postcompile": True},
+            )
+            self.stats.compile_seconds += time.perf_counter() - started_at
+            self.stats.compilations += 1
+
+            self._compiled[key] = compiled
+
+        self.stats.executions += 1
+        return compiled
+
+    def bind(self, values: Mapping[str, Any]) -> ClauseElement:
+        return _BoundStatement(self, {k: values[k] for k in self._bind_names})
+
+
+class _BoundStatement(ClauseElement):
+    # what `databases` is handed in place of a query string
+    def __init__(self, statement: Statement, values: dict[str, Any]) -> None:
+        self._statement = statement
+        self._values = values
+
+    def compile(self, bind: Any = None, dialect: Any = None, **kw: Any) -> Any:
+        return _BoundCompiled(self._statement.compile(dialect), self._values)
+
+
+class _BoundCompiled:
+    # a statement's compiled form, with one execution's values
+    def __init__(self, compiled: Compiled, values: dict[str, Any]) -> None:
+        self._compiled = compiled
+        self._values = values
+
+    @property
+    def params(self) -> dict[str, Any]:
+        return dict(self._values)
+
+    def construct_params(self, *args: Any, **kwargs: Any) -> dict[str, Any]:
+        return dict(self._values)
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._compiled, name)
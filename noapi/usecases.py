@@ -1,26 +1,44 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from collections.abc import Awaitable
 from collections.abc import Callable
 from collections.abc import Mapping
+from collections.abc import Sequence
 from typing import Any
 from typing import TypedDict
 from typing import TypeVar
 
+import pydantic
+
+from noapi import deadlines
+from noapi import pagination
 from noapi._typing import ResourceIdentifier
 from noapi.context import Context
 from noapi.errors import ServiceError
 from noapi.models import BaseModel
+from noapi.models import create_id_normalizer
+from noapi.querying import Query
+from noapi.repositories import loader
+from noapi.repositories import memory
+from noapi.repositories import redis
 from noapi.repositories import sql  # TODO: user definable
+from noapi.repositories import write_batching
+from noapi.singleflight import SingleFlight
 
 R = TypeVar("R")
 
 
 # fmt: off
 class ResourceUsecases(TypedDict):
-    get_one: Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | ServiceError]]
-    get_many: Callable[[Context, int, int], Awaitable[list[dict[str, Any]] | ServiceError]]
+    get_one: Callable[[Context, ResourceIdentifier, Sequence[str] | None], Awaitable[dict[str, Any] | ServiceError]]
+    get_batch: Callable[[Context, Sequence[ResourceIdentifier]], Awaitable[list[dict[str, Any]] | ServiceError]]
+    get_many: Callable[[Context, int, int, Sequence[str] | None, Query], Awaitable[list[dict[str, Any]] | ServiceError]]
+    get_many_after: Callable[[Context, str | None, int, Sequence[str] | None, Query], Awaitable[tuple[list[dict[str, Any]], str | None] | ServiceError]]
+    iterate_many: Callable[[Context, int, int | None, Sequence[str] | None, Query], Awaitable[AsyncIterator[dict[str, Any]] | ServiceError]]
+    iterate_many_after: Callable[[Context, str | None, int | None, Sequence[str] | None, Query], Awaitable[AsyncIterator[dict[str, Any]] | ServiceError]]
     post: Callable[[Context, BaseModel], Awaitable[dict[str, Any] | ServiceError]]
+    post_batch: Callable[[Context, Sequence[BaseModel]], Awaitable[list[dict[str, Any]] | ServiceError]]
     patch: Callable[[Context, ResourceIdentifier, BaseModel],Awaitable[dict[str, Any] | ServiceError],]
     delete: Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | ServiceError]]
 # fmt: on
@@ -29,24 +47,83 @@ class ResourceUsecases(TypedDict):
 def get_for_resource(
     resource_def: Mapping[str, Any], model: type[BaseModel]
 ) -> ResourceUsecases:
+    # every usecase shares the resource's repositories (& so their caches)
+    primary_repository = sql.get_for_resource(resource_def, model)
+    repository = _wrap_repository(resource_def, primary_repository)
+
+    # fmt: off
     return {
-        "get_one": create_get_one_function(resource_def, model),
-        "get_many": create_get_many_function(resource_def, model),
-        "post": create_post_function(resource_def, model),
-        "patch": create_patch_function(resource_def, model),
-        "delete": create_delete_function(resource_def, model),
+        "get_one": create_get_one_function(resource_def, model, repository, primary_repository),
+        "get_batch": create_get_batch_function(resource_def, model, repository, primary_repository),
+        "get_many": create_get_many_function(resource_def, model, repository, primary_repository),
+        "get_many_after": create_get_many_after_function(resource_def, model, repository, primary_repository),
+        "iterate_many": create_iterate_many_function(resource_def, model, repository),
+        "iterate_many_after": create_iterate_many_after_function(resource_def, model, repository),
+        "post": create_post_function(resource_def, model, repository),
+        "post_batch": create_post_batch_function(resource_def, model, repository),
+        "patch": create_patch_function(resource_def, model, repository),
+        "delete": create_delete_function(resource_def, model, repository),
     }
+    # fmt: on
+
+
+def _wrap_repository(
+    resource_def: Mapping[str, Any], repository: sql.ResourceRepository
+) -> sql.ResourceRepository:
+    if "batch_reads" in resource_def:
+        repository = loader.wrap_resource_repository(resource_def, repository)
+
+    if "write_batching" in resource_def:
+        repository = write_batching.wrap_resource_repository(resource_def, repository)
+
+    if "read_through_cache" in resource_def:
+        repository = redis.wrap_resource_repository(resource_def, repository)
+
+    if "cache" in resource_def:
+        repository = memory.wrap_resource_repository(resource_def, repository)
+
+    return repository
+
+
+def _get_single_flight(
+    resource_def: Mapping[str, Any], method: str
+) -> SingleFlight | None:
+    if method not in resource_def.get("coalesce_reads", []):
+        return None
+
+    return SingleFlight()
 
 
 def create_get_one_function(
-    resource_def: Mapping[str, Any], model: type[BaseModel]
-) -> Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | ServiceError]]:
-    repository = sql.get_for_resource(resource_def, model)
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+    primary_repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, ResourceIdentifier, Sequence[str] | None],
+    Awaitable[dict[str, Any] | ServiceError],
+]:
+    single_flight = _get_single_flight(resource_def, "get_one")
 
     async def get_one(
-        ctx: Context, id: ResourceIdentifier
+        ctx: Context, id: ResourceIdentifier, fields: Sequence[str] | None
     ) -> dict[str, Any] | ServiceError:
-        data = await repository["get_one"](ctx, id)
+        # a client which has just written reads from the primary directly;
+        # caches, batches & coalesced reads may all hold replica data.
+        if ctx.prefers_primary(resource_def["backing_service"]):
+            data = await primary_repository["get_one"](ctx, id, fields)
+        elif single_flight is not None:
+            key = (id, tuple(fields) if fields is not None else None)
+            # shared with other requests; each only waits until its deadline
+            shared_ctx = deadlines.without_deadline(ctx)
+            data = await deadlines.wait(
+                ctx,
+                single_flight.do(
+                    key, lambda: repository["get_one"](shared_ctx, id, fields)
+                ),
+            )
+        else:
+            data = await repository["get_one"](ctx, id, fields)
         if data is None:
             return ServiceError.RESOURCE_NOT_FOUND
 
@@ -55,15 +132,83 @@ def create_get_one_function(
     return get_one
 
 
+def create_get_batch_function(
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+    primary_repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, Sequence[ResourceIdentifier]],
+    Awaitable[list[dict[str, Any]] | ServiceError],
+]:
+    max_batch_size = resource_def.get("max_batch_size", sql.DEFAULT_MAX_BATCH_SIZE)
+    normalize_id = create_id_normalizer(resource_def["model"]["id"][0])
+
+    async def get_batch(
+        ctx: Context, ids: Sequence[ResourceIdentifier]
+    ) -> list[dict[str, Any]] | ServiceError:
+        if len(ids) > max_batch_size:
+            return ServiceError.RESOURCE_BATCH_TOO_LARGE
+
+        if ctx.prefers_primary(resource_def["backing_service"]):
+            data = await primary_repository["get_batch"](ctx, ids)
+        else:
+            data = await repository["get_batch"](ctx, ids)
+
+        # return the records in the order they were requested in;
+        # ids which do not exist are omitted. the database may spell an id
+        # differently from the request (e.g. a uuid's case)
+        recs = {normalize_id(rec["id"]): rec for rec in data}
+        keys = (normalize_id(id) for id in ids)
+        return [recs[key] for key in keys if key in recs]
+
+    return get_batch
+
+
 def create_get_many_function(
-    resource_def: Mapping[str, Any], model: type[BaseModel]
-) -> Callable[[Context, int, int], Awaitable[list[dict[str, Any]] | ServiceError]]:
-    repository = sql.get_for_resource(resource_def, model)
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+    primary_repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, int, int, Sequence[str] | None, Query],
+    Awaitable[list[dict[str, Any]] | ServiceError],
+]:
+    single_flight = _get_single_flight(resource_def, "get_many")
 
     async def get_many(
-        ctx: Context, page: int, page_size: int
+        ctx: Context,
+        page: int,
+        page_size: int,
+        fields: Sequence[str] | None,
+        query: Query,
     ) -> list[dict[str, Any]] | ServiceError:
-        data = await repository["get_many"](ctx, page, page_size)
+        if page_size < 1:
+            return ServiceError.RESOURCE_INVALID_PAGE_SIZE
+
+        if ctx.prefers_primary(resource_def["backing_service"]):
+            data = await primary_repository["get_many"](
+                ctx, page, page_size, fields, query
+            )
+        elif single_flight is not None:
+            key = (
+                page,
+                page_size,
+                tuple(fields) if fields is not None else None,
+                query,
+            )
+            shared_ctx = deadlines.without_deadline(ctx)
+            data = await deadlines.wait(
+                ctx,
+                single_flight.do(
+                    key,
+                    lambda: repository["get_many"](
+                        shared_ctx, page, page_size, fields, query
+                    ),
+                ),
+            )
+        else:
+            data = await repository["get_many"](ctx, page, page_size, fields, query)
         if data is None:
             return ServiceError.RESOURCE_NOT_FOUND
 
@@ -72,11 +217,144 @@ def create_get_many_function(
     return get_many
 
 
+def _decode_cursor(
+    model: type[BaseModel], key_params: Sequence[str], cursor: str | None
+) -> dict[str, Any] | None | ServiceError:
+    if cursor is None:
+        return None
+
+    values = pagination.decode_cursor(cursor)
+    if values is None or len(values) != len(key_params):
+        return ServiceError.RESOURCE_INVALID_CURSOR
+
+    try:
+        return {
+            k: pydantic.parse_obj_as(model.__fields__[k].outer_type_, v)
+            for k, v in zip(key_params, values)
+        }
+    except pydantic.ValidationError:
+        return ServiceError.RESOURCE_INVALID_CURSOR
+
+
+def create_get_many_after_function(
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+    primary_repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, str | None, int, Sequence[str] | None, Query],
+    Awaitable[tuple[list[dict[str, Any]], str | None] | ServiceError],
+]:
+    key_params = sql.get_resource_pagination_params(resource_def, model)
+    single_flight = _get_single_flight(resource_def, "get_many")
+
+    async def get_many_after(
+        ctx: Context,
+        cursor: str | None,
+        page_size: int,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> tuple[list[dict[str, Any]], str | None] | ServiceError:
+        if page_size < 1:
+            return ServiceError.RESOURCE_INVALID_PAGE_SIZE
+
+        after = _decode_cursor(model, key_params, cursor)
+        if isinstance(after, ServiceError):
+            return after
+
+        # fetch one extra record to find out whether there is a next page
+        if ctx.prefers_primary(resource_def["backing_service"]):
+            data = await primary_repository["get_many_after"](
+                ctx, after, page_size + 1, fields, query
+            )
+        elif single_flight is not None:
+            key = (
+                cursor,
+                page_size,
+                tuple(fields) if fields is not None else None,
+                query,
+            )
+            shared_ctx = deadlines.without_deadline(ctx)
+            data = await deadlines.wait(
+                ctx,
+                single_flight.do(
+                    key,
+                    lambda: repository["get_many_after"](
+                        shared_ctx, after, page_size + 1, fields, query
+                    ),
+                ),
+            )
+        else:
+            data = await repository["get_many_after"](
+                ctx, after, page_size + 1, fields, query
+            )
+
+        next_cursor = None
+        if len(data) > page_size:
+            data = data[:page_size]
+            next_cursor = pagination.encode_cursor([data[-1][k] for k in key_params])
+
+        return data, next_cursor
+
+    return get_many_after
+
+
+def create_iterate_many_function(
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, int, int | None, Sequence[str] | None, Query],
+    Awaitable[AsyncIterator[dict[str, Any]] | ServiceError],
+]:
+    async def iterate_many(
+        ctx: Context,
+        page: int,
+        page_size: int | None,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> AsyncIterator[dict[str, Any]] | ServiceError:
+        # the entire table; walked in chunks of ids unless an ordering was
+        # requested, in which case it's read through a single cursor instead
+        if page_size is None and query.sort is None:
+            return repository["iterate_many_after"](ctx, None, None, fields, query)
+
+        return repository["iterate_many"](ctx, page, page_size, fields, query)
+
+    return iterate_many
+
+
+def create_iterate_many_after_function(
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, str | None, int | None, Sequence[str] | None, Query],
+    Awaitable[AsyncIterator[dict[str, Any]] | ServiceError],
+]:
+    key_params = sql.get_resource_pagination_params(resource_def, model)
+
+    async def iterate_many_after(
+        ctx: Context,
+        cursor: str | None,
+        page_size: int | None,
+        fields: Sequence[str] | None,
+        query: Query,
+    ) -> AsyncIterator[dict[str, Any]] | ServiceError:
+        after = _decode_cursor(model, key_params, cursor)
+        if isinstance(after, ServiceError):
+            return after
+
+        return repository["iterate_many_after"](ctx, after, page_size, fields, query)
+
+    return iterate_many_after
+
+
 def create_post_function(
-    resource_def: Mapping[str, Any], model: type[BaseModel]
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
 ) -> Callable[[Context, BaseModel], Awaitable[dict[str, Any] | ServiceError]]:
-    repository = sql.get_for_resource(resource_def, model)
-
     async def post(ctx: Context, obj: BaseModel) -> dict[str, Any] | ServiceError:
         data = await repository["post"](ctx, obj)
         if data is None:
@@ -87,13 +365,33 @@ def create_post_function(
     return post
 
 
+def create_post_batch_function(
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
+) -> Callable[
+    [Context, Sequence[BaseModel]], Awaitable[list[dict[str, Any]] | ServiceError]
+]:
+    max_batch_size = resource_def.get("max_batch_size", sql.DEFAULT_MAX_BATCH_SIZE)
+
+    async def post_batch(
+        ctx: Context, objs: Sequence[BaseModel]
+    ) -> list[dict[str, Any]] | ServiceError:
+        if len(objs) > max_batch_size:
+            return ServiceError.RESOURCE_BATCH_TOO_LARGE
+
+        return await repository["post_batch"](ctx, objs)
+
+    return post_batch
+
+
 def create_patch_function(
-    resource_def: Mapping[str, Any], model: type[BaseModel]
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
 ) -> Callable[
     [Context, ResourceIdentifier, BaseModel], Awaitable[dict[str, Any] | ServiceError]
 ]:
-    repository = sql.get_for_resource(resource_def, model)
-
     async def patch(
         ctx: Context, id: ResourceIdentifier, obj: BaseModel
     ) -> dict[str, Any] | ServiceError:
@@ -107,10 +405,10 @@ def create_patch_function(
 
 
 def create_delete_function(
-    resource_def: Mapping[str, Any], model: type[BaseModel]
+    resource_def: Mapping[str, Any],
+    model: type[BaseModel],
+    repository: sql.ResourceRepository,
 ) -> Callable[[Context, ResourceIdentifier], Awaitable[dict[str, Any] | ServiceError]]:
-    repository = sql.get_for_resource(resource_def, model)
-
     async def delete(
         ctx: Context, id: ResourceIdentifier
     ) -> dict[str, Any] | ServiceError:
@@ -0,0 +1,187 @@
+import contextlib
+import sqlite3
+from collections.abc import AsyncIterator
+from collections.abc import Callable
+from datetime import datetime
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+from uuid import UUID
+from uuid import uuid4
+
+import httpx
+import pytest
+from pydantic.fields import FieldInfo
+
+from noapi import __main__ as noapi_main
+from noapi import controllers
+from noapi._typing import Specification
+
+# apis built from a specification, as they would be served, but backed by a
+# temporary sqlite database & reached through an in-process asgi client.
+
+# sqlite stores uuids as text, but unlike the other drivers, it won't
+# convert them itself.
+sqlite3.register_adapter(UUID, str)
+
+EPOCH = datetime(2023, 1, 1)
+
+SCHEMA = """\
+CREATE TABLE accounts (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
+CREATE TABLE sessions (
+    id TEXT PRIMARY KEY,
+    account_id TEXT NOT NULL,
+    created_at TIMESTAMP NOT NULL,
+    updated_at TIMESTAMP NOT NULL
+);
+CREATE INDEX sessions_account_id_created_at ON sessions (account_id, created_at);
+"""
+
+
+def create_account_resource(**resource_def: Any) -> dict[str, Any]:
+    return {
+        "name": "Account",
+        "table_name": "accounts",
+        "methods": [method.value for method in controllers.Method],
+        "model": {
+            "id": (UUID, FieldInfo(default_factory=uuid4)),
+            "name": (str, "John"),
+            "created_at": (datetime, FieldInfo(default_factory=datetime.now)),
+            "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
+        },
+        "backing_service": "sqlite",
+        **resource_def,
+    }
+
+
+def create_session_resource(**resource_def: Any) -> dict[str, Any]:
+    return {
+        "name": "Session",
+        "table_name": "sessions",
+        "methods": ["get_many", "get_one", "post"],
+        "model": {
+            "id": (UUID, FieldInfo(default_factory=uuid4)),
+            "account_id": (UUID, FieldInfo(default_factory=uuid4)),
+            "created_at": (datetime, FieldInfo(default_factory=datetime.now)),
+            "updated_at": (datetime, FieldInfo(default_factory=datetime.now)),
+        },
+        "backing_service": "sqlite",
+        "indexes": [["account_id", "created_at"]],
+        "filterable": ["account_id"],
+        **resource_def,
+    }
+
+
+def create_database(path: Path) -> Path:
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        connection.executescript(SCHEMA)
+
+    return path
+
+
+@pytest.fixture
+def database_path(tmp_path: Path) -> Path:
+    return create_database(tmp_path / "noapi.db")
+
+
+def create_specification(
+    database_path: Path, *resource_defs: dict[str, Any], **server_def: Any
+) -> Specification:
+    return {
+        "services": [
+            {
+                "name": "sqlite",
+                "type": "sql",
+                "driver": "sqlite",
+                "user": "",
+                "password": "",
+                "host": "",
+                "port": 0,
+                "database": str(database_path),
+            },
+        ],
+        "resources": list(resource_defs) or [create_account_resource()],
+        "server": server_def,
+    }
+
+
+def insert_accounts(database_path: Path, count: int) -> list[dict[str, Any]]:
+    # ordered by id, as keyset pages are
+    accounts = sorted(
+        (
+            {
+                "id": str(uuid4()),
+                "name": f"John #{i}",
+                "created_at": EPOCH + timedelta(seconds=i),
+                "updated_at": EPOCH + timedelta(seconds=i),
+            }
+            for i in range(count)
+        ),
+        key=lambda account: account["id"],
+    )
+
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.executemany(
+            "INSERT INTO accounts VALUES (:id, :name, :created_at, :updated_at)",
+            accounts,
+        )
+        connection.commit()
+
+    return accounts
+
+
+def insert_sessions(
+    database_path: Path, account_id: str, count: int
+) -> list[dict[str, Any]]:
+    sessions = [
+        {
+            "id": str(uuid4()),
+            "account_id": account_id,
+            "created_at": EPOCH + timedelta(minutes=i),
+            "updated_at": EPOCH + timedelta(minutes=i),
+        }
+        for i in range(count)
+    ]
+
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.executemany(
+            "INSERT INTO sessions VALUES (:id, :account_id, :created_at, :updated_at)",
+            sessions,
+        )
+        connection.commit()
+
+    return sessions
+
+
+@contextlib.asynccontextmanager
+async def serve(specification: Specification) -> AsyncIterator[httpx.AsyncClient]:
+    api = noapi_main.create_api(specification)
+
+    # the transport doesn't run the app's lifespan
+    await api.router.startup()
+    try:
+        transport = httpx.ASGITransport(app=api)
+        async with httpx.AsyncClient(
+            transport=transport, base_url="http://noapi"
+        ) as client:
+            yield client
+    finally:
+        await api.router.shutdown()
+
+
+@pytest.fixture
+def create_client(
+    database_path: Path,
+) -> Callable[..., contextlib.AbstractAsyncContextManager[httpx.AsyncClient]]:
+    # create_client(resource_def, ..., **server_def)
+    def create_client(
+        *resource_defs: dict[str, Any], **server_def: Any
+    ) -> contextlib.AbstractAsyncContextManager[httpx.AsyncClient]:
+        return serve(create_specification(database_path, *resource_defs, **server_def))
+
+    return create_client
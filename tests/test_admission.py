@@ -0,0 +1,130 @@
+import asyncio
+
+import fastapi
+import pytest
+from conftest import create_account_resource
+from conftest import create_specification
+from conftest import serve
+
+from noapi import controllers
+from noapi.rest.admission import Limiter
+
+ID = "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"
+
+
+async def test_requests_within_the_limit_are_admitted():
+    limiter = Limiter(max_concurrent=2, max_queued=0, queue_timeout_seconds=1)
+
+    assert await limiter.acquire()
+    assert await limiter.acquire()
+    assert not await limiter.acquire()
+    assert limiter.rejected_queue_full == 1
+
+    limiter.release()
+    assert await limiter.acquire()
+    assert limiter.active == 2
+
+
+async def test_queued_requests_are_admitted_in_order():
+    limiter = Limiter(max_concurrent=1, max_queued=2, queue_timeout_seconds=1)
+    assert await limiter.acquire()
+
+    admitted = []
+
+    async def acquire(name):
+        assert await limiter.acquire()
+        admitted.append(name)
+
+    waiters = [asyncio.create_task(acquire(name)) for name in ("first", "second")]
+    await asyncio.sleep(0)
+    assert limiter.queued == 2
+
+    limiter.release()
+    await waiters[0]
+    limiter.release()
+    await waiters[1]
+
+    assert admitted == ["first", "second"]
+    assert limiter.active == 1
+
+
+async def test_queued_requests_time_out():
+    limiter = Limiter(max_concurrent=1, max_queued=1, queue_timeout_seconds=0.01)
+    assert await limiter.acquire()
+
+    assert not await limiter.acquire()
+    assert limiter.rejected_queue_timeout == 1
+    assert limiter.queued == 0
+
+
+async def test_a_release_racing_a_queue_timeout():
+    limiter = Limiter(max_concurrent=1, max_queued=1, queue_timeout_seconds=0.01)
+    assert await limiter.acquire()
+
+    queued = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter = limiter._waiters[0]
+    while not waiter.cancelled():
+        await asyncio.sleep(0)
+
+    # released as the queued request gives up, but before it has dequeued itself
+    limiter.release()
+
+    assert not await queued
+    assert limiter.rejected_queue_timeout == 1
+    assert limiter.active == 0
+    assert limiter.queued == 0
+
+
+@pytest.fixture
+def release(monkeypatch):
+    # get_one holds its request (& so its admission) until released
+    release = asyncio.Event()
+
+    def create_get_one_function(resource_def, model, usecases):
+        async def function(request: fastapi.Request) -> fastapi.Response:
+            if "x-hold" in request.headers:
+                await release.wait()
+
+            return fastapi.Response(status_code=204)
+
+        return function
+
+    monkeypatch.setattr(controllers, "create_get_one_function", create_get_one_function)
+    return release
+
+
+async def test_requests_beyond_the_limit_are_turned_away(create_client, release):
+    resource_def = create_account_resource(
+        concurrency_limit={"max_concurrent": 1, "retry_after": 3}
+    )
+    async with create_client(resource_def) as client:
+        held = asyncio.create_task(
+            client.get(f"/account/{ID}", headers={"x-hold": "1"})
+        )
+        await asyncio.sleep(0.05)
+
+        response = await client.get(f"/account/{ID}")
+        assert response.status_code == 503
+        assert response.headers["retry-after"] == "3"
+        assert response.json()["error"] == "server.overloaded"
+
+        release.set()
+        assert (await held).status_code == 204
+        assert (await client.get(f"/account/{ID}")).status_code == 204
+
+
+async def test_apps_have_limiters_of_their_own(database_path, release):
+    resource_def = create_account_resource(concurrency_limit={"max_concurrent": 1})
+    async with (
+        serve(create_specification(database_path, resource_def)) as a,
+        serve(create_specification(database_path, resource_def)) as b,
+    ):
+        held = asyncio.create_task(a.get(f"/account/{ID}", headers={"x-hold": "1"}))
+        await asyncio.sleep(0.05)
+
+        response = await b.get(f"/account/{ID}")
+        assert response.status_code == 204
+
+        release.set()
+        await held
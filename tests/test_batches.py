@@ -0,0 +1,94 @@
+import types
+import uuid
+
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+from noapi import usecases
+
+MISSING_ID = "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"
+
+
+async def test_get_batch(create_client, database_path):
+    accounts = insert_accounts(database_path, 3)
+
+    async with create_client() as client:
+        # in the order requested, without duplicates or missing records
+        ids = [accounts[2]["id"], MISSING_ID, accounts[0]["id"], accounts[2]["id"]]
+        response = await client.get("/account/batch", params={"ids": ",".join(ids)})
+
+    assert response.status_code == 200
+    assert [rec["id"] for rec in response.json()["data"]] == [
+        accounts[2]["id"],
+        accounts[0]["id"],
+    ]
+
+
+async def test_get_batch_ids_are_validated(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        # in any spelling of the id's type
+        ids = [account["id"].upper(), account["id"]]
+        response = await client.get("/account/batch", params={"ids": ",".join(ids)})
+        assert response.status_code == 200
+        assert [rec["id"] for rec in response.json()["data"]] == [account["id"]]
+
+        response = await client.get(
+            "/account/batch", params={"ids": f"{account['id']},not-an-id"}
+        )
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "resource.invalid_id"
+
+
+async def test_get_batch_matches_records_to_ids_however_spelled():
+    # as a database with a uuid column returns it
+    rec = {"id": uuid.UUID(MISSING_ID), "name": "John"}
+
+    async def get_batch(ctx, ids):
+        return [rec]
+
+    repository = {"get_batch": get_batch}
+    get_batch_usecase = usecases.create_get_batch_function(
+        create_account_resource(), None, repository, repository
+    )
+    ctx = types.SimpleNamespace(prefers_primary=lambda service_name: False)
+
+    assert await get_batch_usecase(ctx, [MISSING_ID.upper()]) == [rec]
+
+
+async def test_get_batch_size_is_bounded(create_client, database_path):
+    accounts = insert_accounts(database_path, 3)
+
+    resource_def = create_account_resource(max_batch_size=2)
+    async with create_client(resource_def) as client:
+        ids = ",".join(account["id"] for account in accounts)
+        response = await client.get("/account/batch", params={"ids": ids})
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "resource.batch_too_large"
+
+
+async def test_post_batch(create_client):
+    async with create_client() as client:
+        response = await client.post(
+            "/account/batch", json=[{"name": "John"}, {"name": "Jane"}]
+        )
+        assert response.status_code == 200
+
+        recs = response.json()["data"]
+        assert [rec["name"] for rec in recs] == ["John", "Jane"]
+
+        ids = ",".join(rec["id"] for rec in recs)
+        response = await client.get("/account/batch", params={"ids": ids})
+
+    assert response.json()["data"] == recs
+
+
+async def test_post_batch_size_is_bounded(create_client):
+    resource_def = create_account_resource(max_batch_size=2)
+    async with create_client(resource_def) as client:
+        response = await client.post("/account/batch", json=[{}, {}, {}])
+
+    assert response.status_code == 400
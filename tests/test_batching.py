@@ -0,0 +1,153 @@
+import asyncio
+import contextlib
+import sqlite3
+import types
+import uuid
+
+from conftest import create_account_resource
+from conftest import create_specification
+from conftest import insert_accounts
+from conftest import serve
+
+from noapi.batching import Batcher
+from noapi.repositories import loader
+
+# no deadline
+CTX = types.SimpleNamespace(deadline=None)
+
+
+async def test_concurrent_submissions_are_batched():
+    batches = []
+
+    async def function(ctx, items):
+        batches.append(items)
+        return [item * 2 for item in items]
+
+    batcher = Batcher(function)
+    results = await asyncio.gather(*(batcher.submit(CTX, i) for i in range(5)))
+
+    assert results == [0, 2, 4, 6, 8]
+    assert batches == [[0, 1, 2, 3, 4]]
+    assert batcher.batch_sizes.count == 1
+
+
+async def test_batches_are_bounded():
+    batches = []
+
+    async def function(ctx, items):
+        batches.append(items)
+        return items
+
+    batcher = Batcher(function, max_batch_size=2)
+    await asyncio.gather(*(batcher.submit(CTX, i) for i in range(5)))
+
+    assert batches == [[0, 1], [2, 3], [4]]
+
+
+async def test_exceptions_are_raised_to_their_callers_alone():
+    async def function(ctx, items):
+        return [ValueError(item) if item == 1 else item for item in items]
+
+    batcher = Batcher(function)
+    results = await asyncio.gather(
+        *(batcher.submit(CTX, i) for i in range(3)), return_exceptions=True
+    )
+
+    assert results[0] == 0
+    assert isinstance(results[1], ValueError)
+    assert results[2] == 2
+
+
+async def test_failed_batches_fail_every_caller():
+    async def function(ctx, items):
+        raise ValueError("failed")
+
+    batcher = Batcher(function)
+    results = await asyncio.gather(
+        *(batcher.submit(CTX, i) for i in range(3)), return_exceptions=True
+    )
+
+    assert all(isinstance(result, ValueError) for result in results)
+
+
+async def test_cancelled_batches_cancel_every_caller():
+    started = asyncio.Event()
+
+    async def function(ctx, items):
+        started.set()
+        await asyncio.sleep(1)
+        return items
+
+    batcher = Batcher(function)
+    callers = [asyncio.create_task(batcher.submit(CTX, i)) for i in range(3)]
+    await started.wait()
+
+    [task] = batcher._tasks
+    task.cancel()
+
+    results = await asyncio.wait_for(
+        asyncio.gather(*callers, return_exceptions=True), timeout=0.5
+    )
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+async def test_loaded_records_are_matched_to_ids_however_spelled():
+    id = "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"
+    # as a database with a uuid column returns it
+    rec = {"id": uuid.UUID(id), "name": "John"}
+    batches = []
+
+    async def get_batch(ctx, ids):
+        batches.append(ids)
+        return [rec]
+
+    batcher = loader.create_loader(
+        create_account_resource(name="UUIDAccount", batch_reads={}),
+        {"get_batch": get_batch},
+    )
+    results = await asyncio.gather(
+        batcher.submit(CTX, id.upper()), batcher.submit(CTX, id)
+    )
+
+    assert results == [rec, rec]
+    assert len(batches[0]) == 1
+
+
+async def test_concurrent_reads_are_batched(create_client, database_path):
+    accounts = insert_accounts(database_path, 4)
+
+    resource_def = create_account_resource(name="BatchedAccount", batch_reads={})
+    async with create_client(resource_def) as client:
+        responses = await asyncio.gather(
+            *(client.get(f"/batchedaccount/{account['id']}") for account in accounts),
+            client.get("/batchedaccount/0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"),
+        )
+
+        stats = loader.get_batch_size_stats()["BatchedAccount"]
+
+    assert [response.json()["data"]["id"] for response in responses[:-1]] == [
+        account["id"] for account in accounts
+    ]
+    assert responses[-1].status_code == 404
+    assert stats["count"] < len(responses)
+
+
+async def test_apps_have_loaders_of_their_own(database_path):
+    # the same resource, served by two apps, from two tables
+    account = insert_accounts(database_path, 1)[0]
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.execute("CREATE TABLE archived_accounts AS SELECT * FROM accounts")
+        connection.execute("UPDATE archived_accounts SET name = 'Jane'")
+        connection.commit()
+
+    account_def = create_account_resource(batch_reads={})
+    archived_account_def = {**account_def, "table_name": "archived_accounts"}
+    async with (
+        serve(create_specification(database_path, account_def)) as a,
+        serve(create_specification(database_path, archived_account_def)) as b,
+    ):
+        response = await b.get(f"/account/{account['id']}")
+        assert response.json()["data"]["name"] == "Jane"
+
+        response = await a.get(f"/account/{account['id']}")
+        assert response.json()["data"]["name"] == account["name"]
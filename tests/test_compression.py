@@ -0,0 +1,78 @@
+import contextlib
+import sqlite3
+
+from conftest import insert_accounts
+
+from noapi.rest import compression
+
+COMPRESSION = {"encodings": ["gzip"], "min_size": 0}
+
+
+def test_accepted_encodings_are_parsed():
+    assert compression._parse_accept_encoding("gzip, br;q=0.5, zstd;q=0") == {
+        "gzip",
+        "br",
+    }
+
+
+async def test_responses_are_compressed(create_client, database_path):
+    insert_accounts(database_path, 3)
+
+    async with create_client(compression=COMPRESSION) as client:
+        plain = await client.get("/account", headers={"accept-encoding": "identity"})
+        response = await client.get("/account", headers={"accept-encoding": "gzip"})
+
+    assert "content-encoding" not in plain.headers
+    assert response.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in response.headers["vary"]
+    assert response.json() == plain.json()
+
+    # the same content, but no longer the same bytes
+    assert response.headers["etag"].startswith("W/")
+
+
+async def test_small_responses_arent_compressed(create_client, database_path):
+    insert_accounts(database_path, 1)
+
+    async with create_client(compression={"min_size": 1 << 20}) as client:
+        response = await client.get("/account", headers={"accept-encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+
+
+async def test_cached_bodies_are_the_current_ones(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client(compression=COMPRESSION) as client:
+        first = await client.get(
+            f"/account/{account['id']}", headers={"accept-encoding": "gzip"}
+        )
+
+        # written elsewhere, without bumping its version (so with the same etag)
+        with contextlib.closing(sqlite3.connect(database_path)) as connection:
+            connection.execute("UPDATE accounts SET name = 'Jane'")
+            connection.commit()
+
+        second = await client.get(
+            f"/account/{account['id']}", headers={"accept-encoding": "gzip"}
+        )
+
+    assert first.headers["etag"] == second.headers["etag"]
+    assert second.json()["data"]["name"] == "Jane"
+
+
+async def test_cached_bodies_are_per_query(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client(compression=COMPRESSION) as client:
+        whole = await client.get(
+            f"/account/{account['id']}", headers={"accept-encoding": "gzip"}
+        )
+        sparse = await client.get(
+            f"/account/{account['id']}",
+            params={"fields": "id,name"},
+            headers={"accept-encoding": "gzip"},
+        )
+
+    assert whole.json()["data"]["created_at"] is not None
+    assert sparse.json()["data"].keys() == {"id", "name"}
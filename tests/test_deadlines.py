@@ -0,0 +1,209 @@
+import asyncio
+import contextlib
+import types
+
+import pytest
+from conftest import create_account_resource
+
+from noapi import deadlines
+from noapi import usecases
+from noapi.batching import Batcher
+from noapi.context import Context
+from noapi.deadlines import DeadlineExceeded
+from noapi.models import BaseModel
+from noapi.repositories import sql
+
+
+class FakeContext(Context):
+    def __init__(self, timeout: float | None = None) -> None:
+        if timeout is not None:
+            self.deadline = asyncio.get_running_loop().time() + timeout
+
+    def get_database_client(self, service_name, read_only=False):
+        raise NotImplementedError
+
+    def mark_written(self, service_name):
+        pass
+
+    def prefers_primary(self, service_name):
+        return False
+
+    @property
+    def http_client(self):
+        raise NotImplementedError
+
+    def get_redis_client(self, service_name):
+        raise NotImplementedError
+
+
+async def test_work_within_the_deadline_completes():
+    assert await deadlines.wait(FakeContext(1), asyncio.sleep(0, "done")) == "done"
+    assert await deadlines.wait(FakeContext(), asyncio.sleep(0, "done")) == "done"
+
+
+async def test_reads_are_cancelled_at_the_deadline():
+    cancelled = False
+
+    @deadlines.bound
+    async def read(ctx):
+        nonlocal cancelled
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled = True
+            raise
+
+    with pytest.raises(DeadlineExceeded):
+        await read(FakeContext(0.01))
+
+    assert cancelled
+
+
+async def test_timeouts_of_the_work_itself_arent_deadlines():
+    @deadlines.bound
+    async def read(ctx):
+        raise asyncio.TimeoutError
+
+    with pytest.raises(asyncio.TimeoutError):
+        await read(FakeContext(1))
+
+
+async def test_writes_arent_sent_after_the_deadline():
+    sent = False
+
+    @deadlines.checked
+    async def write(ctx):
+        nonlocal sent
+        sent = True
+
+    ctx = FakeContext(0.01)
+    await asyncio.sleep(0.02)
+    with pytest.raises(DeadlineExceeded):
+        await write(ctx)
+
+    assert not sent
+
+
+async def test_sent_writes_are_seen_through():
+    @deadlines.checked
+    async def write(ctx):
+        await asyncio.sleep(0.05)
+        return "written"
+
+    assert await write(FakeContext(0.01)) == "written"
+
+
+class Model(BaseModel):
+    name: str
+
+
+async def test_coalesced_reads_are_seen_through_for_every_request():
+    reads = 0
+    finished = asyncio.Event()
+
+    # as the sql repository's reads are bound by the deadline
+    @deadlines.bound
+    async def get_one(ctx, id, fields):
+        nonlocal reads
+        reads += 1
+        await finished.wait()
+        return {"id": id, "name": "John"}
+
+    repository = {"get_one": get_one}
+    get_one_usecase = usecases.create_get_one_function(
+        create_account_resource(coalesce_reads=["get_one"]),
+        Model,
+        repository,
+        repository,
+    )
+
+    impatient = asyncio.create_task(get_one_usecase(FakeContext(0.01), "1", None))
+    patient = asyncio.create_task(get_one_usecase(FakeContext(1), "1", None))
+
+    with pytest.raises(DeadlineExceeded):
+        await impatient
+
+    finished.set()
+    assert await patient == {"id": "1", "name": "John"}
+    assert reads == 1
+
+
+async def test_batches_are_seen_through_for_every_request():
+    finished = asyncio.Event()
+
+    async def function(ctx, items):
+        assert ctx.deadline is None
+        await finished.wait()
+        return items
+
+    batcher = Batcher(function)
+    impatient = asyncio.create_task(
+        deadlines.wait(FakeContext(0.01), batcher.submit(FakeContext(0.01), "a"))
+    )
+    patient = asyncio.create_task(batcher.submit(FakeContext(1), "b"))
+
+    with pytest.raises(DeadlineExceeded):
+        await impatient
+
+    finished.set()
+    assert await patient == "b"
+
+
+async def test_batches_leave_out_requests_past_their_deadlines():
+    batches = []
+
+    async def function(ctx, items):
+        batches.append(items)
+        return items
+
+    batcher = Batcher(function, window=0.02)
+    results = await asyncio.gather(
+        batcher.submit(FakeContext(0.01), "a"),
+        batcher.submit(FakeContext(1), "b"),
+        return_exceptions=True,
+    )
+
+    assert isinstance(results[0], DeadlineExceeded)
+    assert results[1] == "b"
+    assert batches == [["b"]]
+
+
+class RawConnection:
+    def __init__(self) -> None:
+        self.closed = False
+
+    def close(self):
+        self.closed = True
+
+
+class SlowDatabase:
+    # a mysql database whose statements take a second
+    url = types.SimpleNamespace(dialect="mysql")
+
+    def __init__(self) -> None:
+        self.raw_connection = RawConnection()
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        yield self
+
+    async def fetch_one(self, query):
+        await asyncio.sleep(1)
+
+
+async def test_cancelled_reads_close_their_connections():
+    database = SlowDatabase()
+
+    class DatabaseContext(FakeContext):
+        def get_database_client(self, service_name, read_only=False):
+            return database
+
+    class Account(BaseModel):
+        id: str
+        name: str
+
+    get_one = sql.get_for_resource(create_account_resource(), Account)["get_one"]
+    with pytest.raises(DeadlineExceeded):
+        await get_one(DatabaseContext(0.01), "1", None)
+
+    assert database.raw_connection.closed
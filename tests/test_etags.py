@@ -0,0 +1,111 @@
+import contextlib
+import sqlite3
+
+from conftest import create_session_resource
+from conftest import EPOCH
+from conftest import insert_accounts
+
+ACCOUNT_ID = "00000000-0000-4000-8000-000000000000"
+OTHER_ACCOUNT_ID = "11111111-1111-4111-8111-111111111111"
+
+
+def insert_session(database_path, id, account_id):
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.execute(
+            "INSERT INTO sessions VALUES (?, ?, ?, ?)", (id, account_id, EPOCH, EPOCH)
+        )
+        connection.commit()
+
+
+async def test_unmodified_records_arent_sent_again(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.get(f"/account/{account['id']}")
+        etag = response.headers["etag"]
+
+        response = await client.get(
+            f"/account/{account['id']}", headers={"if-none-match": etag}
+        )
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+        response = await client.get(
+            f"/account/{account['id']}", headers={"if-none-match": '"other"'}
+        )
+        assert response.status_code == 200
+
+
+async def test_records_etags_depend_on_their_fields(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.get(f"/account/{account['id']}")
+        sparse_response = await client.get(
+            f"/account/{account['id']}", params={"fields": "id,name,updated_at"}
+        )
+
+    assert response.headers["etag"] != sparse_response.headers["etag"]
+
+
+async def test_unmodified_pages_arent_sent_again(create_client, database_path):
+    insert_accounts(database_path, 3)
+
+    async with create_client() as client:
+        response = await client.get("/account")
+        etag = response.headers["etag"]
+
+        response = await client.get("/account", headers={"if-none-match": etag})
+        assert response.status_code == 304
+
+        # a page changes when records leave it
+        first_id = (await client.get("/account")).json()["data"][0]["id"]
+        await client.delete(f"/account/{first_id}")
+
+        response = await client.get("/account", headers={"if-none-match": etag})
+        assert response.status_code == 200
+
+
+async def test_keyset_pages_change_with_their_cursor(create_client, database_path):
+    insert_session(database_path, "00000000-0000-4000-8000-000000000001", ACCOUNT_ID)
+
+    resource_def = create_session_resource(pagination="keyset")
+    async with create_client(resource_def) as client:
+        response = await client.get("/session", params={"page_size": 1})
+        assert response.json()["meta"]["next_cursor"] is None
+        etag = response.headers["etag"]
+
+        # a record is added after the page; the records on it are the same,
+        # but there's now a page after it
+        insert_session(
+            database_path, "00000000-0000-4000-8000-000000000002", ACCOUNT_ID
+        )
+
+        response = await client.get(
+            "/session", params={"page_size": 1}, headers={"if-none-match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["meta"]["next_cursor"] is not None
+
+
+async def test_filtered_keyset_pages_dont_collide(create_client, database_path):
+    insert_session(database_path, "00000000-0000-4000-8000-000000000001", ACCOUNT_ID)
+    insert_session(
+        database_path, "00000000-0000-4000-8000-000000000002", OTHER_ACCOUNT_ID
+    )
+
+    resource_def = create_session_resource(
+        pagination="keyset", pagination_key="account_id"
+    )
+    async with create_client(resource_def) as client:
+        # the same record, the only one of the filtered pages
+        filtered = await client.get(
+            "/session", params={"page_size": 1, "account_id": ACCOUNT_ID}
+        )
+        unfiltered = await client.get("/session", params={"page_size": 1})
+
+    assert filtered.json()["data"] == unfiltered.json()["data"]
+    assert filtered.json()["meta"]["next_cursor"] is None
+    assert unfiltered.json()["meta"]["next_cursor"] is not None
+    assert filtered.headers["etag"] != unfiltered.headers["etag"]
@@ -0,0 +1,113 @@
+import contextlib
+import json
+import sqlite3
+
+import pytest
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+
+@pytest.mark.parametrize("trusted_reads", [False, True])
+async def test_records_are_projected(create_client, database_path, trusted_reads):
+    account = insert_accounts(database_path, 1)[0]
+
+    resource_def = create_account_resource(trusted_reads=trusted_reads)
+    async with create_client(resource_def) as client:
+        response = await client.get(
+            f"/account/{account['id']}", params={"fields": "name, id"}
+        )
+        assert response.json()["data"] == {"id": account["id"], "name": account["name"]}
+
+        response = await client.get("/account", params={"fields": "name"})
+        assert response.json()["data"] == [{"name": account["name"]}]
+
+        response = await client.get(
+            "/account", params={"fields": "name", "stream": "true"}
+        )
+        recs = [json.loads(line) for line in response.text.splitlines()]
+        assert recs == [{"name": account["name"]}]
+
+
+async def test_keyset_pages_are_projected(create_client, database_path):
+    accounts = insert_accounts(database_path, 3)
+
+    # the cursor is made from the pagination key, even if it isn't selected
+    resource_def = create_account_resource(pagination="keyset")
+    async with create_client(resource_def) as client:
+        params = {"fields": "name", "page_size": 2}
+        first = (await client.get("/account", params=params)).json()
+        params["cursor"] = first["meta"]["next_cursor"]
+        second = (await client.get("/account", params=params)).json()
+
+    recs = first["data"] + second["data"]
+    assert recs == [{"name": account["name"]} for account in accounts]
+
+
+@pytest.mark.parametrize("fields", ["password", "name,password", "", ","])
+async def test_unknown_fields_are_rejected(create_client, database_path, fields):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        for url in (f"/account/{account['id']}", "/account"):
+            response = await client.get(url, params={"fields": fields})
+            assert response.status_code == 400
+            assert response.json()["error"] == "resource.invalid_fields"
+
+
+async def test_projections_are_validated_by_their_own_etags(
+    create_client, database_path
+):
+    account = insert_accounts(database_path, 1)[0]
+    url = f"/account/{account['id']}"
+
+    async with create_client() as client:
+        etag = (await client.get(url)).headers["etag"]
+        sparse_params = {"fields": "name,updated_at"}
+        sparse_etag = (await client.get(url, params=sparse_params)).headers["etag"]
+
+        # a projection isn't a representation of the whole record, or another
+        response = await client.get(
+            url, params=sparse_params, headers={"if-none-match": etag}
+        )
+        assert response.status_code == 200
+
+        response = await client.get(url, headers={"if-none-match": sparse_etag})
+        assert response.status_code == 200
+
+        response = await client.get(
+            url, params=sparse_params, headers={"if-none-match": sparse_etag}
+        )
+        assert response.status_code == 304
+
+        # without the version, it's validated by its content instead
+        response = await client.get(url, params={"fields": "name"})
+        content_etag = response.headers["etag"]
+        assert content_etag not in (etag, sparse_etag)
+
+        response = await client.get(
+            url, params={"fields": "name"}, headers={"if-none-match": content_etag}
+        )
+        assert response.status_code == 304
+
+
+async def test_cached_records_are_projected(create_client, database_path):
+    accounts = insert_accounts(database_path, 2)
+    url = f"/account/{accounts[0]['id']}"
+
+    # only whole records are cached; a sparse miss reads just its fields
+    resource_def = create_account_resource(cache={"ttl_seconds": 60})
+    async with create_client(resource_def) as client:
+        await client.get(f"/account/{accounts[1]['id']}", params={"fields": "name"})
+        await client.get(url)
+
+        with contextlib.closing(sqlite3.connect(database_path)) as connection:
+            connection.execute("DELETE FROM accounts")
+            connection.commit()
+
+        response = await client.get(url, params={"fields": "name"})
+        assert response.json()["data"] == {"name": accounts[0]["name"]}
+
+        response = await client.get(
+            f"/account/{accounts[1]['id']}", params={"fields": "name"}
+        )
+        assert response.status_code == 404
@@ -0,0 +1,93 @@
+import logging
+
+import fastapi
+import pytest
+from conftest import create_specification
+from conftest import insert_accounts
+
+import noapi.logger as logger
+from noapi import __main__ as noapi_main
+from noapi import controllers
+from noapi.rest.context import RestContext
+
+
+def test_logging_can_be_reconfigured():
+    logger.configure_logging("production", "INFO")
+    logger.configure_logging("local", "warning")
+
+    queue_handlers = [
+        handler
+        for handler in logging.getLogger().handlers
+        if isinstance(handler, logger._QueueHandler)
+    ]
+    assert len(queue_handlers) == 1
+    assert logging.getLogger().level == logging.WARNING
+
+
+def test_unknown_log_levels_are_rejected():
+    with pytest.raises(ValueError):
+        logger.get_level("LOUD")
+
+
+async def test_requests_are_logged(create_client, database_path, caplog):
+    insert_accounts(database_path, 1)
+
+    # at the level the app configured, rather than the one caplog would set
+    async with create_client(access_log={"sample_rate": 1.0}) as client:
+        response = await client.get("/account")
+
+    assert response.status_code == 200
+
+    [event] = [
+        record.msg
+        for record in caplog.records
+        if isinstance(record.msg, dict) and record.msg["event"] == "Served request"
+    ]
+    assert event["resource"] == "Account"
+    assert event["status_code"] == 200
+
+
+async def test_requests_which_raise_are_logged(create_client, monkeypatch, caplog):
+    def create_get_one_function(resource_def, model, usecases):
+        async def function(
+            id: str, ctx: RestContext = fastapi.Depends()
+        ) -> fastapi.Response:
+            raise RuntimeError("failed")
+
+        return function
+
+    monkeypatch.setattr(controllers, "create_get_one_function", create_get_one_function)
+
+    # whatever the sample rate
+    async with create_client(access_log={"sample_rate": 0.0}) as client:
+        with pytest.raises(Exception):
+            await client.get("/account/1")
+
+    [event] = [
+        record.msg
+        for record in caplog.records
+        if isinstance(record.msg, dict) and record.msg["event"] == "Served request"
+    ]
+    assert event["method"] == "get_one"
+    assert event["status_code"] == 500
+
+
+@pytest.mark.parametrize(
+    ("log_level", "uvicorn_access_log"),
+    [("INFO", False), ("DEBUG", False), ("WARNING", None)],
+)
+def test_uvicorn_access_log_is_replaced_only_when_ours_is_logged(
+    monkeypatch, database_path, log_level, uvicorn_access_log
+):
+    options = {}
+    monkeypatch.setattr(
+        noapi_main.uvicorn, "run", lambda app, **kwargs: options.update(kwargs)
+    )
+
+    specification = create_specification(
+        database_path, access_log={}, log_level=log_level
+    )
+    assert noapi_main.main(specification) == 0
+
+    assert options.get("access_log") == uvicorn_access_log
+    assert options["log_level"] == logging.getLevelName(log_level)
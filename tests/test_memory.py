@@ -0,0 +1,91 @@
+import contextlib
+import sqlite3
+
+from conftest import create_account_resource
+from conftest import create_database
+from conftest import create_specification
+from conftest import insert_accounts
+from conftest import serve
+
+from noapi.repositories import memory
+
+
+def test_least_recently_used_entries_are_evicted():
+    cache = memory.LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+    assert cache.evictions == 1
+
+
+def test_expired_entries_are_misses():
+    cache = memory.LRUCache(max_entries=2, ttl_seconds=0)
+    cache.set("a", 1)
+
+    assert cache.get("a") is None
+    assert len(cache) == 0
+
+
+def test_invalidations_bump_the_generation():
+    cache = memory.LRUCache(max_entries=2, ttl_seconds=60)
+    cache.set("a", 1)
+    generation = cache.generation
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.generation == generation + 1
+
+
+async def test_spellings_of_an_id_share_an_entry(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+    account_def = create_account_resource(cache={"ttl_seconds": 60})
+
+    async with create_client(account_def) as client:
+        assert (await client.get(f"/account/{account['id']}")).status_code == 200
+
+        # sqlite compares ids as text; only a cache hit can find this one
+        response = await client.get(f"/account/{account['id'].upper()}")
+        assert response.status_code == 200
+        assert response.json()["data"]["id"] == account["id"]
+
+
+async def test_apps_have_caches_of_their_own(tmp_path):
+    # the same record, in two databases, served by two apps
+    account = insert_accounts(create_database(tmp_path / "a.db"), 1)[0]
+    create_database(tmp_path / "b.db")
+    with contextlib.closing(sqlite3.connect(tmp_path / "b.db")) as connection:
+        connection.execute(
+            "INSERT INTO accounts VALUES (?, 'Jane', ?, ?)",
+            (account["id"], account["created_at"], account["updated_at"]),
+        )
+        connection.commit()
+
+    account_def = create_account_resource(cache={"ttl_seconds": 60})
+    async with (
+        serve(create_specification(tmp_path / "a.db", account_def)) as a,
+        serve(create_specification(tmp_path / "b.db", account_def)) as b,
+    ):
+        response = await a.get(f"/account/{account['id']}")
+        assert response.json()["data"]["name"] == account["name"]
+
+        response = await b.get(f"/account/{account['id']}")
+        assert response.json()["data"]["name"] == "Jane"
+
+
+async def test_writes_invalidate_cached_reads(create_client, database_path):
+    # the endpoints of a resource share its cache
+    account = insert_accounts(database_path, 1)[0]
+    account_def = create_account_resource(cache={"ttl_seconds": 60})
+
+    async with create_client(account_def) as client:
+        assert (await client.get(f"/account/{account['id']}")).status_code == 200
+        assert (await client.delete(f"/account/{account['id']}")).status_code == 200
+
+        response = await client.get(f"/account/{account['id']}")
+
+    assert response.status_code == 404
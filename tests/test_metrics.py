@@ -0,0 +1,141 @@
+import re
+
+import fastapi
+import pytest
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+from noapi import controllers
+from noapi import metrics
+from noapi.rest import responses
+from noapi.rest.context import RestContext
+
+# name{label="value",...} value
+SAMPLE = re.compile(r'^([a-z_]+)(?:\{((?:[a-z_]+="(?:[^"\\]|\\.)*",?)*)\})? (\S+)$')
+LABEL = re.compile(r'([a-z_]+)="((?:[^"\\]|\\.)*)"')
+
+
+def parse_metrics(text):
+    # {name: (type, [(labels, value)])}, checking the text is well-formed
+    families = {}
+    for line in text.splitlines():
+        if line.startswith("# HELP "):
+            continue
+
+        if line.startswith("# TYPE "):
+            _, _, name, type = line.split(" ")
+            assert name not in families
+            families[name] = (type, [])
+            continue
+
+        name, labels, value = SAMPLE.match(line).groups()
+        family = re.sub(r"_(bucket|sum|count)$", "", name)
+        if family not in families:
+            family = name
+
+        labels = dict(LABEL.findall(labels or ""))
+        families[family][1].append((name, labels, float(value)))
+
+    return families
+
+
+def test_metrics_are_well_formed():
+    histogram = metrics.Histogram([0.1, 1.0])
+    for value in (0.05, 0.5, 0.5, 5.0):
+        histogram.observe(value)
+
+    lines = metrics.format_histogram(
+        "noapi_test_seconds", "Test.", {('a "b"\n',): histogram}, ("label",)
+    )
+    [(type, samples)] = parse_metrics("\n".join(lines)).values()
+    assert type == "histogram"
+
+    buckets = [(labels["le"], value) for name, labels, value in samples[:3]]
+    assert buckets == [("0.1", 1), ("1.0", 3), ("+Inf", 4)]
+    assert samples[0][1]["label"] == r"a \"b\"\n"
+    assert samples[-1] == ("noapi_test_seconds_count", {"label": r"a \"b\"\n"}, 4)
+
+
+async def test_metrics_are_scraped(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    resource_def = create_account_resource(name="ScrapedAccount")
+    async with create_client(resource_def) as client:
+        await client.get(f"/scrapedaccount/{account['id']}")
+        await client.get("/scrapedaccount/00000000-0000-4000-8000-000000000000")
+
+        response = await client.get("/metrics")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    families = parse_metrics(response.text)
+    labels = {"resource": "ScrapedAccount", "method": "get_one"}
+
+    type, samples = families["noapi_requests_total"]
+    assert type == "counter"
+    assert ("noapi_requests_total", labels, 2) in samples
+
+    type, samples = families["noapi_request_errors_total"]
+    error_labels = labels | {"error": "resource.not_found"}
+    assert ("noapi_request_errors_total", error_labels, 1) in samples
+
+    type, samples = families["noapi_request_duration_seconds"]
+    assert type == "histogram"
+    assert ("noapi_request_duration_seconds_count", labels, 2) in samples
+    assert ("noapi_request_duration_seconds_bucket", labels | {"le": "+Inf"}, 2) in (
+        samples
+    )
+
+
+@pytest.fixture
+def failing_get_one(monkeypatch):
+    def create_get_one_function(resource_def, model, usecases):
+        async def function(
+            id: str, ctx: RestContext = fastapi.Depends()
+        ) -> fastapi.Response:
+            raise RuntimeError("failed")
+
+        return function
+
+    monkeypatch.setattr(controllers, "create_get_one_function", create_get_one_function)
+
+
+async def test_unhandled_exceptions_are_counted(create_client, failing_get_one):
+    resource_def = create_account_resource(name="FailingAccount")
+    async with create_client(resource_def) as client:
+        # (raised by the test client, rather than answered with a 500)
+        with pytest.raises(Exception):
+            await client.get("/failingaccount/1")
+
+    assert metrics._REQUESTS[("FailingAccount", "get_one")] == 1
+    key = ("FailingAccount", "get_one", metrics.UNHANDLED_EXCEPTION)
+    assert metrics._ERRORS[key] == 1
+
+
+@pytest.fixture
+def failing_stream(monkeypatch):
+    def create_get_many_function(resource_def, model, usecases):
+        async def function(ctx: RestContext = fastapi.Depends()) -> fastapi.Response:
+            async def body():
+                yield {"name": "John"}
+                raise RuntimeError("failed")
+
+            return responses.stream(body())
+
+        return function
+
+    monkeypatch.setattr(
+        controllers, "create_get_many_function", create_get_many_function
+    )
+
+
+async def test_streams_which_raise_are_counted(create_client, failing_stream):
+    resource_def = create_account_resource(name="FailingStreamAccount")
+    async with create_client(resource_def) as client:
+        with pytest.raises(Exception):
+            await client.get("/failingstreamaccount")
+
+    assert metrics._REQUESTS[("FailingStreamAccount", "get_many")] == 1
+    key = ("FailingStreamAccount", "get_many", metrics.UNHANDLED_EXCEPTION)
+    assert metrics._ERRORS[key] == 1
@@ -0,0 +1,103 @@
+from conftest import create_account_resource
+from conftest import create_session_resource
+from conftest import insert_accounts
+from conftest import insert_sessions
+
+from noapi import pagination
+
+
+def test_cursors_round_trip():
+    values = ["2023-01-01T00:00:00", "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"]
+    assert pagination.decode_cursor(pagination.encode_cursor(values)) == values
+
+
+def test_malformed_cursors_are_rejected():
+    assert pagination.decode_cursor("not a cursor") is None
+    assert pagination.decode_cursor(pagination.encode_cursor([]) + "!") is None
+
+    # valid json, but not a list of values
+    assert pagination.decode_cursor("eyJhIjogMX0") is None
+
+
+async def test_keyset_pages_cover_every_record_once(create_client, database_path):
+    accounts = insert_accounts(database_path, 7)
+
+    seen = []
+    async with create_client(create_account_resource(pagination="keyset")) as client:
+        params = {"page_size": 3}
+        while True:
+            response = await client.get("/account", params=params)
+            assert response.status_code == 200
+
+            body = response.json()
+            seen += [rec["id"] for rec in body["data"]]
+
+            cursor = body["meta"]["next_cursor"]
+            if cursor is None:
+                break
+
+            params["cursor"] = cursor
+
+    assert seen == [account["id"] for account in accounts]
+
+
+async def test_keyset_last_full_page_has_no_cursor(create_client, database_path):
+    insert_accounts(database_path, 4)
+
+    async with create_client(create_account_resource(pagination="keyset")) as client:
+        first = (await client.get("/account", params={"page_size": 2})).json()
+        second = (
+            await client.get(
+                "/account",
+                params={"page_size": 2, "cursor": first["meta"]["next_cursor"]},
+            )
+        ).json()
+
+    assert len(second["data"]) == 2
+    assert second["meta"]["next_cursor"] is None
+
+
+async def test_keyset_pages_break_ties_by_id(create_client, database_path):
+    account_id = str(insert_accounts(database_path, 1)[0]["id"])
+    sessions = insert_sessions(database_path, account_id, 6)
+
+    session_def = create_session_resource(
+        pagination="keyset", pagination_key="account_id"
+    )
+
+    seen = []
+    async with create_client(session_def) as client:
+        params = {"page_size": 4}
+        while True:
+            body = (await client.get("/session", params=params)).json()
+            seen += [rec["id"] for rec in body["data"]]
+            if body["meta"]["next_cursor"] is None:
+                break
+
+            params["cursor"] = body["meta"]["next_cursor"]
+
+    # every session shares the pagination key
+    assert seen == sorted(session["id"] for session in sessions)
+
+
+async def test_keyset_invalid_cursor(create_client, database_path):
+    insert_accounts(database_path, 1)
+
+    async with create_client(create_account_resource(pagination="keyset")) as client:
+        response = await client.get("/account", params={"cursor": "nonsense"})
+
+    assert response.status_code == 400
+    assert response.json()["error"] == "resource.invalid_cursor"
+
+
+async def test_page_sizes_must_be_positive(create_client, database_path):
+    insert_accounts(database_path, 2)
+
+    for pagination_def in ("keyset", "offset"):
+        resource_def = create_account_resource(pagination=pagination_def)
+        async with create_client(resource_def) as client:
+            for page_size in (0, -1):
+                response = await client.get("/account", params={"page_size": page_size})
+
+                assert response.status_code == 400
+                assert response.json()["error"] == "resource.invalid_page_size"
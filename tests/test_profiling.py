@@ -0,0 +1,108 @@
+import asyncio
+import re
+
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+from noapi.repositories import loader
+
+ADMIN_TOKEN = "secret"
+
+
+def parse_server_timing(header):
+    # {name: duration, or description}
+    entries = {}
+    for entry in header.split(", "):
+        name, param = entry.split(";")
+        match = re.fullmatch(r'dur=(\d+\.\d{3})|desc="(.*)"', param)
+        entries[name] = float(match[1]) if match[1] is not None else match[2]
+
+    return entries
+
+
+async def test_server_timing_is_opt_in(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.get(f"/account/{account['id']}")
+        assert "server-timing" not in response.headers
+
+    async with create_client(server_timing=True) as client:
+        response = await client.get(
+            f"/account/{account['id']}", headers={"x-request-id": "abc"}
+        )
+
+    timings = parse_server_timing(response.headers["server-timing"])
+    assert timings["request"] == "abc"
+    assert 0 < timings["db"] <= timings["total"]
+
+
+async def test_batched_reads_are_timed_for_every_request(create_client, database_path):
+    accounts = insert_accounts(database_path, 4)
+
+    resource_def = create_account_resource(name="TimedAccount", batch_reads={})
+    async with create_client(resource_def, server_timing=True) as client:
+        responses = await asyncio.gather(
+            *(client.get(f"/timedaccount/{account['id']}") for account in accounts)
+        )
+
+        stats = loader.get_batch_size_stats()["TimedAccount"]
+
+    assert stats["count"] < len(accounts)
+
+    # not just by the request whose task read the batch
+    for response in responses:
+        timings = parse_server_timing(response.headers["server-timing"])
+        assert timings["db"] > 0
+
+
+async def test_profiles_are_captured(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client(admin_token=ADMIN_TOKEN) as client:
+        authorization = {"authorization": f"Bearer {ADMIN_TOKEN}"}
+        profile = asyncio.create_task(
+            client.get(
+                "/admin/profile",
+                params={"seconds": 0.1, "limit": 5},
+                headers=authorization,
+            )
+        )
+        await asyncio.sleep(0.01)
+
+        await client.get(f"/account/{account['id']}", headers={"x-request-id": "abc"})
+
+        # one at a time
+        response = await client.get("/admin/profile", headers=authorization)
+        assert response.status_code == 409
+
+        response = await profile
+
+    assert response.status_code == 200
+
+    data = response.json()["data"]
+    assert [(r["request_id"], r["method"]) for r in data["requests"]] == [
+        ("abc", "get_one")
+    ]
+    assert 0 < len(data["functions"]) <= 5
+
+
+async def test_profiles_need_the_admin_token(create_client):
+    async with create_client(admin_token=ADMIN_TOKEN) as client:
+        response = await client.get("/admin/profile", params={"seconds": 0.01})
+        assert response.status_code == 401
+
+        response = await client.get(
+            "/admin/profile",
+            params={"seconds": 0.01},
+            headers={"authorization": "Bearer other"},
+        )
+        assert response.status_code == 401
+
+    async with create_client() as client:
+        response = await client.get(
+            "/admin/profile",
+            params={"seconds": 0.01},
+            headers={"authorization": f"Bearer {ADMIN_TOKEN}"},
+        )
+        assert response.status_code == 404
@@ -0,0 +1,48 @@
+import pytest
+from conftest import create_account_resource
+from conftest import create_session_resource
+from conftest import create_specification
+from conftest import insert_accounts
+from conftest import insert_sessions
+
+from noapi import __main__ as noapi_main
+
+
+@pytest.mark.parametrize(
+    "resource_def",
+    [
+        # not in any index
+        create_account_resource(filterable=["name"]),
+        create_account_resource(sortable=["name"]),
+        # not leading its index
+        create_session_resource(filterable=["created_at"]),
+        # its index's leading column can't be pinned by a filter
+        create_session_resource(filterable=[], sortable=["created_at"]),
+    ],
+)
+def test_unindexed_queries_are_rejected_at_load(database_path, resource_def):
+    with pytest.raises(ValueError, match="is not indexed"):
+        noapi_main.create_api(create_specification(database_path, resource_def))
+
+
+async def test_indexed_queries_are_served(create_client, database_path):
+    account_id = insert_accounts(database_path, 1)[0]["id"]
+    sessions = insert_sessions(database_path, account_id, 3)
+    insert_sessions(database_path, insert_accounts(database_path, 1)[0]["id"], 2)
+
+    session_def = create_session_resource(sortable=["created_at"])
+    async with create_client(session_def) as client:
+        response = await client.get(
+            "/session", params={"account_id": account_id, "sort": "-created_at"}
+        )
+        assert response.status_code == 200
+
+        ids = [rec["id"] for rec in response.json()["data"]]
+        assert ids == [session["id"] for session in reversed(sessions)]
+
+        # unless pinned to an account, its sessions' order has no index
+        response = await client.get("/session", params={"sort": "-created_at"})
+        assert response.status_code == 400
+
+        response = await client.get("/session", params={"created_at": "2023-01-01"})
+        assert response.status_code == 400
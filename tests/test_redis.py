@@ -0,0 +1,144 @@
+import asyncio
+from typing import Any
+from uuid import UUID
+
+import fakeredis
+import pytest
+from conftest import create_account_resource
+
+from noapi.context import Context
+from noapi.repositories import redis
+
+ID = "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"
+
+
+class FakeContext(Context):
+    def __init__(self, client: fakeredis.FakeAsyncRedis) -> None:
+        self.client = client
+
+    def get_database_client(self, service_name, read_only=False):
+        raise NotImplementedError
+
+    def mark_written(self, service_name):
+        pass
+
+    def prefers_primary(self, service_name):
+        return False
+
+    @property
+    def http_client(self):
+        raise NotImplementedError
+
+    def get_redis_client(self, service_name):
+        return self.client
+
+
+class FakeRepository:
+    # the records "in the database", & the reads which reached it
+    def __init__(self) -> None:
+        self.records: dict[str, dict[str, Any]] = {ID: {"id": ID, "name": "John"}}
+        self.reads = 0
+
+        # when set, reads fetch their record & then wait on it to be cleared
+        self.read_fetched = asyncio.Event()
+        self.resume_read: asyncio.Event | None = None
+
+    async def get_one(self, ctx, id, fields):
+        self.reads += 1
+        rec = self.records.get(str(UUID(str(id))))
+        rec = dict(rec) if rec is not None else None
+        if self.resume_read is not None:
+            self.read_fetched.set()
+            await self.resume_read.wait()
+
+        return rec
+
+    async def patch(self, ctx, id, data):
+        rec = self.records[str(UUID(str(id)))]
+        rec.update(data)
+        return dict(rec)
+
+    async def delete(self, ctx, id):
+        return self.records.pop(str(UUID(str(id))), None)
+
+
+@pytest.fixture
+def ctx() -> FakeContext:
+    return FakeContext(fakeredis.FakeAsyncRedis())
+
+
+@pytest.fixture
+def fake_repository() -> FakeRepository:
+    return FakeRepository()
+
+
+@pytest.fixture
+def repository(fake_repository):
+    resource_def = create_account_resource(read_through_cache={"service": "redis"})
+    return redis.wrap_resource_repository(
+        resource_def,
+        {
+            "get_one": fake_repository.get_one,
+            "patch": fake_repository.patch,
+            "delete": fake_repository.delete,
+        },
+    )
+
+
+async def test_reads_are_cached(ctx, fake_repository, repository):
+    assert await repository["get_one"](ctx, ID, None) == {"id": ID, "name": "John"}
+    assert await repository["get_one"](ctx, ID, None) == {"id": ID, "name": "John"}
+    assert fake_repository.reads == 1
+
+
+async def test_sparse_reads_are_served_from_whole_records(
+    ctx, fake_repository, repository
+):
+    await repository["get_one"](ctx, ID, None)
+    assert await repository["get_one"](ctx, ID, ["name"]) == {"name": "John"}
+    assert fake_repository.reads == 1
+
+
+async def test_spellings_of_an_id_share_an_entry(ctx, fake_repository, repository):
+    await repository["get_one"](ctx, ID, None)
+    await repository["get_one"](ctx, ID.upper(), None)
+    await repository["get_one"](ctx, ID.replace("-", ""), None)
+    assert fake_repository.reads == 1
+
+    # & so writing through any of them invalidates every one
+    await repository["patch"](ctx, ID.upper(), {"name": "Jane"})
+    assert (await repository["get_one"](ctx, ID, None))["name"] == "Jane"
+
+
+async def test_writes_invalidate(ctx, fake_repository, repository):
+    await repository["get_one"](ctx, ID, None)
+
+    await repository["patch"](ctx, ID, {"name": "Jane"})
+    assert (await repository["get_one"](ctx, ID, None))["name"] == "Jane"
+
+    await repository["delete"](ctx, ID)
+    assert await repository["get_one"](ctx, ID, None) is None
+
+
+async def test_reads_racing_writes_dont_cache_stale_records(
+    ctx, fake_repository, repository
+):
+    # a read fetches the record, & a patch lands before it's cached
+    fake_repository.resume_read = asyncio.Event()
+    read = asyncio.create_task(repository["get_one"](ctx, ID, None))
+    await fake_repository.read_fetched.wait()
+
+    await repository["patch"](ctx, ID, {"name": "Jane"})
+
+    fake_repository.resume_read.set()
+    assert (await read)["name"] == "John"  # as it was when it was read
+    fake_repository.resume_read = None
+
+    assert (await repository["get_one"](ctx, ID, None))["name"] == "Jane"
+
+
+async def test_redis_failures_fall_through(fake_repository, repository):
+    ctx = FakeContext(fakeredis.FakeAsyncRedis(connected=False))
+
+    assert await repository["get_one"](ctx, ID, None) == {"id": ID, "name": "John"}
+    assert await repository["patch"](ctx, ID, {"name": "Jane"}) is not None
@@ -0,0 +1,106 @@
+import contextlib
+import sqlite3
+import time
+
+import pytest
+from conftest import create_account_resource
+from conftest import create_database
+from conftest import create_specification
+from conftest import EPOCH
+from conftest import serve
+
+ACCOUNT_ID = "0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4"
+STICKY_COOKIE = "noapi_primary_sqlite"
+
+
+def insert_account(database_path, id, name):
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.execute(
+            "INSERT INTO accounts VALUES (?, ?, ?, ?)", (id, name, EPOCH, EPOCH)
+        )
+        connection.commit()
+
+
+def count_accounts(database_path):
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        return connection.execute("SELECT COUNT(*) FROM accounts").fetchone()[0]
+
+
+@pytest.fixture
+def replicated(tmp_path):
+    # a primary & a replica which (as if it were lagging) differ, so that
+    # which one a read went to can be told from what it read
+    primary_path = create_database(tmp_path / "primary.db")
+    replica_path = create_database(tmp_path / "replica.db")
+
+    def replicated(*resource_defs, **server_def):
+        specification = create_specification(primary_path, *resource_defs, **server_def)
+        [service_def] = specification["services"]
+        service_def["replicas"] = [{"database": str(replica_path)}]
+        return serve(specification)
+
+    replicated.primary_path = primary_path
+    replicated.replica_path = replica_path
+    return replicated
+
+
+async def test_reads_go_to_the_replica(replicated):
+    insert_account(replicated.primary_path, ACCOUNT_ID, "Primary")
+    insert_account(replicated.replica_path, ACCOUNT_ID, "Replica")
+
+    async with replicated() as client:
+        response = await client.get(f"/account/{ACCOUNT_ID}")
+        assert response.json()["data"]["name"] == "Replica"
+
+        response = await client.get("/account")
+        assert [rec["name"] for rec in response.json()["data"]] == ["Replica"]
+
+        # nothing was written, so nothing to stick to
+        assert STICKY_COOKIE not in response.cookies
+
+
+async def test_writes_go_to_the_primary(replicated):
+    async with replicated() as client:
+        response = await client.post("/account", json={"name": "Jane"})
+        assert response.status_code == 200
+
+    assert count_accounts(replicated.primary_path) == 1
+    assert count_accounts(replicated.replica_path) == 0
+
+    sticky_until = float(response.cookies[STICKY_COOKIE])
+    assert time.time() < sticky_until <= time.time() + 5
+
+
+async def test_writers_read_the_primary_for_a_while(replicated):
+    insert_account(replicated.primary_path, ACCOUNT_ID, "Primary")
+    insert_account(replicated.replica_path, ACCOUNT_ID, "Replica")
+
+    async with replicated() as client:
+        response = await client.patch(f"/account/{ACCOUNT_ID}", json={"name": "Jane"})
+        assert response.status_code == 200
+
+        # (the client sends back the cookie it was given)
+        response = await client.get(f"/account/{ACCOUNT_ID}")
+        assert response.json()["data"]["name"] == "Jane"
+
+        client.cookies.clear()
+        response = await client.get(f"/account/{ACCOUNT_ID}")
+        assert response.json()["data"]["name"] == "Replica"
+
+        # only until the window has passed
+        for sticky_until in (time.time() + 5, time.time() - 1):
+            client.cookies.set(STICKY_COOKIE, f"{sticky_until:.3f}")
+            response = await client.get(f"/account/{ACCOUNT_ID}")
+            expected = "Jane" if sticky_until > time.time() else "Replica"
+            assert response.json()["data"]["name"] == expected
+
+        client.cookies.set(STICKY_COOKIE, "not-a-time")
+        response = await client.get(f"/account/{ACCOUNT_ID}")
+        assert response.json()["data"]["name"] == "Replica"
+
+
+async def test_unreplicated_services_dont_stick(create_client):
+    async with create_client(create_account_resource()) as client:
+        response = await client.post("/account", json={"name": "Jane"})
+
+    assert STICKY_COOKIE not in response.cookies
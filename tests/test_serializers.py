@@ -0,0 +1,76 @@
+from datetime import date
+from datetime import datetime
+from decimal import Decimal
+from uuid import UUID
+
+import pydantic
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+import noapi.json
+from noapi import models
+from noapi import serializers
+from noapi.rest import responses
+
+
+class Order(models.BaseModel):
+    id: UUID
+    placed_at: datetime
+    shipped_at: datetime | None
+    due_on: date
+    total: Decimal
+    paid: bool
+
+
+# as the drivers return them; e.g. sqlite's text datetimes & decimals, or
+# mysql's tinyint bools
+RECORDS = [
+    {
+        "id": "0D9E5D5C-2A3E-4F4C-9A63-1F0D35C2B1A4",
+        "placed_at": "2023-01-01 00:00:14",
+        "shipped_at": None,
+        "due_on": "2023-01-08",
+        "total": "12.50",
+        "paid": 1,
+    },
+    {
+        "id": UUID("0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a5"),
+        "placed_at": datetime(2023, 1, 1, 0, 0, 15),
+        "shipped_at": "2023-01-02T00:00:00",
+        "due_on": date(2023, 1, 8),
+        "total": Decimal("7"),
+        "paid": 0,
+    },
+]
+
+
+def render(serialize, recs):
+    return noapi.json.dumps(responses.format_success([serialize(r) for r in recs]))
+
+
+def test_trusted_reads_serialize_as_validated_ones():
+    trusted = serializers.compile_serializer(Order)
+    assert render(trusted, RECORDS) == render(Order.from_mapping, RECORDS)
+
+    fields = ("placed_at", "total")
+    trusted = serializers.compile_serializer(Order, fields)
+    validated = models.create_partial_model(Order, fields).from_mapping
+    assert render(trusted, RECORDS) == render(validated, RECORDS)
+
+
+def test_decimals_serialize_as_pydantic_encodes_them():
+    body = noapi.json.loads(noapi.json.dumps(Order.from_mapping(RECORDS[0])))
+    assert body["total"] == pydantic.json.decimal_encoder(Decimal("12.50"))
+
+
+async def test_trusted_reads_respond_as_validated_ones(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    bodies = []
+    for trusted_reads in (False, True):
+        resource_def = create_account_resource(trusted_reads=trusted_reads)
+        async with create_client(resource_def) as client:
+            response = await client.get(f"/account/{account['id']}")
+            bodies.append(response.content)
+
+    assert bodies[0] == bodies[1]
@@ -0,0 +1,76 @@
+import asyncio
+import contextlib
+
+import pytest
+
+from noapi.services import sql
+
+
+class FakeDatabase:
+    # connections which fail to check once `failures` of them have been opened
+    def __init__(self, failures: int | None = None) -> None:
+        self.failures = failures
+        self.opened = 0
+        self.open = 0
+        self.max_open = 0
+
+    @contextlib.asynccontextmanager
+    async def connection(self):
+        self.opened += 1
+        self.open += 1
+        self.max_open = max(self.max_open, self.open)
+        try:
+            yield self
+        finally:
+            self.open -= 1
+
+    async def execute(self, query):
+        await asyncio.sleep(0)
+        if self.failures is not None and self.opened >= self.failures:
+            raise ConnectionError("connection refused")
+
+
+async def test_warm_up_holds_every_connection_at_once():
+    database = FakeDatabase()
+    await sql.warm_up(database, 4)
+
+    assert database.max_open == 4
+    assert database.open == 0
+
+
+async def test_warm_up_fails_rather_than_waiting_forever():
+    database = FakeDatabase(failures=3)
+    with pytest.raises(ConnectionError):
+        await asyncio.wait_for(sql.warm_up(database, 4), timeout=1)
+
+    await asyncio.sleep(0)
+    assert database.open == 0
+
+
+def create_service(driver, **pool_def):
+    return {
+        "name": "db",
+        "type": "sql",
+        "driver": driver,
+        "user": "noapi",
+        "password": "noapi",
+        "host": "localhost",
+        "port": 5432,
+        "database": "noapi",
+        "pool": pool_def,
+    }
+
+
+def test_statements_are_bounded_on_the_server():
+    database = sql.create_database(
+        create_service("postgresql", statement_timeout_ms=500)
+    )
+    options = database._backend._get_connection_kwargs()
+    assert options["server_settings"] == {"statement_timeout": "500"}
+
+    database = sql.create_database(create_service("mysql", statement_timeout_ms=500))
+    options = database._backend._get_connection_kwargs()
+    assert options["init_command"] == "SET SESSION MAX_EXECUTION_TIME = 500"
+
+    with pytest.raises(ValueError):
+        sql.create_database(create_service("sqlite", statement_timeout_ms=500))
@@ -0,0 +1,89 @@
+import asyncio
+
+import pytest
+
+from noapi.singleflight import SingleFlight
+
+
+async def test_concurrent_calls_are_coalesced():
+    flight = SingleFlight()
+    calls = 0
+    release = asyncio.Event()
+
+    async def function():
+        nonlocal calls
+        calls += 1
+        await release.wait()
+        return calls
+
+    waiters = [asyncio.create_task(flight.do("key", function)) for _ in range(5)]
+    await asyncio.sleep(0)
+    assert len(flight) == 1
+
+    release.set()
+    assert await asyncio.gather(*waiters) == [1] * 5
+    assert calls == 1
+    assert len(flight) == 0
+
+
+async def test_distinct_keys_arent_coalesced():
+    flight = SingleFlight()
+
+    async def function(value):
+        await asyncio.sleep(0)
+        return value
+
+    results = await asyncio.gather(
+        flight.do("a", lambda: function("a")), flight.do("b", lambda: function("b"))
+    )
+    assert results == ["a", "b"]
+
+
+async def test_exceptions_are_shared():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def function():
+        await release.wait()
+        raise ValueError("failed")
+
+    waiters = [asyncio.create_task(flight.do("key", function)) for _ in range(3)]
+    await asyncio.sleep(0)
+    release.set()
+
+    results = await asyncio.gather(*waiters, return_exceptions=True)
+    assert all(isinstance(result, ValueError) for result in results)
+    assert len(flight) == 0
+
+
+async def test_calls_after_completion_arent_coalesced():
+    flight = SingleFlight()
+    calls = 0
+
+    async def function():
+        nonlocal calls
+        calls += 1
+        return calls
+
+    assert await flight.do("key", function) == 1
+    assert await flight.do("key", function) == 2
+
+
+async def test_a_cancelled_caller_doesnt_cancel_the_others():
+    flight = SingleFlight()
+    release = asyncio.Event()
+
+    async def function():
+        await release.wait()
+        return "done"
+
+    cancelled = asyncio.create_task(flight.do("key", function))
+    waiter = asyncio.create_task(flight.do("key", function))
+    await asyncio.sleep(0)
+
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+
+    release.set()
+    assert await waiter == "done"
@@ -0,0 +1,36 @@
+import databases
+import pytest
+import sqlalchemy
+
+from noapi.statements import Statement
+
+SQL = "SELECT id, name FROM accounts WHERE id = :id AND name IN (:a, :b)"
+VALUES = {"id": "0d9e5d5c", "a": "John", "b": "Jane"}
+
+
+# statements stand in for clauses when `databases` compiles a query, which it
+# does in a private hook of each backend; (see statements.py)
+@pytest.mark.parametrize(
+    ("url", "driver"),
+    [
+        ("sqlite:///noapi.db", "aiosqlite"),
+        ("postgresql://noapi@localhost/noapi", "asyncpg"),
+        ("mysql://noapi@localhost/noapi", "aiomysql"),
+    ],
+)
+def test_statements_compile_as_text_clauses_do(url, driver):
+    pytest.importorskip(driver)
+    connection = databases.Database(url)._backend.connection()
+
+    statement = Statement(SQL, f"Account.{driver}")
+    for values in (VALUES, {**VALUES, "id": "f3c1a2b0"}):
+        query, args, _ = connection._compile(statement.bind(values))
+        expected_query, expected_args, _ = connection._compile(
+            sqlalchemy.text(SQL).bindparams(**values)
+        )
+
+        assert query == expected_query
+        assert args == expected_args
+
+    assert statement.stats.compilations == 1
+    assert statement.stats.executions == 2
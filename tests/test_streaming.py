@@ -0,0 +1,107 @@
+import asyncio
+import json
+
+import fastapi
+import pytest
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+from noapi import controllers
+from noapi import metrics
+from noapi.deadlines import DeadlineExceeded
+from noapi.rest import admission
+from noapi.rest import responses
+from noapi.rest.context import RestContext
+
+
+async def test_get_many_streams_ndjson(create_client, database_path):
+    accounts = insert_accounts(database_path, 3)
+
+    async with create_client() as client:
+        response = await client.get("/account", params={"stream": "true"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == responses.NDJSON_MEDIA_TYPE
+
+    recs = [json.loads(line) for line in response.text.splitlines()]
+    assert [rec["id"] for rec in recs] == [account["id"] for account in accounts]
+
+
+async def test_streams_count_their_database_time(create_client, database_path):
+    insert_accounts(database_path, 3)
+
+    resource_def = create_account_resource(name="StreamedAccount")
+    async with create_client(resource_def) as client:
+        await client.get("/streamedaccount", params={"stream": "true"})
+
+    # once the body has been read, not once the handler has returned
+    assert metrics._REQUESTS[("StreamedAccount", "get_many")] == 1
+    assert metrics._PHASE_LATENCIES[("StreamedAccount", "get_many", "db")].count == 1
+
+
+@pytest.fixture
+def stream(monkeypatch):
+    # get_many streams whatever's passed to it; the default is overridden
+    # with an async generator function, which is called for each request
+    stream = {}
+
+    def create_get_many_function(resource_def, model, usecases):
+        async def function(
+            request: fastapi.Request, ctx: RestContext = fastapi.Depends()
+        ) -> fastapi.Response:
+            return responses.stream(stream["body"]())
+
+        return function
+
+    monkeypatch.setattr(
+        controllers, "create_get_many_function", create_get_many_function
+    )
+    return stream
+
+
+async def test_streams_hold_their_admission(create_client, stream):
+    active = []
+
+    async def body():
+        active.append(admission.get_admission_stats()["AdmittedAccount"]["active"])
+        yield {"name": "John"}
+
+    stream["body"] = body
+
+    resource_def = create_account_resource(
+        name="AdmittedAccount", concurrency_limit={"max_concurrent": 1}
+    )
+    async with create_client(resource_def) as client:
+        response = await client.get("/admittedaccount")
+        assert response.status_code == 200
+
+        assert active == [1]
+        assert admission.get_admission_stats()["AdmittedAccount"]["active"] == 0
+
+
+async def test_streams_are_cut_short_at_their_deadlines(create_client, stream):
+    async def body():
+        yield {"name": "John"}
+        await asyncio.sleep(1)
+        yield {"name": "Jane"}
+
+    stream["body"] = body
+
+    resource_def = create_account_resource(
+        name="SlowAccount",
+        timeout={"timeout_ms": 20},
+        concurrency_limit={"max_concurrent": 1},
+    )
+    async with create_client(resource_def) as client:
+        # (the app's exceptions are raised by the test client, rather than
+        # the response being cut short; by way of the stream's task group)
+        with pytest.raises(Exception) as info:
+            await asyncio.wait_for(client.get("/slowaccount"), timeout=0.5)
+
+        errors = getattr(info.value, "exceptions", [info.value])
+        assert any(isinstance(error, DeadlineExceeded) for error in errors)
+
+        assert admission.get_admission_stats()["SlowAccount"]["active"] == 0
+
+    errors = metrics._ERRORS[("SlowAccount", "get_many", "server.deadline_exceeded")]
+    assert errors == 1
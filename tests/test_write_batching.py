@@ -0,0 +1,130 @@
+import asyncio
+import contextlib
+import sqlite3
+
+from conftest import create_account_resource
+from conftest import create_specification
+from conftest import serve
+
+from noapi.context import Context
+from noapi.repositories import write_batching
+
+
+class FakeContext(Context):
+    def __init__(self) -> None:
+        self.written: list[str] = []
+
+    def get_database_client(self, service_name, read_only=False):
+        raise NotImplementedError
+
+    def mark_written(self, service_name):
+        self.written.append(service_name)
+
+    def prefers_primary(self, service_name):
+        return False
+
+    @property
+    def http_client(self):
+        raise NotImplementedError
+
+    def get_redis_client(self, service_name):
+        raise NotImplementedError
+
+
+class Obj(dict):
+    @property
+    def id(self):
+        return self["id"]
+
+
+async def test_concurrent_posts_are_batched(create_client):
+    resource_def = create_account_resource(
+        name="BatchedWriteAccount", write_batching={"window_ms": 10}
+    )
+    async with create_client(resource_def) as client:
+        responses = await asyncio.gather(
+            *(
+                client.post("/batchedwriteaccount", json={"name": f"Jane #{i}"})
+                for i in range(5)
+            )
+        )
+
+        stats = write_batching.get_write_batching_stats()["BatchedWriteAccount"]
+
+    assert [response.status_code for response in responses] == [200] * 5
+    assert [response.json()["data"]["name"] for response in responses] == [
+        f"Jane #{i}" for i in range(5)
+    ]
+    assert stats["count"] == 1
+    assert stats["sum"] == 5
+
+
+async def test_apps_have_batchers_of_their_own(database_path):
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        connection.execute("CREATE TABLE archived_accounts AS SELECT * FROM accounts")
+        connection.commit()
+
+    account_def = create_account_resource(write_batching={})
+    archived_account_def = {**account_def, "table_name": "archived_accounts"}
+    async with (
+        serve(create_specification(database_path, account_def)) as a,
+        serve(create_specification(database_path, archived_account_def)) as b,
+    ):
+        assert (await a.post("/account", json={"name": "John"})).status_code == 200
+        assert (await b.post("/account", json={"name": "Jane"})).status_code == 200
+
+    with contextlib.closing(sqlite3.connect(database_path)) as connection:
+        assert connection.execute("SELECT name FROM accounts").fetchall() == [("John",)]
+        assert connection.execute("SELECT name FROM archived_accounts").fetchall() == [
+            ("Jane",)
+        ]
+
+
+async def test_every_poster_reads_its_write():
+    # the batch is written with the first poster's context alone
+    async def post_batch(ctx, objs):
+        return [{"id": obj["id"]} for obj in objs]
+
+    repository = write_batching.wrap_resource_repository(
+        create_account_resource(write_batching={}),
+        {"post": None, "post_batch": post_batch},
+    )
+
+    contexts = [FakeContext(), FakeContext()]
+    await asyncio.gather(
+        *(repository["post"](ctx, Obj(id=i)) for i, ctx in enumerate(contexts))
+    )
+
+    assert [ctx.written for ctx in contexts] == [["sqlite"], ["sqlite"]]
+
+
+async def test_bad_records_fail_alone():
+    # a duplicate id fails the batch's INSERT, & its own
+    async def post_batch(ctx, objs):
+        if any(obj.id == "duplicate" for obj in objs):
+            raise sqlite3.IntegrityError("UNIQUE constraint failed: accounts.id")
+
+        return [{"id": obj.id} for obj in objs]
+
+    async def post(ctx, obj):
+        return (await post_batch(ctx, [obj]))[0]
+
+    repository = write_batching.wrap_resource_repository(
+        create_account_resource(name="FallbackAccount", write_batching={}),
+        {"post": post, "post_batch": post_batch},
+    )
+
+    results = await asyncio.gather(
+        *(
+            repository["post"](FakeContext(), Obj(id=id))
+            for id in ("a", "duplicate", "b")
+        ),
+        return_exceptions=True,
+    )
+
+    assert results[0] == {"id": "a"}
+    assert isinstance(results[1], sqlite3.IntegrityError)
+    assert results[2] == {"id": "b"}
+    assert (
+        write_batching.get_write_batching_stats()["FallbackAccount"]["fallbacks"] == 1
+    )
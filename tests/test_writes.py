@@ -0,0 +1,101 @@
+from conftest import create_account_resource
+from conftest import insert_accounts
+
+
+async def test_post(create_client):
+    async with create_client() as client:
+        response = await client.post("/account", json={"name": "Jane"})
+        assert response.status_code == 200
+
+        rec = response.json()["data"]
+        assert rec["name"] == "Jane"
+
+        response = await client.get(f"/account/{rec['id']}")
+        assert response.json()["data"] == rec
+
+
+async def test_patch_writes_only_the_fields_given(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        before = (await client.get(f"/account/{account['id']}")).json()["data"]
+
+        response = await client.patch(
+            f"/account/{account['id']}", json={"name": "Jane"}
+        )
+        assert response.status_code == 200
+
+        after = response.json()["data"]
+        assert after["name"] == "Jane"
+        assert after["id"] == before["id"]
+        assert after["created_at"] == before["created_at"]
+
+        # a patch is a new version of the record
+        assert after["updated_at"] > before["updated_at"]
+
+        response = await client.get(f"/account/{account['id']}")
+        assert response.json()["data"] == after
+
+
+async def test_patch_unknown_id(create_client, database_path):
+    insert_accounts(database_path, 1)
+
+    async with create_client() as client:
+        response = await client.patch(
+            "/account/0d9e5d5c-2a3e-4f4c-9a63-1f0d35c2b1a4", json={"name": "Jane"}
+        )
+
+    assert response.status_code == 404
+
+
+async def test_patch_cannot_null_required_fields(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.patch(f"/account/{account['id']}", json={"name": None})
+        assert response.status_code == 422
+
+        response = await client.get(f"/account/{account['id']}")
+        assert response.json()["data"]["name"] == account["name"]
+
+
+async def test_patch_changes_the_etag(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.get(f"/account/{account['id']}")
+        etag = response.headers["etag"]
+
+        await client.patch(f"/account/{account['id']}", json={"name": "Jane"})
+
+        response = await client.get(
+            f"/account/{account['id']}", headers={"if-none-match": etag}
+        )
+
+    assert response.status_code == 200
+    assert response.json()["data"]["name"] == "Jane"
+
+
+async def test_patch_invalidates_the_cache(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    resource_def = create_account_resource(cache={"max_entries": 8})
+    async with create_client(resource_def) as client:
+        await client.get(f"/account/{account['id']}")
+        await client.patch(f"/account/{account['id']}", json={"name": "Jane"})
+
+        response = await client.get(f"/account/{account['id']}")
+
+    assert response.json()["data"]["name"] == "Jane"
+
+
+async def test_delete(create_client, database_path):
+    account = insert_accounts(database_path, 1)[0]
+
+    async with create_client() as client:
+        response = await client.delete(f"/account/{account['id']}")
+        assert response.status_code == 200
+
+        response = await client.get(f"/account/{account['id']}")
+
+    assert response.status_code == 404